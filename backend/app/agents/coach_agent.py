@@ -1,12 +1,96 @@
 """
 Coach Agent - AI-powered conversational financial coach
-Uses Gemini API for personalized advice
+Uses Gemini API (async client) for personalized advice
 """
+import asyncio
+import hashlib
+import math
+import random
+from bisect import bisect_left
+from functools import lru_cache, partial
 import google.generativeai as genai
-from typing import Dict, List, Optional
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+from typing import AsyncIterator, Dict, Final, List, Optional, Set, Tuple
 
 from app.config import settings
 
+RESPONSE_CACHE_SIZE = 2048
+RESPONSE_CACHE_TTL_SECONDS = 900
+MAX_BACKOFF_SECONDS = 30.0
+CHARS_PER_TOKEN = 4
+AMOUNT_FORMAT = ",.0f"
+# Volatility above each bound moves to the next label: <=0.1 low, <=0.3 moderate.
+_VOLATILITY_BOUNDS: Final = (0.1, 0.3)
+_VOLATILITY_LABELS: Final = ("low", "moderate", "high")
+
+
+# Prompt bodies, filled per call with str.format_map.
+_ADVICE_TEMPLATE: Final[str] = (
+    "{context}\n\n"
+    "User Question: {question}\n"
+    "{language}\n\n"
+    "Respond as TaalAI:"
+)
+_DAILY_NUDGE_TEMPLATE: Final[str] = (
+    "User Financial Summary:\n"
+    "- Pulse Score: {pulse_score}/100\n"
+    "- Avg Income: ₹{avg_income:,.0f}\n"
+    "- Savings Rate: {savings_rate:.1f}%\n"
+    "- Recent Trend: {trend}\n\n"
+    "Generate a short (1-2 sentences), encouraging daily nudge that motivates the user to make a "
+    "small positive financial decision today. Be specific and actionable.\n\n"
+    "Daily Nudge:"
+)
+_SPENDING_TEMPLATE: Final[str] = (
+    "User's spending breakdown:\n"
+    "{summary}\n\n"
+    "Analyze this spending pattern and provide:\n"
+    "1. One key observation\n"
+    "2. One specific suggestion to optimize spending\n"
+    "3. One encouraging note\n\n"
+    "Keep it brief (3-4 sentences).\n\n"
+    "Analysis:"
+)
+_GOAL_TEMPLATE: Final[str] = (
+    "User wants to save for: {goal_name}\n"
+    "Target Amount: ₹{target_amount:,.0f}\n"
+    "Already Saved: ₹{current_savings:,.0f}\n"
+    "Remaining: ₹{remaining:,.0f}\n"
+    "Average Monthly Income: ₹{monthly_income:,.0f}\n\n"
+    "Create a practical, encouraging 3-step plan to help them achieve this goal. Consider their "
+    "irregular income. Be specific with numbers and timelines.\n\n"
+    "Goal Plan:"
+)
+
+
+def _quantize_amount(amount: float) -> float:
+    """
+    Round an averaged amount to the configured significant digits so
+    near-identical contexts produce identical prompts and hit the
+    response/prefix caches, while small amounts keep their magnitude.
+    """
+    digits = settings.coach_amount_significant_digits
+    if digits <= 0 or not amount:
+        return amount
+    return round(amount, digits - 1 - math.floor(math.log10(abs(amount))))
+
+
+def _volatility_level(volatility: float) -> str:
+    """Map an income volatility ratio to its coaching label."""
+    return _VOLATILITY_LABELS[bisect_left(_VOLATILITY_BOUNDS, volatility)]
+
+
+@lru_cache(maxsize=1)
+def _configure_genai() -> None:
+    """
+    Configure the Gemini SDK once per process. Re-running genai.configure
+    drops the cached clients, so every CoachAgent shares one gRPC (HTTP/2,
+    keep-alive) channel instead of each opening its own connection.
+    """
+    genai.configure(api_key=settings.gemini_api_key, transport="grpc")
+
 
 class CoachAgent:
     """
@@ -14,7 +98,14 @@ class CoachAgent:
     """
 
     def __init__(self):
-        genai.configure(api_key=settings.gemini_api_key)
+        _configure_genai()
+
+        self._semaphore = asyncio.Semaphore(max(1, settings.gemini_max_concurrency))
+        self._inflight: Dict[bytes, asyncio.Task] = {}
+        self._rate_limiters: Dict[str, Tuple[Optional[AsyncLimiter], Optional[AsyncLimiter]]] = {}
+        self._response_cache: TTLCache = TTLCache(
+            maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL_SECONDS
+        )
 
         self.model_candidates = self._build_model_candidates()
         if not self.model_candidates:
@@ -22,17 +113,6 @@ class CoachAgent:
                 "No Gemini models configured. Set GEMINI_MODEL in your backend .env file."
             )
 
-        self._model_index = 0
-        initial_model_name = self.model_candidates[self._model_index]
-        try:
-            self.model = genai.GenerativeModel(initial_model_name)
-            self.active_model_name = initial_model_name
-        except Exception as exc:
-            raise RuntimeError(
-                f"Unable to initialize Gemini model '{initial_model_name}'. "
-                "Check your GEMINI_API_KEY and GEMINI_MODEL environment variables."
-            ) from exc
-
         self.system_prompt = (
             "You are TaalAI, a culturally-aware financial coach built for Indians with irregular incomes "
             "(freelancers, creators, consultants).\n\n"
@@ -57,6 +137,42 @@ class CoachAgent:
             "- Stay practical, empathetic, and rooted in the Indian context."
         )
 
+        # Gemini models are built on first use so importing routes and
+        # forking workers does not pay for them up front. Built handles are
+        # kept per candidate index, and candidates that failed are skipped
+        # for the rest of the process lifetime.
+        self._model_index = 0
+        self._models: Dict[int, genai.GenerativeModel] = {}
+        self._failed_models: Set[int] = set()
+        self.active_model_name = self.model_candidates[self._model_index]
+
+    @property
+    def model(self) -> genai.GenerativeModel:
+        """
+        The active Gemini model, constructed lazily on first access.
+        """
+        try:
+            return self._model_at(self._model_index)
+        except Exception as exc:
+            raise RuntimeError(
+                f"Unable to initialize Gemini model '{self.active_model_name}'. "
+                "Check your GEMINI_API_KEY and GEMINI_MODEL environment variables."
+            ) from exc
+
+    @model.setter
+    def model(self, value: genai.GenerativeModel) -> None:
+        self._models[self._model_index] = value
+
+    def _model_at(self, index: int) -> genai.GenerativeModel:
+        """
+        Return the memoized model handle for a candidate, building it once.
+        """
+        model = self._models.get(index)
+        if model is None:
+            model = self._build_model(self.model_candidates[index])
+            self._models[index] = model
+        return model
+
     def _build_model_candidates(self) -> List[str]:
         """
         Build the ordered list of Gemini model candidates, removing duplicates.
@@ -80,44 +196,150 @@ class CoachAgent:
                 seen.add(candidate)
         return candidates
 
-    def _use_next_model(self) -> bool:
+    def _build_model(self, model_name: str) -> genai.GenerativeModel:
+        """
+        Create a Gemini model with the system prompt attached as a system
+        instruction, so it is not re-sent inside every prompt body. The
+        stable prefix is what Gemini's implicit caching reuses.
+        """
+        return genai.GenerativeModel(model_name, system_instruction=self.system_prompt)
+
+    def _use_next_model(self, failed_index: Optional[int] = None) -> bool:
         """
         Switch to the next available Gemini model in the preference list.
         Returns True if a switch succeeded, False otherwise.
+
+        The agent is shared across concurrent requests, so when failed_index
+        is given and another request already moved past that model, the
+        current model is kept instead of skipping a candidate.
         """
+        if failed_index is not None and failed_index != self._model_index:
+            return True
+        self._failed_models.add(self._model_index)
+        self._models.pop(self._model_index, None)
         for next_index in range(self._model_index + 1, len(self.model_candidates)):
-            next_model_name = self.model_candidates[next_index]
+            if next_index in self._failed_models:
+                continue
             try:
-                self.model = genai.GenerativeModel(next_model_name)
-                self._model_index = next_index
-                self.active_model_name = next_model_name
-                return True
+                self._model_at(next_index)
             except Exception:
+                self._failed_models.add(next_index)
                 continue
+            self._model_index = next_index
+            self.active_model_name = self.model_candidates[next_index]
+            return True
         return False
 
-    def _generate_with_retry(self, prompt: str) -> str:
+    def _response_cache_key(self, prompt: str) -> bytes:
+        """
+        Hash the model name and prompt into a compact response cache key.
+        """
+        payload = f"{self.active_model_name}\x00{prompt.strip()}".encode()
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    async def _generate_with_retry(self, prompt: str, use_cache: bool = False) -> str:
         """
         Generate Gemini content, falling back to alternative models on 404 errors.
+
+        When use_cache is set, identical prompts within the TTL are answered
+        from the in-process response cache without calling Gemini. Identical
+        prompts already in flight share a single Gemini call either way.
+        """
+        cache_key = self._response_cache_key(prompt)
+        if use_cache:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        inflight = self._inflight.get(cache_key)
+        if inflight is None:
+            # The call runs as its own task, so no single caller owns it: a
+            # caller that is cancelled (e.g. a client disconnect) leaves it
+            # running for everyone else awaiting the same prompt.
+            inflight = asyncio.get_running_loop().create_task(self._generate_uncached(prompt))
+            self._inflight[cache_key] = inflight
+            inflight.add_done_callback(partial(self._finish_flight, cache_key, use_cache))
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            # Only retry when the shared call itself was cancelled, not this caller
+            if not inflight.cancelled() or asyncio.current_task().cancelling():
+                raise
+        return await self._generate_with_retry(prompt, use_cache)
+
+    def _finish_flight(self, cache_key: bytes, use_cache: bool, task: asyncio.Task) -> None:
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        if task.cancelled():
+            return
+        # Retrieving the exception also keeps an unawaited failure from
+        # being reported as never retrieved
+        if task.exception() is None and use_cache and task.result():
+            self._response_cache[cache_key] = task.result()
+
+    async def _generate_uncached(self, prompt: str) -> str:
+        """
+        Call Gemini for a prompt, switching models on 404 errors and backing
+        off with jitter on rate-limit (429) or overload (503) errors.
         """
-        attempts_remaining = len(self.model_candidates) - self._model_index
-        last_error: Optional[Exception] = None
+        throttled_attempts = 0
 
-        for _ in range(max(1, attempts_remaining)):
+        while True:
+            model_index = self._model_index
             try:
-                response = self.model.generate_content(prompt)
+                await self._wait_for_rate_limit(prompt)
+                async with self._semaphore:
+                    response = await self.model.generate_content_async(prompt)
                 return response.text.strip() if getattr(response, "text", None) else ""
+            except (ResourceExhausted, ServiceUnavailable) as exc:
+                if throttled_attempts >= settings.llm_max_retries:
+                    raise exc
+                await asyncio.sleep(self._backoff_delay(exc, throttled_attempts))
+                throttled_attempts += 1
             except Exception as exc:
-                last_error = exc
                 error_text = str(exc).lower()
                 model_not_found = "404" in error_text or "not found" in error_text
-                if model_not_found and self._use_next_model():
+                if model_not_found and self._use_next_model(failed_index=model_index):
                     continue
                 raise exc
 
-        if last_error:
-            raise last_error
-        raise RuntimeError("Gemini generation failed without an error message.")
+    async def _wait_for_rate_limit(self, prompt: str) -> None:
+        """
+        Pace calls against the active model's request and token budgets so
+        requests that would certainly be throttled wait locally instead of
+        spending a round-trip on a 429.
+        """
+        limiters = self._rate_limiters.get(self.active_model_name)
+        if limiters is None:
+            rpm, tpm = settings.gemini_rpm, settings.gemini_tpm
+            limiters = (
+                AsyncLimiter(rpm, 60) if rpm > 0 else None,
+                AsyncLimiter(tpm, 60) if tpm > 0 else None,
+            )
+            self._rate_limiters[self.active_model_name] = limiters
+
+        request_limiter, token_limiter = limiters
+        if request_limiter is not None:
+            await request_limiter.acquire()
+        if token_limiter is not None:
+            estimated_tokens = len(prompt) // CHARS_PER_TOKEN + 1
+            await token_limiter.acquire(min(estimated_tokens, token_limiter.max_rate))
+
+    @staticmethod
+    def _backoff_delay(error: Exception, attempt: int) -> float:
+        """
+        Seconds to wait before retrying a throttled call. Honors Retry-After
+        when the API sends it, otherwise exponential backoff with jitter.
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("Retry-After") if hasattr(headers, "get") else None
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_BACKOFF_SECONDS)
+            except ValueError:
+                pass
+        return min(2 ** attempt + random.uniform(0, 1), MAX_BACKOFF_SECONDS)
 
     def _format_error(self, error: Exception) -> str:
         """
@@ -130,35 +352,27 @@ class CoachAgent:
             f"Last error: {str(error)}"
         )
 
-    def generate_advice(
+    def _build_advice_prompt(
         self,
         user_message: str,
-        context: Optional[Dict] = None,
-        language: str = "en"
+        context: Optional[Dict],
+        language: str
     ) -> str:
         """
-        Generate personalized financial advice
-
-        Args:
-            user_message: User's question or concern
-            context: User's financial data for context
-            language: Preferred language (en, hi, hinglish)
-
-        Returns:
-            AI-generated advice
+        Fill the advice template with the user's context and language.
         """
         # Build context string
-        context_str = ""
+        context_parts: List[str] = []
         if context:
             if 'pulse_score' in context:
-                context_str += f"\nUser's Financial Pulse: {context['pulse_score']}/100"
+                context_parts.append(f"User's Financial Pulse: {context['pulse_score']}/100")
             if 'avg_income' in context:
-                context_str += f"\nAverage Monthly Income: ,1{context['avg_income']:,.0f}"
+                context_parts.append(f"Average Monthly Income: ₹{format(_quantize_amount(context['avg_income']), AMOUNT_FORMAT)}")
             if 'avg_expense' in context:
-                context_str += f"\nAverage Monthly Expense: ,1{context['avg_expense']:,.0f}"
+                context_parts.append(f"Average Monthly Expense: ₹{format(_quantize_amount(context['avg_expense']), AMOUNT_FORMAT)}")
             if 'volatility' in context:
-                volatility_level = "high" if context['volatility'] > 0.3 else "moderate" if context['volatility'] > 0.1 else "low"
-                context_str += f"\nIncome Volatility: {volatility_level}"
+                context_parts.append(f"Income Volatility: {_volatility_level(context['volatility'])}")
+        context_str = "\n".join(context_parts)
 
         # Language instruction
         language_instruction = ""
@@ -167,21 +381,71 @@ class CoachAgent:
         elif language == "hinglish":
             language_instruction = "\nRespond in Hinglish (mix Hindi words with English)."
 
-        full_prompt = f"""{self.system_prompt}
+        return _ADVICE_TEMPLATE.format_map({
+            "context": context_str,
+            "question": user_message,
+            "language": language_instruction,
+        })
 
-{context_str}
+    async def generate_advice(
+        self,
+        user_message: str,
+        context: Optional[Dict] = None,
+        language: str = "en"
+    ) -> str:
+        """
+        Generate personalized financial advice
 
-User Question: {user_message}
-{language_instruction}
+        Args:
+            user_message: User's question or concern
+            context: User's financial data for context
+            language: Preferred language (en, hi, hinglish)
 
-Respond as TaalAI:"""
+        Returns:
+            AI-generated advice
+        """
+        full_prompt = self._build_advice_prompt(user_message, context, language)
 
         try:
-            return self._generate_with_retry(full_prompt)
+            return await self._generate_with_retry(full_prompt)
         except Exception as e:
             return self._format_error(e)
 
-    def generate_daily_nudge(
+    async def stream_advice(
+        self,
+        user_message: str,
+        context: Optional[Dict] = None,
+        language: str = "en"
+    ) -> AsyncIterator[str]:
+        """
+        Stream personalized financial advice as Gemini generates it
+
+        Args:
+            user_message: User's question or concern
+            context: User's financial data for context
+            language: Preferred language (en, hi, hinglish)
+
+        Yields:
+            Chunks of AI-generated advice
+        """
+        full_prompt = self._build_advice_prompt(user_message, context, language)
+
+        try:
+            await self._wait_for_rate_limit(full_prompt)
+            async with self._semaphore:
+                response = await self.model.generate_content_async(full_prompt, stream=True)
+                async for chunk in response:
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. safety metadata only)
+                        continue
+                    if text:
+                        yield text
+        except Exception as e:
+            yield self._format_error(e)
+
+    async def generate_daily_nudge(
         self,
         user_data: Dict
     ) -> str:
@@ -194,24 +458,39 @@ Respond as TaalAI:"""
         Returns:
             Short motivational message
         """
-        prompt = f"""{self.system_prompt}
-
-User Financial Summary:
-- Pulse Score: {user_data.get('pulse_score', 50)}/100
-- Avg Income: ,1{user_data.get('avg_income', 0):,.0f}
-- Savings Rate: {user_data.get('savings_rate', 0):.1f}%
-- Recent Trend: {user_data.get('trend', 'stable')}
-
-Generate a short (1-2 sentences), encouraging daily nudge that motivates the user to make a small positive financial decision today. Be specific and actionable.
-
-Daily Nudge:"""
+        prompt = _DAILY_NUDGE_TEMPLATE.format_map({
+            "pulse_score": user_data.get('pulse_score', 50),
+            "avg_income": _quantize_amount(user_data.get('avg_income', 0)),
+            # The template already renders one decimal place
+            "savings_rate": user_data.get('savings_rate', 0),
+            "trend": user_data.get('trend', 'stable'),
+        })
 
         try:
-            return self._generate_with_retry(prompt)
+            return await self._generate_with_retry(prompt, use_cache=True)
         except Exception as e:
             return self._format_error(e)
 
-    def explain_spending_pattern(
+    async def batch_daily_nudges(
+        self,
+        users: List[Dict]
+    ) -> List[str]:
+        """
+        Generate daily nudges for many users concurrently
+
+        Gemini calls overlap up to GEMINI_MAX_CONCURRENCY in flight at once.
+
+        Args:
+            users: Financial information for each user
+
+        Returns:
+            Nudges in the same order as users
+        """
+        return list(await asyncio.gather(
+            *(self.generate_daily_nudge(user_data) for user_data in users)
+        ))
+
+    async def explain_spending_pattern(
         self,
         spending_data: List[Dict]
     ) -> str:
@@ -229,30 +508,18 @@ Daily Nudge:"""
 
         # Summarize spending
         summary = "\n".join([
-            f"- {item['category']}: ,1{item['amount']:,.0f}"
+            f"- {item['category']}: ₹{format(_quantize_amount(item['amount']), AMOUNT_FORMAT)}"
             for item in spending_data[:5]  # Top 5 categories
         ])
 
-        prompt = f"""{self.system_prompt}
-
-User's spending breakdown:
-{summary}
-
-Analyze this spending pattern and provide:
-1. One key observation
-2. One specific suggestion to optimize spending
-3. One encouraging note
-
-Keep it brief (3-4 sentences).
-
-Analysis:"""
+        prompt = _SPENDING_TEMPLATE.format_map({"summary": summary})
 
         try:
-            return self._generate_with_retry(prompt)
+            return await self._generate_with_retry(prompt, use_cache=True)
         except Exception as e:
             return self._format_error(e)
 
-    def create_goal_plan(
+    async def create_goal_plan(
         self,
         goal_name: str,
         target_amount: float,
@@ -273,19 +540,24 @@ Analysis:"""
         """
         remaining = target_amount - current_savings
 
-        prompt = f"""{self.system_prompt}
-
-User wants to save for: {goal_name}
-Target Amount: ,1{target_amount:,.0f}
-Already Saved: ,1{current_savings:,.0f}
-Remaining: ,1{remaining:,.0f}
-Average Monthly Income: ,1{monthly_income:,.0f}
-
-Create a practical, encouraging 3-step plan to help them achieve this goal. Consider their irregular income. Be specific with numbers and timelines.
-
-Goal Plan:"""
+        prompt = _GOAL_TEMPLATE.format_map({
+            "goal_name": goal_name,
+            "target_amount": target_amount,
+            "current_savings": current_savings,
+            "remaining": remaining,
+            "monthly_income": _quantize_amount(monthly_income),
+        })
 
         try:
-            return self._generate_with_retry(prompt)
+            return await self._generate_with_retry(prompt, use_cache=True)
         except Exception as e:
             return self._format_error(e)
+
+
+@lru_cache(maxsize=1)
+def get_coach_agent() -> CoachAgent:
+    """
+    Process-wide CoachAgent so routes and services share its response
+    cache, in-flight map, rate limiters and model fallback state.
+    """
+    return CoachAgent()
@@ -0,0 +1,63 @@
+"""
+Income View - shared column layout of income records for the analytics agents
+"""
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Sequence, Union
+
+
+@dataclass(frozen=True)
+class IncomeView:
+    """
+    Income records as parallel arrays (float64 amounts, datetime64[D] dates)
+
+    Build it once per request with from_records and hand the same view to
+    TaalCoreAgent and PredictorAgent instead of re-walking the dict list.
+    """
+
+    amounts: "np.ndarray"
+    dates: "np.ndarray"
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "IncomeView":
+        if not HAS_NUMPY:
+            raise RuntimeError("IncomeView requires numpy")
+        amounts = np.fromiter((item['amount'] for item in records), dtype=np.float64, count=len(records))
+        # Missing dates become NaT; only forecasting needs them
+        dates = np.array(
+            [item.get('date') for item in records], dtype='datetime64[s]'
+        ).astype('datetime64[D]')
+        return cls(amounts, dates)
+
+    @classmethod
+    def from_columns(cls, amounts: Sequence[float], dates: Sequence[date]) -> "IncomeView":
+        """Build straight from parallel column values, e.g. aggregated SQL rows"""
+        if not HAS_NUMPY:
+            raise RuntimeError("IncomeView requires numpy")
+        return cls(
+            np.fromiter(amounts, dtype=np.float64, count=len(amounts)),
+            np.array(dates, dtype='datetime64[D]'),
+        )
+
+    def __len__(self) -> int:
+        return self.amounts.shape[0]
+
+
+def amounts_array(data: Union[List[Dict], IncomeView]) -> "np.ndarray":
+    """float64 amounts from either a view or legacy record dicts"""
+    if isinstance(data, IncomeView):
+        return data.amounts
+    return np.fromiter((item['amount'] for item in data), dtype=np.float64, count=len(data))
+
+
+def dates_array(data: Union[List[Dict], IncomeView]) -> "np.ndarray":
+    """datetime64[D] dates from either a view or legacy record dicts"""
+    if isinstance(data, IncomeView):
+        return data.dates
+    return np.array([item['date'] for item in data], dtype='datetime64[s]').astype('datetime64[D]')
@@ -1,25 +1,38 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from contextvars import ContextVar
 from datetime import date, datetime
 from decimal import Decimal
-from typing import TYPE_CHECKING, Any, List, Sequence, Tuple, TypedDict
+from functools import lru_cache, partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Mapping, Sequence, Tuple, TypedDict
 from uuid import UUID
 
+import tiktoken
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
-from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, raiseload
 from sqlalchemy.sql.sqltypes import Boolean, Date, DateTime, Numeric
+from starlette.concurrency import run_in_threadpool
 
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from app.config import settings
 from app.models.db_models import (
-    AgentMemory,
     ChatMessage,
     Client,
     ComplianceTask,
@@ -32,10 +45,8 @@ from app.models.db_models import (
     User,
     WhatsAppNudge,
 )
-from app.services import memory_service
-
-if TYPE_CHECKING:
-    from fastapi import BackgroundTasks
+from app.models.schemas import ChatHistoryItem
+from app.services import chat_cache_service, memory_service
 
 
 class ChatState(TypedDict):
@@ -46,30 +57,28 @@ class ChatState(TypedDict):
 
 logger = logging.getLogger(__name__)
 
-_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, streaming=False)
-_summary_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, streaming=False)
+_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, streaming=True)
+_SUMMARY_MODEL = "gpt-4o-mini"
+_MAX_SUMMARY_TOKENS = 1500
+_summary_llm = ChatOpenAI(model=_SUMMARY_MODEL, temperature=0, streaming=False)
 _db_session_ctx: ContextVar[Session | None] = ContextVar("chat_db_session", default=None)
 _user_id_ctx: ContextVar[str | None] = ContextVar("chat_user_id", default=None)
-_summary_prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            "Extract only concrete facts that the USER shared about themselves, their finances, or commitments.\n"
-            "Format exactly as:\n"
-            "User Facts:\n"
-            "- <fact 1>\n"
-            "- <fact 2>\n"
-            "Follow-ups:\n"
-            "- <task 1>\n"
-            "- <task 2>\n"
-            "Rules:\n"
-            "- Quote or paraphrase only what the USER explicitly stated (e.g., \"Name: Rohan\", \"Age: 35\", \"Prefers conservative investing\").\n"
-            "- Follow-ups capture promises or next steps the user agreed to.\n"
-            "- If no facts or follow-ups are present, reply with NO_MEMORY.\n"
-            "- Never describe general knowledge or definitions.",
-        ),
-        ("human", "{transcript}"),
-    ]
+_SUMMARY_SYSTEM_MESSAGE = SystemMessage(
+    content=(
+        "Extract only concrete facts that the USER shared about themselves, their finances, or commitments.\n"
+        "Format exactly as:\n"
+        "User Facts:\n"
+        "- <fact 1>\n"
+        "- <fact 2>\n"
+        "Follow-ups:\n"
+        "- <task 1>\n"
+        "- <task 2>\n"
+        "Rules:\n"
+        "- Quote or paraphrase only what the USER explicitly stated (e.g., \"Name: Rohan\", \"Age: 35\", \"Prefers conservative investing\").\n"
+        "- Follow-ups capture promises or next steps the user agreed to.\n"
+        "- If no facts or follow-ups are present, reply with NO_MEMORY.\n"
+        "- Never describe general knowledge or definitions."
+    )
 )
 
 _SUPERVISOR_PROMPT = """
@@ -79,7 +88,9 @@ Tools available:
 - get_user_snapshot / get_recent_transactions / get_active_goals for quick context.
 - get_table_records(table, limit) to read any user-owned table.
 - create_table_record(table, data) to insert user-owned data (transactions, goals, invoices, etc.).
+- create_table_records(table, rows) to insert several records in one go (e.g. a pasted list of transactions).
 - update_table_record(table, record_id, updates) to modify an existing record.
+- recall_memory(query) to look up facts and follow-ups from earlier conversations when they would help.
 
 When creating or updating:
 - Gather essential fields before calling a tool (transactions need type, amount, date; goals need a title and target amount). Ask clarifying questions if the user hasn’t given enough detail.
@@ -90,6 +101,24 @@ Retrieval style:
 - Instead of bullet lists, describe data in natural prose (“Here are your latest transactions...”).
 - Mention sources when it helps (“I pulled this from your transaction ledger.”).
 """
+# Built once so every request sends a byte-identical system prefix.
+_SUPERVISOR_MESSAGE = SystemMessage(content=_SUPERVISOR_PROMPT.strip())
+
+
+@contextmanager
+def _bind_ctx(db: Session | None, user_id: str | None) -> Iterator[None]:
+    """Bind the tool context for one chat turn, skipping vars that already match."""
+    db_token = _db_session_ctx.set(db) if db and _db_session_ctx.get() is not db else None
+    user_token = _user_id_ctx.set(user_id) if user_id and _user_id_ctx.get() != user_id else None
+    try:
+        yield
+    finally:
+        if db_token is not None:
+            _db_session_ctx.reset(db_token)
+        if user_token is not None:
+            _user_id_ctx.reset(user_token)
+
+
 def _require_context() -> Tuple[Session, str]:
     db = _db_session_ctx.get()
     user_id = _user_id_ctx.get()
@@ -98,9 +127,30 @@ def _require_context() -> Tuple[Session, str]:
     return db, _normalize_user_id(user_id)
 
 
+# Tables the dashboard highlights are built from
+_DASHBOARD_TABLES = frozenset({"transactions", "invoices", "compliance_tasks", "clients"})
+
+
+def _after_write(table_key: str, user_id: str | UUID) -> None:
+    # Imported lazily like SessionLocal so building the graph does not create the engines
+    if table_key in _DASHBOARD_TABLES:
+        from app.services.dashboard_service import invalidate_highlights
+
+        invalidate_highlights(user_id)
+    elif table_key == "goals":
+        from app.services.goal_service import invalidate_goals
+
+        invalidate_goals(user_id)
+
+
 def _normalize_user_id(user_id: str) -> str | UUID:
+    return _normalize_user_id_cached(str(user_id))
+
+
+@lru_cache(maxsize=4096)
+def _normalize_user_id_cached(user_id: str) -> str | UUID:
     try:
-        return UUID(str(user_id))
+        return UUID(user_id)
     except Exception:
         return user_id
 
@@ -146,50 +196,85 @@ def _serialize_instance(instance: Any) -> dict:
     return data
 
 
-def _coerce_column_value(column: Any, value: Any) -> Any:
+def _serialize_mapping(row: Mapping[str, Any]) -> dict:
+    return {key: _serialize_value(value) for key, value in row.items()}
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _coerce_decimal(value: Any) -> Decimal:
+    return Decimal(str(value))
+
+
+def _coerce_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def _coerce_date(value: Any) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def _coerce_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() in {"true", "1", "yes", "y"}
+    return bool(value)
+
+
+def _coerce_uuid(value: Any) -> UUID:
+    if isinstance(value, UUID):
+        return value
+    return UUID(str(value))
+
+
+def _pick_coercer(coltype: Any) -> Callable[[Any], Any]:
+    """Resolve the coercion function for a column type once, at import."""
+    if isinstance(coltype, Numeric):
+        return _coerce_decimal
+    if isinstance(coltype, DateTime):
+        return _coerce_datetime
+    if isinstance(coltype, Date):
+        return _coerce_date
+    if isinstance(coltype, Boolean):
+        return _coerce_bool
+    if isinstance(coltype, PGUUID):
+        return _coerce_uuid
+    return _identity
+
+
+def _coerce_with(column_name: str, coercer: Callable[[Any], Any], value: Any) -> Any:
     if value is None:
         return None
-    coltype = column.type
     try:
-        if isinstance(coltype, Numeric):
-            return Decimal(str(value))
-        if isinstance(coltype, DateTime):
-            if isinstance(value, datetime):
-                return value
-            return datetime.fromisoformat(str(value))
-        if isinstance(coltype, Date):
-            if isinstance(value, date):
-                return value
-            return date.fromisoformat(str(value))
-        if isinstance(coltype, Boolean):
-            if isinstance(value, bool):
-                return value
-            if isinstance(value, str):
-                return value.strip().lower() in {"true", "1", "yes", "y"}
-            return bool(value)
-        if isinstance(coltype, PGUUID):
-            if isinstance(value, UUID):
-                return value
-            return UUID(str(value))
+        return coercer(value)
     except Exception as exc:
-        raise ValueError(f"Invalid value '{value}' for column '{column.name}': {exc}") from exc
-    return value
+        raise ValueError(f"Invalid value '{value}' for column '{column_name}': {exc}") from exc
+
+
+def _coerce_column_value(column: Any, value: Any) -> Any:
+    return _coerce_with(column.name, _pick_coercer(column.type), value)
 
 
 def _prepare_record_kwargs(meta: dict, data: dict, *, include_user_id: bool, user_id: Any) -> Tuple[dict, List[str]]:
-    allowed_fields: List[str] = meta["allowed_fields"]
-    columns: dict = meta["columns"]
+    coercers: dict = meta["coercers"]
     prepared: dict = {}
     errors: List[str] = []
     for key, value in data.items():
-        if key not in allowed_fields:
+        coercer = coercers.get(key)
+        if coercer is None:
             continue
-        column = columns[key]
         try:
-            prepared[key] = _coerce_column_value(column, value)
+            prepared[key] = _coerce_with(key, coercer, value)
         except ValueError as exc:
             errors.append(str(exc))
-    if include_user_id and "user_id" in columns:
+    if include_user_id and "user_id" in meta["columns"]:
         prepared["user_id"] = user_id
     return prepared, errors
 
@@ -239,6 +324,34 @@ def _apply_table_defaults(table_key: str, prepared: dict, incoming: dict) -> Non
         prepared["status"] = "pending"
 
 
+# Summary serializers read only these columns; never lazy-load relationships.
+_TRANSACTION_SUMMARY_OPTIONS = (
+    load_only(
+        Transaction.id,
+        Transaction.type,
+        Transaction.amount,
+        Transaction.currency,
+        Transaction.category,
+        Transaction.description,
+        Transaction.date,
+        Transaction.ledger_status,
+    ),
+    raiseload("*"),
+)
+_GOAL_SUMMARY_OPTIONS = (
+    load_only(
+        Goal.id,
+        Goal.title,
+        Goal.status,
+        Goal.priority,
+        Goal.target_amount,
+        Goal.current_amount,
+        Goal.deadline,
+    ),
+    raiseload("*"),
+)
+
+
 def _serialize_transaction(tx: Transaction) -> dict:
     return {
         "id": str(tx.id),
@@ -279,6 +392,7 @@ def get_user_snapshot(max_transactions: int = 5, max_goals: int = 5) -> dict:
 
     transactions = (
         db.query(Transaction)
+        .options(*_TRANSACTION_SUMMARY_OPTIONS)
         .filter(Transaction.user_id == user_id)
         .order_by(Transaction.date.desc())
         .limit(tx_limit)
@@ -287,18 +401,21 @@ def get_user_snapshot(max_transactions: int = 5, max_goals: int = 5) -> dict:
 
     active_goals = (
         db.query(Goal)
+        .options(*_GOAL_SUMMARY_OPTIONS)
         .filter(Goal.user_id == user_id)
         .order_by(Goal.created_at.desc())
         .limit(goal_limit)
         .all()
     )
 
-    income_sum = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id, Transaction.type == "income"
-    ).scalar()
-    expense_sum = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id, Transaction.type == "expense"
-    ).scalar()
+    income_sum, expense_sum = (
+        db.query(
+            func.sum(Transaction.amount).filter(Transaction.type == "income"),
+            func.sum(Transaction.amount).filter(Transaction.type == "expense"),
+        )
+        .filter(Transaction.user_id == user_id)
+        .one()
+    )
 
     return {
         "user": {
@@ -325,6 +442,7 @@ def get_recent_transactions(limit: int = 5) -> dict:
     tx_limit = max(1, min(limit, 20))
     transactions = (
         db.query(Transaction)
+        .options(*_TRANSACTION_SUMMARY_OPTIONS)
         .filter(Transaction.user_id == user_id)
         .order_by(Transaction.created_at.desc())
         .limit(tx_limit)
@@ -342,6 +460,7 @@ def get_active_goals(limit: int = 5) -> dict:
     goal_limit = max(1, min(limit, 20))
     goals = (
         db.query(Goal)
+        .options(*_GOAL_SUMMARY_OPTIONS)
         .filter(Goal.user_id == user_id)
         .order_by(Goal.created_at.desc())
         .limit(goal_limit)
@@ -400,21 +519,28 @@ def _build_writable_meta() -> dict:
     for table, model in _MODEL_TABLES.items():
         if model is User:
             continue  # user rows handled elsewhere
+        columns = {column.name: column for column in model.__table__.columns}
+        allowed_fields = _build_allowed_fields(model)
         writable[table] = {
             "model": model,
-            "columns": {column.name: column for column in model.__table__.columns},
-            "allowed_fields": _build_allowed_fields(model),
-            "required_fields": _infer_required_fields(model),
+            "columns": columns,
+            "allowed_fields": frozenset(allowed_fields),
+            # Only allowed fields get a coercer, so lookup doubles as the filter.
+            "coercers": {name: _pick_coercer(columns[name].type) for name in allowed_fields},
+            "required_fields": tuple(_infer_required_fields(model)),
             "primary_key": _primary_key_column(model),
         }
     return writable
 
 
 _WRITABLE_TABLES = _build_writable_meta()
+_NO_RELATIONSHIPS = raiseload("*")
+_MAX_BATCH_ROWS = 500
 
 
 def _query_model_records(db: Session, user_id: Any, model: Any, limit: int) -> List[Any]:
-    query = db.query(model)
+    # _serialize_instance reads table columns only, so relationships never load.
+    query = db.query(model).options(_NO_RELATIONSHIPS)
     if hasattr(model, "user_id"):
         query = query.filter(model.user_id == user_id)
     elif model is User:
@@ -476,12 +602,62 @@ def create_table_record(table: str, data: dict) -> dict:
     if errors:
         return {"error": errors}
 
-    model = meta["model"]
-    record = model(**prepared)
-    db.add(record)
+    # One INSERT ... RETURNING round-trip instead of ORM flush + refresh.
+    model_table = meta["model"].__table__
+    stmt = insert(model_table).values(**prepared).returning(*model_table.columns)
+    row = db.execute(stmt).mappings().one()
     db.commit()
-    db.refresh(record)
-    return {"table": table_key, "record": _serialize_instance(record)}
+    _after_write(table_key, user_id)
+    return {"table": table_key, "record": _serialize_mapping(row)}
+
+
+@tool("create_table_records")
+def create_table_records(table: str, rows: List[dict]) -> dict:
+    """
+    Create several records at once in a user-owned table, e.g. a pasted list of transactions.
+    """
+    db, user_id = _require_context()
+    table_key = (table or "").strip().lower()
+    meta = _WRITABLE_TABLES.get(table_key)
+    if not meta:
+        return {"error": f"Table '{table}' is not writable. Allowed tables: {list(_WRITABLE_TABLES.keys())}"}
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return {"error": "Rows must be a list of objects with field/value pairs."}
+    if not rows:
+        return {"error": "No rows provided."}
+    if len(rows) > _MAX_BATCH_ROWS:
+        return {"error": f"At most {_MAX_BATCH_ROWS} rows can be created per call."}
+
+    # Rows sharing the same columns go out as one executemany, which
+    # SQLAlchemy sends as page-sized multi-row INSERTs (insertmanyvalues).
+    # Each batch keeps its rows' input positions so results come back in
+    # the order the rows were given.
+    batches: Dict[tuple, Tuple[List[int], List[dict]]] = {}
+    errors: List[str] = []
+    for index, data in enumerate(rows):
+        prepared, row_errors = _prepare_record_kwargs(meta, data, include_user_id=True, user_id=user_id)
+        _apply_table_defaults(table_key, prepared, data)
+        missing = _ensure_required_fields(meta, prepared)
+        if missing:
+            row_errors.append(f"Missing required fields: {missing}")
+        if row_errors:
+            errors.extend(f"Row {index}: {error}" for error in row_errors)
+            continue
+        positions, batch = batches.setdefault(tuple(sorted(prepared)), ([], []))
+        positions.append(index)
+        batch.append(prepared)
+    if errors:
+        return {"error": errors}
+
+    model_table = meta["model"].__table__
+    records: List[dict] = [{}] * len(rows)
+    for positions, batch in batches.values():
+        stmt = insert(model_table).returning(*model_table.columns, sort_by_parameter_order=True)
+        for index, row in zip(positions, db.execute(stmt, batch).mappings()):
+            records[index] = _serialize_mapping(row)
+    db.commit()
+    _after_write(table_key, user_id)
+    return {"table": table_key, "records": records}
 
 
 @tool("update_table_record")
@@ -510,56 +686,156 @@ def update_table_record(table: str, record_id: str, updates: dict) -> dict:
 
     db.commit()
     db.refresh(record)
+    _after_write(table_key, user_id)
     return {"table": table_key, "record": _serialize_instance(record), "warnings": errors or None}
 
 
+@tool("recall_memory")
+def recall_memory(query: str, limit: int = 3) -> dict:
+    """
+    Looks up facts and follow-ups the user shared in earlier conversations.
+    """
+    db, user_id = _require_context()
+    memory_limit = max(1, min(limit, 10))
+    memories = memory_service.fetch_relevant_memories(
+        db, user_id=user_id, query=query, limit=memory_limit
+    )
+    return {
+        "memories": [
+            {
+                "topic": memory.topic,
+                "content": memory.content,
+                "created_at": _to_iso(memory.created_at),
+            }
+            for memory in memories
+        ]
+    }
+
+
 _TOOLS = [
     get_user_snapshot,
     get_recent_transactions,
     get_active_goals,
     get_table_records,
     create_table_record,
+    create_table_records,
     update_table_record,
+    recall_memory,
 ]
 _TOOL_MAP = {tool.name: tool for tool in _TOOLS}
+_MUTATING_TOOLS = frozenset(
+    {create_table_record.name, create_table_records.name, update_table_record.name}
+)
+# Binding converts every tool to its JSON schema; do it once at import.
+_llm_with_tools = _llm.bind_tools(_TOOLS)
+_MAX_TOOL_WORKERS = 4
+# Shared by every chat turn, so a burst of requests can't each spin up a
+# pool; its size also bounds how many extra DB connections reads can hold.
+_tool_executor = ThreadPoolExecutor(max_workers=_MAX_TOOL_WORKERS, thread_name_prefix="chat-tool")
+MAX_TOOL_CONTENT_CHARS = 4096
+_TRUNCATION_MARKER = "…[truncated]"
+
+
+def _json_default(value: Any) -> Any:
+    # orjson handles datetime/date/UUID natively; this covers Decimal and the json fallback.
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+if HAS_ORJSON:
+
+    def _dumps(payload: Any) -> str:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+else:
+
+    def _dumps(payload: Any) -> str:
+        return json.dumps(payload, default=_json_default, separators=(",", ":"))
 
 
 def _dump_tool_output(payload: Any) -> str:
+    # Compact output: whitespace in tool results is paid for as prompt tokens.
     try:
-        return json.dumps(payload, default=str)
+        return _dumps(payload)
     except Exception:
-        return json.dumps({"result": str(payload)})
+        return _dumps({"result": str(payload)})
+
+
+def _run_tool_call(call: dict) -> ToolMessage:
+    tool_name = call.get("name") or ""
+    try:
+        tool = _TOOL_MAP[tool_name]
+    except KeyError:
+        tool_result = {"error": f"Tool '{tool_name}' is not available."}
+    else:
+        try:
+            tool_result = tool.invoke(call.get("args") or {})
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.warning("Tool %s failed: %s", tool_name, exc)
+            tool_result = {"error": str(exc)}
+    return ToolMessage(
+        content=_dump_tool_output(tool_result),
+        name=tool_name or "unknown",
+        tool_call_id=call.get("id") or "",
+    )
+
+
+def _run_tool_call_in_session(call: dict, user_id: str | None) -> ToolMessage:
+    """Run one tool call on its own session, since sessions are not thread-safe."""
+    from app.db import SessionLocal
+
+    def run() -> ToolMessage:
+        _db_session_ctx.set(db)
+        _user_id_ctx.set(user_id)
+        return _run_tool_call(call)
+
+    db = SessionLocal()
+    try:
+        return contextvars.copy_context().run(run)
+    finally:
+        db.close()
+
+
+def _run_tool_calls(calls: Sequence[dict]) -> List[ToolMessage]:
+    """
+    Run the tool calls from one LLM turn, in call order.
+
+    Several read-only calls run concurrently, each on its own session. A
+    turn that writes runs every call in order on the request's session, so
+    the writes share one transaction and later reads see them.
+    """
+    if (
+        len(calls) <= 1
+        or _db_session_ctx.get() is None
+        or any(call.get("name") in _MUTATING_TOOLS for call in calls)
+    ):
+        return [_run_tool_call(call) for call in calls]
+    return list(_tool_executor.map(partial(_run_tool_call_in_session, user_id=_user_id_ctx.get()), calls))
+
+
+def _truncate_tool_message(message: ToolMessage) -> None:
+    content = message.content
+    if isinstance(content, str) and len(content) > MAX_TOOL_CONTENT_CHARS:
+        message.content = content[:MAX_TOOL_CONTENT_CHARS] + _TRUNCATION_MARKER
 
 
 def _llm_node(state: ChatState) -> ChatState:
     """Graph node that handles tool calls before returning the final reply."""
-    llm_with_tools = _llm.bind_tools(_TOOLS)
-    messages: List[BaseMessage] = list(state["messages"])
-    response = llm_with_tools.invoke(messages)
+    # The state list is owned by this single-node graph run; append in place.
+    messages: List[BaseMessage] = state["messages"]
+    response = _llm_with_tools.invoke(messages)
     messages.append(response)
 
     while getattr(response, "tool_calls", None):
-        for call in response.tool_calls or []:
-            tool_name = call.get("name")
-            call_id = call.get("id")
-            args = call.get("args") or {}
-            tool = _TOOL_MAP.get(tool_name or "")
-            if not tool:
-                tool_result = {"error": f"Tool '{tool_name}' is not available."}
-            else:
-                try:
-                    tool_result = tool.invoke(args)
-                except Exception as exc:  # pragma: no cover - defensive logging
-                    logger.warning("Tool %s failed: %s", tool_name, exc)
-                    tool_result = {"error": str(exc)}
-            messages.append(
-                ToolMessage(
-                    content=_dump_tool_output(tool_result),
-                    name=tool_name or "unknown",
-                    tool_call_id=call_id or "",
-                )
-            )
-        response = llm_with_tools.invoke(messages)
+        # Every result is re-sent on each later round, so cap it as it is
+        # appended; earlier messages are never rewritten, which keeps the
+        # prompt prefix identical across rounds for the provider's cache.
+        results = _run_tool_calls(response.tool_calls or [])
+        for tool_message in results:
+            _truncate_tool_message(tool_message)
+        messages.extend(results)
+        response = _llm_with_tools.invoke(messages)
         messages.append(response)
 
     return {"messages": messages}
@@ -572,34 +848,36 @@ _graph_builder.add_edge("assistant", END)
 chat_graph = _graph_builder.compile()
 
 
-def _extract_role_content(item: Any) -> Tuple[str | None, str]:
-    if isinstance(item, dict):
-        return item.get("role"), item.get("content", "") or ""
-    role = getattr(item, "role", None)
-    content = getattr(item, "content", "") or ""
-    return role, content
+def _message_from_role(role: str | None, content: str) -> BaseMessage:
+    if role == "assistant":
+        return AIMessage(content=content)
+    return HumanMessage(content=content)
 
 
-def _convert_history(history: Sequence[Any]) -> List[BaseMessage]:
-    converted: List[BaseMessage] = []
-    for item in history:
-        role, content = _extract_role_content(item)
-        if role == "assistant":
-            converted.append(AIMessage(content=content))
-        else:
-            converted.append(HumanMessage(content=content))
-    return converted
+def _history_item_from_dict(item: dict) -> BaseMessage:
+    return _message_from_role(item.get("role"), item.get("content", "") or "")
 
 
-def _format_memory_messages(memories: Sequence[AgentMemory]) -> List[BaseMessage]:
-    if not memories:
-        return []
-    lines: List[str] = []
-    for memory in memories:
-        topic_prefix = f"[{memory.topic}] " if memory.topic else ""
-        lines.append(f"{topic_prefix}{memory.content}")
-    content = "Relevant previous context:\n" + "\n".join(f"- {line}" for line in lines)
-    return [SystemMessage(content=content)]
+def _history_item_from_schema(item: ChatHistoryItem) -> BaseMessage:
+    return _message_from_role(item.role, item.content or "")
+
+
+def _history_item_from_attrs(item: Any) -> BaseMessage:
+    return _message_from_role(getattr(item, "role", None), getattr(item, "content", "") or "")
+
+
+# Keyed by exact type so the common history shapes skip isinstance/getattr probing.
+_HISTORY_CONVERTERS: dict[type, Callable[[Any], BaseMessage]] = {
+    dict: _history_item_from_dict,
+    ChatHistoryItem: _history_item_from_schema,
+    HumanMessage: _identity,
+    AIMessage: _identity,
+}
+
+
+def _convert_history(history: Sequence[Any]) -> List[BaseMessage]:
+    converters = _HISTORY_CONVERTERS
+    return [converters.get(type(item), _history_item_from_attrs)(item) for item in history]
 
 
 def _recent_dialogue(messages: Sequence[BaseMessage], limit: int = 6) -> List[BaseMessage]:
@@ -622,107 +900,156 @@ def _transcript_from_messages(messages: Sequence[BaseMessage]) -> str:
     return "\n".join(lines)
 
 
-def _summarize_dialogue(messages: Sequence[BaseMessage]) -> str:
+@lru_cache(maxsize=1)
+def _summary_encoding() -> tiktoken.Encoding:
+    return tiktoken.encoding_for_model(_SUMMARY_MODEL)
+
+
+def _truncate_transcript(transcript: str, max_tokens: int = _MAX_SUMMARY_TOKENS) -> str:
+    """Keep only the most recent `max_tokens` tokens of the transcript."""
+    encoding = _summary_encoding()
+    tokens = encoding.encode(transcript)
+    if len(tokens) <= max_tokens:
+        return transcript
+    return encoding.decode(tokens[-max_tokens:])
+
+
+async def _summarize_dialogue(messages: Sequence[BaseMessage]) -> str:
     transcript = _transcript_from_messages(messages)
     if not transcript:
         return ""
-    prompt_messages = _summary_prompt.format_messages(transcript=transcript)
-    summary_response = _summary_llm.invoke(prompt_messages)
+    transcript = _truncate_transcript(transcript)
+    summary_response = await _summary_llm.ainvoke([_SUMMARY_SYSTEM_MESSAGE, HumanMessage(content=transcript)])
     summary = (summary_response.content or "").strip()
     if summary.upper() == "NO_MEMORY":
         return ""
     return summary
 
 
-def _load_memory_messages(
-    db: Session | None,
-    user_id: str | None,
-    query: str,
-) -> List[BaseMessage]:
-    if not db or not user_id:
-        return []
-    try:
-        memories = memory_service.fetch_relevant_memories(
-            db, user_id=user_id, query=query, limit=3
-        )
-    except Exception as exc:  # pragma: no cover - logging only
-        logger.warning("Failed to load agent memories: %s", exc)
-        return []
-    return _format_memory_messages(memories)
-
-
-def _serialize_dialogue(messages: Sequence[BaseMessage]) -> List[Tuple[str, str]]:
-    serialized: List[Tuple[str, str]] = []
-    for msg in messages:
-        if isinstance(msg, HumanMessage):
-            serialized.append(("human", msg.content or ""))
-        elif isinstance(msg, AIMessage):
-            serialized.append(("ai", msg.content or ""))
-    return serialized
-
-
-def _deserialize_dialogue(payload: Sequence[Tuple[str, str]]) -> List[BaseMessage]:
-    dialogue: List[BaseMessage] = []
-    for role, content in payload:
-        if role == "human":
-            dialogue.append(HumanMessage(content=content))
-        elif role == "ai":
-            dialogue.append(AIMessage(content=content))
-    return dialogue
-
-
-def _persist_conversation_memory(
-    db: Session,
+def _store_conversation_memory(
     user_id: str,
-    messages: Sequence[BaseMessage],
+    summary: str,
+    embedding: Sequence[float],
+    message_count: int,
 ) -> None:
+    from app.db import SessionLocal
+
+    db = SessionLocal()
     try:
-        dialogue = _recent_dialogue(messages)
-        summary = _summarize_dialogue(dialogue)
-        if not summary:
-            return
-        metadata = {
-            "source": "chat",
-            "message_count": len(dialogue),
-        }
         memory_service.store_memory(
             db,
             user_id=user_id,
             content=summary,
             topic="conversation",
-            metadata=metadata,
+            metadata={
+                "source": "chat",
+                "message_count": message_count,
+            },
+            embedding=embedding,
         )
-    except Exception as exc:  # pragma: no cover - logging only
-        logger.warning("Failed to persist conversation memory: %s", exc)
+    finally:
+        db.close()
 
 
-def _persist_memory_job(user_id: str, payload: Sequence[Tuple[str, str]]) -> None:
-    from app.db import SessionLocal
+async def _persist_memory_job(user_id: str, messages: Sequence[BaseMessage]) -> None:
+    """
+    Summarize and store a finished conversation.
 
-    dialogue = _deserialize_dialogue(payload)
+    The summary and embedding calls run before any session is opened so a
+    pooled connection is only checked out for the short insert.
+    """
+    dialogue = _recent_dialogue(messages)
     if not dialogue:
         return
 
-    db = SessionLocal()
     try:
-        _persist_conversation_memory(db, user_id, dialogue)
-    finally:
-        db.close()
+        summary = await _summarize_dialogue(dialogue)
+        if not summary:
+            return
+        embedding = await memory_service.agenerate_embedding(summary)
+        await run_in_threadpool(_store_conversation_memory, user_id, summary, embedding, len(dialogue))
+    except Exception as exc:  # pragma: no cover - logging only
+        logger.warning("Failed to persist conversation memory: %s", exc)
 
 
-def schedule_memory_persist(
-    background_tasks: "BackgroundTasks" | None,
-    user_id: str | None,
-    messages: Sequence[BaseMessage],
-) -> None:
-    if not background_tasks or not user_id:
-        return
-    serialized = _serialize_dialogue(_recent_dialogue(messages))
-    if not serialized:
+MEMORY_QUEUE_SIZE = 256
+MEMORY_WORKERS = 4
+_memory_queue: asyncio.Queue[Tuple[str, Sequence[BaseMessage]]] = asyncio.Queue(maxsize=MEMORY_QUEUE_SIZE)
+
+
+async def run_memory_worker() -> None:
+    """Drain queued conversations; the app lifespan starts MEMORY_WORKERS of these."""
+    while True:
+        user_id, messages = await _memory_queue.get()
+        try:
+            await _persist_memory_job(user_id, messages)
+        finally:
+            _memory_queue.task_done()
+
+
+def schedule_memory_persist(user_id: str | None, messages: Sequence[BaseMessage]) -> None:
+    """
+    Queue a finished conversation for the memory worker.
+
+    Filtering and summarization happen in the worker, so the request only
+    pays for the enqueue. When the queue is full the conversation is dropped.
+    """
+    if not user_id or not messages:
         return
-    background_tasks.add_task(_persist_memory_job, user_id, serialized)
+    try:
+        _memory_queue.put_nowait((user_id, messages))
+    except asyncio.QueueFull:
+        logger.warning("Memory queue full; skipping conversation memory for %s", user_id)
+
+
+
+
+def _uses_reply_cache(db: Session | None, user_id: str | None, history: Sequence[Any] | None) -> bool:
+    # A follow-up ("yes", "show more") only means something within its own
+    # conversation, so only opening turns read or write the reply cache.
+    return db is not None and bool(user_id) and not history and settings.chat_cache_ttl_seconds > 0
+
+
+def _lookup_cached_reply(db: Session, user_id: str, message: str) -> str | None:
+    try:
+        return chat_cache_service.fetch_cached_reply(
+            db,
+            user_id=user_id,
+            message=message,
+            max_age_seconds=settings.chat_cache_ttl_seconds,
+        )
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        db.rollback()
+        logger.warning("Chat cache lookup failed: %s", exc)
+        return None
 
 
+def _update_reply_cache(
+    db: Session,
+    user_id: str,
+    message: str,
+    reply: str,
+    messages: Sequence[BaseMessage],
+) -> None:
+    """Cache a fresh reply (skipped when empty), or drop the user's cache if the turn changed their data."""
+    try:
+        if any(isinstance(msg, ToolMessage) and msg.name in _MUTATING_TOOLS for msg in messages):
+            chat_cache_service.invalidate_user_cache(db, user_id)
+        elif reply:
+            chat_cache_service.store_cached_reply(db, user_id=user_id, message=message, reply=reply)
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        db.rollback()
+        logger.warning("Chat cache update failed: %s", exc)
+
+
+def _build_initial_messages(message: str, history: Sequence[Any] | None) -> List[BaseMessage]:
+    # The supervisor prompt and prior turns form a stable prefix for the
+    # provider's prompt cache; memories are recalled on demand via a tool.
+    initial_messages: List[BaseMessage] = [_SUPERVISOR_MESSAGE]
+    if history:
+        initial_messages.extend(_convert_history(history))
+    initial_messages.append(HumanMessage(content=message))
+    return initial_messages
 
 
 def invoke_chat(
@@ -733,24 +1060,82 @@ def invoke_chat(
     db: Session | None = None,
 ) -> Tuple[str, List[BaseMessage]]:
     """Return the assistant's final reply and the resulting message list."""
-    initial_messages: List[BaseMessage] = [SystemMessage(content=_SUPERVISOR_PROMPT)]
-    initial_messages.extend(_load_memory_messages(db, user_id, message))
-    if history:
-        initial_messages.extend(_convert_history(history))
-    initial_messages.append(HumanMessage(content=message))
+    initial_messages = _build_initial_messages(message, history)
 
-    db_token = _db_session_ctx.set(db) if db else None
-    user_token = _user_id_ctx.set(user_id) if user_id else None
-    try:
+    use_cache = _uses_reply_cache(db, user_id, history)
+    if use_cache:
+        cached = _lookup_cached_reply(db, user_id, message)
+        if cached is not None:
+            return cached, [*initial_messages, AIMessage(content=cached)]
+
+    with _bind_ctx(db, user_id):
         final_state = chat_graph.invoke({"messages": initial_messages})
-    finally:
-        if db_token is not None:
-            _db_session_ctx.reset(db_token)
-        if user_token is not None:
-            _user_id_ctx.reset(user_token)
 
     ai_messages = [msg for msg in final_state["messages"] if isinstance(msg, AIMessage)]
     if not ai_messages:
         return "", final_state["messages"]
     response = ai_messages[-1].content
+    if db is not None and user_id:
+        _update_reply_cache(db, user_id, message, response if use_cache else "", final_state["messages"])
     return response, final_state["messages"]
+
+
+# Ends the chunk queue filled by ainvoke_chat_stream's driver task
+_STREAM_DONE = object()
+
+
+async def ainvoke_chat_stream(
+    message: str,
+    history: Sequence[Any] | None = None,
+    *,
+    user_id: str | None = None,
+    db: Session | None = None,
+    final_messages: List[BaseMessage] | None = None,
+) -> AsyncIterator[str]:
+    """
+    Yield the assistant's reply text as the model streams it.
+
+    When `final_messages` is given it is filled with the resulting message
+    list once the graph finishes, e.g. for schedule_memory_persist.
+    """
+    initial_messages = _build_initial_messages(message, history)
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    async def drive() -> List[BaseMessage]:
+        # The task runs in its own copy of the context, so the bindings need
+        # no reset, which could fail if the consumer closes this generator
+        # from another context (e.g. on client disconnect).
+        if db is not None:
+            _db_session_ctx.set(db)
+        if user_id:
+            _user_id_ctx.set(user_id)
+        messages: List[BaseMessage] = []
+        try:
+            async for event in chat_graph.astream_events({"messages": initial_messages}, version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    # Tool-call chunks carry no text; only forward reply tokens.
+                    if content and isinstance(content, str):
+                        chunks.put_nowait(content)
+                elif kind == "on_chain_end" and event["name"] == chat_graph.get_name():
+                    messages = event["data"]["output"]["messages"]
+        finally:
+            chunks.put_nowait(_STREAM_DONE)
+        return messages
+
+    task = asyncio.create_task(drive())
+    try:
+        while (chunk := await chunks.get()) is not _STREAM_DONE:
+            yield chunk
+        # Re-raises anything the graph raised
+        messages = await task
+    finally:
+        task.cancel()
+
+    if final_messages is not None:
+        final_messages.extend(messages)
+    if db is not None and user_id:
+        # Streamed replies are not cached, but a turn that changed the
+        # user's data still clears their cached replies.
+        await asyncio.to_thread(_update_reply_cache, db, user_id, message, "", messages)
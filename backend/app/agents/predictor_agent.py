@@ -1,30 +1,68 @@
 """
 Predictor Agent - What-If scenario simulator
-Uses lightweight ML for forecasting (optional)
+Uses lightweight NumPy least squares for forecasting (optional)
 """
 try:
     import numpy as np
-    from sklearn.linear_model import LinearRegression
-    HAS_ML = True
+    HAS_ML = True  # NumPy is the only ML dependency
 except ImportError:
     HAS_ML = False
     # Fallback: use simple Python calculations
     import statistics
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 from datetime import datetime, timedelta
+from bisect import bisect_right
+from functools import lru_cache
+
+from app.agents.income_view import IncomeView, amounts_array, dates_array
+
+# Below this many goals the plain loop beats array setup cost
+VECTORIZE_MIN_GOALS = 8
+
+# Affordability score cut-offs and the recommendation for each band, lowest first
+AFFORDABILITY_THRESHOLDS = (40, 60, 80)
+RECOMMENDATIONS = (
+    "🚫 This purchase would significantly strain your finances. Better to wait.",
+    "🤔 Consider waiting or looking for a cheaper alternative.",
+    "⚠️ This will impact your savings, but it's manageable if needed.",
+    "✅ This purchase looks affordable! You can go ahead without major impact.",
+)
+
+
+@lru_cache(maxsize=1024)
+def _emergency_fund_core(
+    monthly_expense: float,
+    income_volatility: float,
+    dependents: int
+) -> Tuple[float, float, str]:
+    """Rounded amount, months covered and reason; pure, so dashboard re-renders hit the cache"""
+    # Base: 3-6 months of expenses
+    if income_volatility < 0.1:
+        base_months = 3
+    elif income_volatility < 0.3:
+        base_months = 4
+    else:
+        base_months = 6
+
+    # Adjust for dependents
+    dependent_months = dependents * 0.5
+
+    recommended_months = base_months + dependent_months
+    recommended_amount = monthly_expense * recommended_months
+
+    return (
+        round(recommended_amount, 2),
+        round(recommended_months, 1),
+        PredictorAgent._get_emergency_fund_reason(income_volatility, dependents)
+    )
+
 
 class PredictorAgent:
     """
     Simulates financial scenarios and predicts impact on goals
     """
 
-    def __init__(self):
-        if HAS_ML:
-            self.model = LinearRegression()
-        else:
-            self.model = None  # Will use simple calculations
-
     def simulate_purchase_impact(
         self,
         purchase_amount: float,
@@ -68,37 +106,33 @@ class PredictorAgent:
             recovery_months = float('inf')
 
         # Impact on goals
-        goal_impacts = []
-        for goal in goals:
-            target = goal.get('target_amount', 0)
-            current = goal.get('current_amount', 0)
-            remaining = target - current
-
-            # Calculate delay in achieving goal
-            if monthly_surplus > 0:
-                original_months = remaining / monthly_surplus
-                new_months = (remaining + purchase_amount) / monthly_surplus
-                delay_months = new_months - original_months
-            else:
-                delay_months = float('inf')
-
-            goal_impacts.append({
-                'goal_name': goal.get('title', 'Untitled Goal'),
-                'delay_months': round(delay_months, 1) if delay_months != float('inf') else None,
-                'delay_days': round(delay_months * 30, 0) if delay_months != float('inf') else None,
-                'original_completion': round(original_months, 1) if original_months != float('inf') else None,
-                'new_completion': round(new_months, 1) if new_months != float('inf') else None
-            })
+        if HAS_ML and len(goals) >= VECTORIZE_MIN_GOALS:
+            goal_impacts = self._goal_impacts_vectorized(goals, purchase_amount, monthly_surplus)
+        else:
+            goal_impacts = []
+            for goal in goals:
+                target = goal.get('target_amount', 0)
+                current = goal.get('current_amount', 0)
+                remaining = target - current
+
+                # Calculate delay in achieving goal
+                if monthly_surplus > 0:
+                    original_months = remaining / monthly_surplus
+                    new_months = (remaining + purchase_amount) / monthly_surplus
+                    delay_months = new_months - original_months
+                else:
+                    original_months = new_months = delay_months = float('inf')
+
+                goal_impacts.append({
+                    'goal_name': goal.get('title', 'Untitled Goal'),
+                    'delay_months': round(delay_months, 1) if delay_months != float('inf') else None,
+                    'delay_days': round(delay_months * 30, 0) if delay_months != float('inf') else None,
+                    'original_completion': round(original_months, 1) if original_months != float('inf') else None,
+                    'new_completion': round(new_months, 1) if new_months != float('inf') else None
+                })
 
         # Generate recommendation
-        if affordability >= 80:
-            recommendation = "✅ This purchase looks affordable! You can go ahead without major impact."
-        elif affordability >= 60:
-            recommendation = "⚠️ This will impact your savings, but it's manageable if needed."
-        elif affordability >= 40:
-            recommendation = "🤔 Consider waiting or looking for a cheaper alternative."
-        else:
-            recommendation = "🚫 This purchase would significantly strain your finances. Better to wait."
+        recommendation = RECOMMENDATIONS[bisect_right(AFFORDABILITY_THRESHOLDS, affordability)]
 
         return {
             'affordability_score': round(affordability, 1),
@@ -110,16 +144,118 @@ class PredictorAgent:
             'monthly_surplus': round(monthly_surplus, 2)
         }
 
+    def simulate_purchase_impact_batch(
+        self,
+        purchase_amounts,
+        current_savings: float,
+        monthly_income: float,
+        monthly_expense: float,
+        goals: List[Dict]
+    ) -> Dict:
+        """
+        Evaluate many candidate purchase amounts in one call (requires NumPy)
+
+        Args:
+            purchase_amounts: Array-like of purchase amounts to compare
+            current_savings: Current savings
+            monthly_income: Average monthly income
+            monthly_expense: Average monthly expense
+            goals: List of financial goals
+
+        Returns:
+            Dict of arrays aligned with purchase_amounts; recovery and goal
+            completion months are inf when there is no monthly surplus
+        """
+        if not HAS_ML:
+            raise RuntimeError("simulate_purchase_impact_batch requires numpy")
+
+        amounts = np.asarray(purchase_amounts, dtype=np.float64)
+        monthly_surplus = monthly_income - monthly_expense
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            affordability = np.where(
+                amounts <= monthly_surplus,
+                100.0,
+                np.where(
+                    amounts <= current_savings,
+                    np.maximum(0.0, 100 - amounts / current_savings * 50),
+                    0.0
+                )
+            )
+
+        remaining = np.fromiter(
+            (g.get('target_amount', 0) - g.get('current_amount', 0) for g in goals),
+            dtype=np.float64,
+            count=len(goals)
+        )
+        if monthly_surplus > 0:
+            recovery_months = amounts / monthly_surplus
+            # Rows follow purchase_amounts, columns follow goals
+            new_completion = (remaining[np.newaxis, :] + amounts[:, np.newaxis]) / monthly_surplus
+        else:
+            recovery_months = np.full_like(amounts, np.inf)
+            new_completion = np.full((amounts.size, remaining.size), np.inf)
+
+        tiers = np.digitize(affordability, AFFORDABILITY_THRESHOLDS)
+
+        return {
+            'affordability_score': np.round(affordability, 1),
+            'savings_reduction': np.round(amounts, 2),
+            'new_savings': np.round(current_savings - amounts, 2),
+            'recovery_months': np.round(recovery_months, 1),
+            'goal_new_completion': np.round(new_completion, 1),
+            'recommendation': np.asarray(RECOMMENDATIONS, dtype=object)[tiers],
+            'monthly_surplus': round(monthly_surplus, 2)
+        }
+
+    def _goal_impacts_vectorized(
+        self,
+        goals: List[Dict],
+        purchase_amount: float,
+        monthly_surplus: float
+    ) -> List[Dict]:
+        """Same result as the per-goal loop, computed over goal arrays at once"""
+        if monthly_surplus <= 0:
+            return [{
+                'goal_name': goal.get('title', 'Untitled Goal'),
+                'delay_months': None,
+                'delay_days': None,
+                'original_completion': None,
+                'new_completion': None
+            } for goal in goals]
+
+        count = len(goals)
+        targets = np.fromiter((g.get('target_amount', 0) for g in goals), dtype=np.float64, count=count)
+        currents = np.fromiter((g.get('current_amount', 0) for g in goals), dtype=np.float64, count=count)
+        remaining = targets - currents
+        original = remaining / monthly_surplus
+        new = (remaining + purchase_amount) / monthly_surplus
+        delay = new - original
+
+        return [{
+            'goal_name': goal.get('title', 'Untitled Goal'),
+            'delay_months': delay_months,
+            'delay_days': delay_days,
+            'original_completion': original_months,
+            'new_completion': new_months
+        } for goal, delay_months, delay_days, original_months, new_months in zip(
+            goals,
+            np.round(delay, 1).tolist(),
+            np.round(delay * 30, 0).tolist(),
+            np.round(original, 1).tolist(),
+            np.round(new, 1).tolist()
+        )]
+
     def forecast_income(
         self,
-        historical_income: List[Dict],
+        historical_income: Union[List[Dict], IncomeView],
         months_ahead: int = 3
     ) -> List[Dict]:
         """
         Forecast future income based on historical data
 
         Args:
-            historical_income: List of income transactions with dates and amounts
+            historical_income: List of income transactions with dates and amounts, or an IncomeView
             months_ahead: Number of months to forecast
 
         Returns:
@@ -128,7 +264,7 @@ class PredictorAgent:
         if len(historical_income) < 3:
             # Not enough data for ML, use simple average
             if HAS_ML:
-                avg_income = np.mean([item['amount'] for item in historical_income]) if historical_income else 0
+                avg_income = float(amounts_array(historical_income).mean()) if len(historical_income) else 0
             else:
                 avg_income = statistics.mean([item['amount'] for item in historical_income]) if historical_income else 0
 
@@ -142,62 +278,65 @@ class PredictorAgent:
                 })
             return forecasts
 
-        # Prepare data
-        dates = [datetime.fromisoformat(item['date']) if isinstance(item['date'], str) else item['date'] for item in historical_income]
-        amounts = [item['amount'] for item in historical_income]
-
         if HAS_ML:
-            # Use ML model for better predictions
-            base_date = min(dates)
-            X = np.array([(d - base_date).days for d in dates]).reshape(-1, 1)
-            y = np.array(amounts)
-            self.model.fit(X, y)
-        else:
-            # Simple average-based forecasting
-            base_date = min(dates)
-
-        # Generate forecasts
-        forecasts = []
-        last_date = max(dates)
-
-        for i in range(1, months_ahead + 1):
-            forecast_date = last_date + timedelta(days=30 * i)
-
-            if HAS_ML:
-                days_from_base = (forecast_date - base_date).days
-                predicted = self.model.predict([[days_from_base]])[0]
-                predicted = max(0, predicted)
-
-                # Calculate confidence based on R² score
-                r2_score = self.model.score(X, y) if len(X) > 1 else 0
-                if r2_score > 0.7:
-                    confidence = 'high'
-                elif r2_score > 0.4:
-                    confidence = 'medium'
-                else:
-                    confidence = 'low'
+            # Day-precision dates; NumPy handles ISO strings and date/datetime
+            # objects alike and computes offsets in C
+            amounts = amounts_array(historical_income)
+            dates = dates_array(historical_income)
+            base_date = dates.min()
+            last_offset = int((dates.max() - base_date).astype(np.int64))
+            horizons = 30 * np.arange(1, months_ahead + 1)
+            forecast_dates = (dates.max() + horizons.astype('timedelta64[D]')).astype(object)
+
+            # Closed-form one-feature least squares; a full regressor's input
+            # validation costs more than the fit itself at this size
+            x = (dates - base_date).astype(np.float64)
+            y = amounts
+            x_mean, y_mean = x.mean(), y.mean()
+            x_dev = x - x_mean
+            sxx = (x_dev ** 2).sum()
+            slope = (x_dev * (y - y_mean)).sum() / sxx if sxx > 0 else 0.0
+            intercept = y_mean - slope * x_mean
+
+            # All horizons in one vector op
+            predictions = np.maximum(0, intercept + slope * (last_offset + horizons)).tolist()
+
+            # Calculate confidence based on R² score
+            ss_res = ((y - (intercept + slope * x)) ** 2).sum()
+            ss_tot = ((y - y_mean) ** 2).sum()
+            if ss_tot > 0:
+                r2_score = 1 - ss_res / ss_tot
             else:
-                # Simple average with trend
-                avg_income = statistics.mean(amounts)
-                # Simple trend: recent vs older
-                if len(amounts) >= 4:
-                    recent = statistics.mean(amounts[-2:])
-                    older = statistics.mean(amounts[:2])
-                    trend = (recent - older) / older if older > 0 else 0
-                    predicted = avg_income * (1 + trend * i * 0.1)
-                else:
-                    predicted = avg_income
-
-                predicted = max(0, predicted)
+                r2_score = 1.0 if ss_res == 0 else 0.0
+            if r2_score > 0.7:
+                confidence = 'high'
+            elif r2_score > 0.4:
                 confidence = 'medium'
+            else:
+                confidence = 'low'
+        else:
+            amounts = [item['amount'] for item in historical_income]
+            dates = [datetime.fromisoformat(item['date']) if isinstance(item['date'], str) else item['date'] for item in historical_income]
+            last_date = max(dates)
+            forecast_dates = [last_date + timedelta(days=30 * i) for i in range(1, months_ahead + 1)]
+
+            # Simple average with trend
+            avg_income = statistics.mean(amounts)
+            # Simple trend: recent vs older
+            if len(amounts) >= 4:
+                recent = statistics.mean(amounts[-2:])
+                older = statistics.mean(amounts[:2])
+                trend = (recent - older) / older if older > 0 else 0
+            else:
+                trend = 0
+            predictions = [max(0, avg_income * (1 + trend * i * 0.1)) for i in range(1, months_ahead + 1)]
+            confidence = 'medium'
 
-            forecasts.append({
-                'month': forecast_date.strftime('%b %Y'),
-                'predicted_amount': round(predicted, 2),
-                'confidence': confidence
-            })
-
-        return forecasts
+        return [{
+            'month': forecast_date.strftime('%b %Y'),
+            'predicted_amount': round(predicted, 2),
+            'confidence': confidence
+        } for forecast_date, predicted in zip(forecast_dates, predictions)]
 
     def calculate_emergency_fund_need(
         self,
@@ -216,27 +355,18 @@ class PredictorAgent:
         Returns:
             Emergency fund recommendation
         """
-        # Base: 3-6 months of expenses
-        if income_volatility < 0.1:
-            base_months = 3
-        elif income_volatility < 0.3:
-            base_months = 4
-        else:
-            base_months = 6
-
-        # Adjust for dependents
-        dependent_months = dependents * 0.5
-
-        recommended_months = base_months + dependent_months
-        recommended_amount = monthly_expense * recommended_months
-
+        recommended_amount, recommended_months, reason = _emergency_fund_core(
+            monthly_expense, income_volatility, dependents
+        )
         return {
-            'recommended_amount': round(recommended_amount, 2),
-            'months_covered': round(recommended_months, 1),
-            'reason': self._get_emergency_fund_reason(income_volatility, dependents)
+            'recommended_amount': recommended_amount,
+            'months_covered': recommended_months,
+            'reason': reason
         }
 
-    def _get_emergency_fund_reason(self, volatility: float, dependents: int) -> str:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _get_emergency_fund_reason(volatility: float, dependents: int) -> str:
         """Generate explanation for emergency fund recommendation"""
         reasons = []
 
@@ -271,22 +401,22 @@ class PredictorAgent:
         Returns:
             List of monthly savings projections
         """
-        trajectory = []
-        balance = current_savings
+        # Apply purchase in month 0
+        start = current_savings - (with_purchase if with_purchase > 0 else 0)
 
-        for month in range(months + 1):
-            # Apply purchase in month 0
-            if month == 0 and with_purchase > 0:
-                balance -= with_purchase
+        if HAS_ML:
+            balances = np.round(start + monthly_savings * np.arange(months + 1), 2).tolist()
+        else:
+            balances = [round(start + monthly_savings * month, 2) for month in range(months + 1)]
 
-            trajectory.append({
-                'month': month,
-                'balance': round(balance, 2),
-                'month_label': f'Month {month}'
-            })
+        return [{
+            'month': month,
+            'balance': balance,
+            'month_label': f'Month {month}'
+        } for month, balance in enumerate(balances)]
 
-            # Add monthly savings
-            if month < months:
-                balance += monthly_savings
 
-        return trajectory
+@lru_cache(maxsize=1)
+def get_predictor_agent() -> PredictorAgent:
+    """Process-wide PredictorAgent, built on first use rather than at import."""
+    return PredictorAgent()
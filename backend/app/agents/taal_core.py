@@ -9,8 +9,67 @@ except ImportError:
     # Fallback: use Python's built-in statistics module
     import statistics
 
-from typing import List, Dict, Tuple
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+from typing import List, Dict, Tuple, Union
 from datetime import datetime, timedelta
+from bisect import bisect_right
+from functools import lru_cache
+
+from app.agents.income_view import IncomeView, amounts_array
+
+# Pulse score cut-offs and the headline insight for each band, lowest first
+_SCORE_THRESHOLDS = (40, 60, 80)
+_SCORE_INSIGHTS = (
+    "🚨 Attention needed. Let's work on stabilizing your finances.",
+    "⚠️ Moderate financial health. Focus on increasing savings.",
+    "👍 Good financial position. Small improvements can take you further.",
+    "🎉 Excellent financial health! Keep up the great work.",
+)
+
+
+def _amount_stats_kernel(arr):
+    """Mean, population std and mean of the last three values in one pass"""
+    n = len(arr)
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        delta = arr[i] - mean
+        mean += delta / (i + 1)
+        m2 += delta * (arr[i] - mean)
+    std = (m2 / n) ** 0.5 if n > 0 else 0.0
+    recent_mean = (arr[n - 1] + arr[n - 2] + arr[n - 3]) / 3.0 if n >= 3 else mean
+    return mean, std, recent_mean
+
+
+def _amount_stats_numpy(arr):
+    mean = float(arr.mean())
+    recent_mean = float(arr[-1] + arr[-2] + arr[-3]) / 3.0 if arr.shape[0] >= 3 else mean
+    return mean, float(arr.std()), recent_mean
+
+
+if HAS_NUMPY and HAS_NUMBA:
+    _amount_stats = njit(cache=True)(_amount_stats_kernel)
+else:
+    _amount_stats = _amount_stats_numpy
+
+
+def _pulse_stats_kernel(income, expense):
+    """Income mean/std/last-three mean and expense mean/std for the pulse score"""
+    avg_income, std_income, recent_income = _amount_stats(income)
+    avg_expense, std_expense, _ = _amount_stats(expense)
+    return avg_income, std_income, avg_expense, std_expense, recent_income
+
+
+if HAS_NUMPY and HAS_NUMBA:
+    _pulse_stats = njit(cache=True)(_pulse_stats_kernel)
+else:
+    _pulse_stats = _pulse_stats_kernel
+
 
 class TaalCoreAgent:
     """
@@ -22,13 +81,13 @@ class TaalCoreAgent:
 
     def analyze_income_rhythm(
         self,
-        income_data: List[Dict]
+        income_data: Union[List[Dict], IncomeView]
     ) -> Dict:
         """
         Analyze income patterns and calculate rhythm metrics
 
         Args:
-            income_data: List of income transactions with amounts and dates
+            income_data: List of income transactions with amounts and dates, or an IncomeView
 
         Returns:
             Dictionary with rhythm analysis
@@ -41,13 +100,11 @@ class TaalCoreAgent:
                 "trend": "stable"
             }
 
-        amounts = [item['amount'] for item in income_data]
-        dates = [datetime.fromisoformat(item['date']) if isinstance(item['date'], str) else item['date'] for item in income_data]
-
         if HAS_NUMPY:
-            avg_income = np.mean(amounts)
-            std_dev = np.std(amounts)
+            amounts = amounts_array(income_data)
+            avg_income, std_dev, recent_avg = _amount_stats(amounts)
         else:
+            amounts = [item['amount'] for item in income_data]
             avg_income = statistics.mean(amounts) if amounts else 0
             std_dev = statistics.stdev(amounts) if len(amounts) > 1 else 0
 
@@ -63,10 +120,8 @@ class TaalCoreAgent:
 
         # Calculate trend
         if len(amounts) >= 3:
-            if HAS_NUMPY:
-                recent_avg = np.mean(amounts[-3:])
-            else:
-                recent_avg = statistics.mean(amounts[-3:])
+            if not HAS_NUMPY:
+                recent_avg = (amounts[-1] + amounts[-2] + amounts[-3]) / 3.0
             overall_avg = avg_income
             if recent_avg > overall_avg * 1.1:
                 trend = "up"
@@ -88,8 +143,8 @@ class TaalCoreAgent:
 
     def calculate_financial_pulse(
         self,
-        income_data: List[Dict],
-        expense_data: List[Dict]
+        income_data: Union[List[Dict], IncomeView],
+        expense_data: Union[List[Dict], IncomeView]
     ) -> Tuple[int, Dict]:
         """
         Calculate the financial pulse score (0-100)
@@ -104,13 +159,15 @@ class TaalCoreAgent:
         if not income_data:
             return 0, {"error": "No income data"}
 
-        income_amounts = [item['amount'] for item in income_data]
-        expense_amounts = [item['amount'] for item in expense_data] if expense_data else [0]
-
         if HAS_NUMPY:
-            avg_income = np.mean(income_amounts)
-            avg_expense = np.mean(expense_amounts)
+            income_amounts = amounts_array(income_data)
+            expense_amounts = amounts_array(expense_data) if expense_data else np.zeros(1)
+            avg_income, std_dev, avg_expense, expense_std, recent_avg = _pulse_stats(
+                income_amounts, expense_amounts
+            )
         else:
+            income_amounts = [item['amount'] for item in income_data]
+            expense_amounts = [item['amount'] for item in expense_data] if expense_data else [0]
             avg_income = statistics.mean(income_amounts) if income_amounts else 0
             avg_expense = statistics.mean(expense_amounts) if expense_amounts else 0
 
@@ -119,9 +176,7 @@ class TaalCoreAgent:
         savings_rate = max(0, min(100, savings_rate))  # Clamp between 0-100
 
         # Calculate income stability
-        if HAS_NUMPY:
-            std_dev = np.std(income_amounts)
-        else:
+        if not HAS_NUMPY:
             std_dev = statistics.stdev(income_amounts) if len(income_amounts) > 1 else 0
         volatility = std_dev / avg_income if avg_income > 0 else 1
         stability_score = max(0, 100 - (volatility * 100))
@@ -129,7 +184,7 @@ class TaalCoreAgent:
         # Calculate expense consistency
         if len(expense_amounts) > 1:
             if HAS_NUMPY:
-                expense_volatility = np.std(expense_amounts) / np.mean(expense_amounts)
+                expense_volatility = expense_std / avg_expense if avg_expense > 0 else 0
             else:
                 expense_mean = statistics.mean(expense_amounts)
                 expense_volatility = statistics.stdev(expense_amounts) / expense_mean if expense_mean > 0 else 0
@@ -146,10 +201,8 @@ class TaalCoreAgent:
 
         # Determine trend
         if len(income_amounts) >= 3:
-            if HAS_NUMPY:
-                recent_avg = np.mean(income_amounts[-3:])
-            else:
-                recent_avg = statistics.mean(income_amounts[-3:])
+            if not HAS_NUMPY:
+                recent_avg = (income_amounts[-1] + income_amounts[-2] + income_amounts[-3]) / 3.0
             if recent_avg > avg_income * 1.05:
                 trend = "up"
             elif recent_avg < avg_income * 0.95:
@@ -221,14 +274,7 @@ class TaalCoreAgent:
         savings_rate = pulse_metrics.get('savings_rate', 0)
 
         # Score-based insights
-        if score >= 80:
-            insights.append("🎉 Excellent financial health! Keep up the great work.")
-        elif score >= 60:
-            insights.append("👍 Good financial position. Small improvements can take you further.")
-        elif score >= 40:
-            insights.append("⚠️ Moderate financial health. Focus on increasing savings.")
-        else:
-            insights.append("🚨 Attention needed. Let's work on stabilizing your finances.")
+        insights.append(_SCORE_INSIGHTS[bisect_right(_SCORE_THRESHOLDS, score)])
 
         # Volatility insights
         if volatility > 0.4:
@@ -241,3 +287,9 @@ class TaalCoreAgent:
             insights.append("🌟 Outstanding savings rate! Consider investing for growth.")
 
         return insights
+
+
+@lru_cache(maxsize=1)
+def get_taal_core_agent() -> TaalCoreAgent:
+    """Process-wide TaalCoreAgent, built on first use rather than at import."""
+    return TaalCoreAgent()
@@ -2,25 +2,149 @@
 Tax Agent - Tax insights and filing guidance
 Handles TDS, GST, and advance tax for Indian freelancers
 """
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 from typing import Dict, List, Tuple
 from datetime import datetime
+from bisect import bisect_right
+from functools import lru_cache
 import calendar
 
+# Deductible buckets in match priority order, with the keywords that select them
+_EXPENSE_KEYWORDS = (
+    ('office_rent', ('rent',)),
+    ('equipment', ('laptop', 'computer', 'equipment', 'hardware')),
+    ('internet_phone', ('internet', 'phone', 'mobile')),
+    ('travel', ('travel', 'transport')),
+    ('professional_development', ('course', 'training', 'book', 'learning')),
+    ('software_subscriptions', ('software', 'subscription', 'saas')),
+)
+_EXPENSE_BUCKETS = tuple(bucket for bucket, _ in _EXPENSE_KEYWORDS) + ('other',)
+
+
+@lru_cache(maxsize=1024)
+def _expense_bucket(category: str) -> str:
+    """Map a lowercased expense category to its bucket; repeat categories are a dict hit"""
+    for bucket, keywords in _EXPENSE_KEYWORDS:
+        if any(word in category for word in keywords):
+            return bucket
+    return 'other'
+
+
+# Advance tax share due in each quarter
+_QUARTER_INDEX = {'Q1': 0, 'Q2': 1, 'Q3': 2, 'Q4': 3}
+_QUARTER_PERCENTAGES = (
+    0.15,  # 15% by June 15
+    0.30,  # 45% by Sep 15 (cumulative)
+    0.45,  # 75% by Dec 15 (cumulative)
+    0.25,  # 100% by Mar 15 (cumulative)
+)
+
+
+@lru_cache(maxsize=12)
+def _quarter_for_month(month: int) -> str:
+    # Financial year in India: April to March
+    if 4 <= month <= 6:
+        return 'Q1'
+    elif 7 <= month <= 9:
+        return 'Q2'
+    elif 10 <= month <= 12:
+        return 'Q3'
+    else:  # Jan-Mar
+        return 'Q4'
+
+GST_THRESHOLD = 2_000_000  # 20 lakhs for services
+GST_APPROACHING_BUFFER = 500_000  # Within 5 lakhs of threshold
+_GST_MESSAGES = {
+    'required': "GST registration is mandatory as your turnover (₹{turnover:,.0f}) exceeds ₹20 lakhs.",
+    'approaching': "You're ₹{buffer:,.0f} away from GST threshold. Consider registering voluntarily.",
+    'not_required': "GST registration not required yet. You're ₹{buffer:,.0f} below the threshold.",
+}
+
+
+# FY 2024-25 tax slabs (new regime)
+TAX_SLABS = (
+    (300000, 0),      # Up to 3L: 0%
+    (700000, 0.05),   # 3L-7L: 5%
+    (1000000, 0.10),  # 7L-10L: 10%
+    (1200000, 0.15),  # 10L-12L: 15%
+    (1500000, 0.20),  # 12L-15L: 20%
+    (float('inf'), 0.30)  # Above 15L: 30%
+)
+
+
+def _slab_tables():
+    """Slab boundaries, marginal rates and the tax due at each boundary"""
+    limits = [limit for limit, _ in TAX_SLABS[:-1]]
+    rates = [rate for _, rate in TAX_SLABS]
+    cum = [0]
+    lower = 0
+    for limit, rate in TAX_SLABS[:-1]:
+        cum.append(cum[-1] + (limit - lower) * rate)
+        lower = limit
+    return limits, rates, cum
+
+
+# Built once at import, so a tax lookup is one bisect plus a multiply-add
+# and no agent instance rebuilds them
+_SLAB_LIMITS, _SLAB_RATES, _SLAB_CUM = _slab_tables()
+if HAS_NUMPY:
+    # Array copies of the slab tables for estimate_quarterly_tax_batch
+    _SLAB_ARRAYS = (
+        np.asarray(_SLAB_LIMITS, dtype=np.float64),
+        np.asarray([0] + _SLAB_LIMITS, dtype=np.float64),
+        np.asarray(_SLAB_RATES, dtype=np.float64),
+        np.asarray(_SLAB_CUM, dtype=np.float64),
+    )
+
+
+def _calc_tax_vec_kernel(taxable_incomes, limits, lowers, rates, cum):
+    """Slab tax plus 4% cess for every income, via binary search on the slab limits"""
+    out = np.empty_like(taxable_incomes)
+    for k in range(taxable_incomes.shape[0]):
+        income = taxable_incomes[k]
+        if income <= 0:
+            out[k] = 0.0
+            continue
+        i = np.searchsorted(limits, income, side='right')
+        out[k] = (cum[i] + (income - lowers[i]) * rates[i]) * 1.04
+    return out
+
+
+def _calc_tax_vec_numpy(taxable_incomes, limits, lowers, rates, cum):
+    i = np.searchsorted(limits, taxable_incomes, side='right')
+    tax = (cum[i] + (taxable_incomes - lowers[i]) * rates[i]) * 1.04
+    return np.where(taxable_incomes > 0, tax, 0.0)
+
+
+if HAS_NUMPY and HAS_NUMBA:
+    _calc_tax_vec = njit(cache=True)(_calc_tax_vec_kernel)
+else:
+    _calc_tax_vec = _calc_tax_vec_numpy
+
+
 class TaxAgent:
     """
     Provides tax insights and categorization for Indian tax system
     """
 
     def __init__(self):
-        # FY 2024-25 tax slabs (new regime)
-        self.tax_slabs = [
-            (300000, 0),      # Up to 3L: 0%
-            (700000, 0.05),   # 3L-7L: 5%
-            (1000000, 0.10),  # 7L-10L: 10%
-            (1200000, 0.15),  # 10L-12L: 15%
-            (1500000, 0.20),  # 12L-15L: 20%
-            (float('inf'), 0.30)  # Above 15L: 30%
-        ]
+        self.tax_slabs = list(TAX_SLABS)
+        self._slab_limits = _SLAB_LIMITS
+        self._slab_rates = _SLAB_RATES
+        self._slab_cum = _SLAB_CUM
+        if HAS_NUMPY:
+            self._slab_arrays = _SLAB_ARRAYS
 
         # Standard deduction
         self.standard_deduction = 50000
@@ -65,14 +189,8 @@ class TaxAgent:
         tax_amount = self._calculate_tax(taxable_income)
 
         # Adjust for advance tax (quarterly)
-        quarter_percentages = {
-            'Q1': 0.15,  # 15% by June 15
-            'Q2': 0.30,  # 45% by Sep 15 (cumulative)
-            'Q3': 0.45,  # 75% by Dec 15 (cumulative)
-            'Q4': 0.25   # 100% by Mar 15 (cumulative)
-        }
-
-        quarter_percentage = quarter_percentages.get(current_quarter, 0.25)
+        quarter_index = _QUARTER_INDEX.get(current_quarter)
+        quarter_percentage = _QUARTER_PERCENTAGES[quarter_index] if quarter_index is not None else 0.25
         quarterly_tax = tax_amount * quarter_percentage
 
         return {
@@ -89,21 +207,49 @@ class TaxAgent:
             'expense_categories': {k: round(v, 2) for k, v in business_expenses.items()}
         }
 
+    def estimate_quarterly_tax_batch(
+        self,
+        total_incomes,
+        total_deductibles,
+        current_quarter: str
+    ) -> Dict:
+        """
+        Estimate tax for many users at once (requires NumPy)
+
+        Args:
+            total_incomes: Array-like of total income per user
+            total_deductibles: Array-like of deductible business expenses per user
+            current_quarter: Quarter string (e.g., "Q1", "Q2")
+
+        Returns:
+            Dict of arrays aligned with the inputs
+        """
+        if not HAS_NUMPY:
+            raise RuntimeError("estimate_quarterly_tax_batch requires numpy")
+
+        incomes = np.asarray(total_incomes, dtype=np.float64)
+        deductibles = np.asarray(total_deductibles, dtype=np.float64)
+        taxable_incomes = np.maximum(0.0, incomes - deductibles - self.standard_deduction)
+        tax_amounts = _calc_tax_vec(taxable_incomes, *self._slab_arrays)
+
+        quarter_index = _QUARTER_INDEX.get(current_quarter)
+        quarter_percentage = _QUARTER_PERCENTAGES[quarter_index] if quarter_index is not None else 0.25
+
+        return {
+            'estimated_annual_tax': np.round(tax_amounts, 2),
+            'quarterly_tax': np.round(tax_amounts * quarter_percentage, 2),
+            'taxable_income': np.round(taxable_incomes, 2),
+            'quarter': current_quarter
+        }
+
     def _calculate_tax(self, taxable_income: float) -> float:
         """Calculate income tax based on slabs"""
         if taxable_income <= 0:
             return 0
 
-        tax = 0
-        prev_slab = 0
-
-        for slab_limit, rate in self.tax_slabs:
-            if taxable_income > prev_slab:
-                taxable_in_slab = min(taxable_income, slab_limit) - prev_slab
-                tax += taxable_in_slab * rate
-                prev_slab = slab_limit
-            else:
-                break
+        i = bisect_right(self._slab_limits, taxable_income)
+        base_limit = self._slab_limits[i - 1] if i > 0 else 0
+        tax = self._slab_cum[i] + (taxable_income - base_limit) * self._slab_rates[i]
 
         # Add 4% cess
         tax_with_cess = tax * 1.04
@@ -112,34 +258,11 @@ class TaxAgent:
 
     def _categorize_expenses(self, expenses: List[Dict]) -> Dict[str, float]:
         """Categorize expenses into tax-deductible categories"""
-        categories = {
-            'office_rent': 0,
-            'equipment': 0,
-            'internet_phone': 0,
-            'travel': 0,
-            'professional_development': 0,
-            'software_subscriptions': 0,
-            'other': 0
-        }
+        categories = dict.fromkeys(_EXPENSE_BUCKETS, 0)
 
         for expense in expenses:
-            category = expense.get('category', '').lower()
-            amount = expense.get('amount', 0)
-
-            if 'rent' in category:
-                categories['office_rent'] += amount
-            elif any(word in category for word in ['laptop', 'computer', 'equipment', 'hardware']):
-                categories['equipment'] += amount
-            elif any(word in category for word in ['internet', 'phone', 'mobile']):
-                categories['internet_phone'] += amount
-            elif 'travel' in category or 'transport' in category:
-                categories['travel'] += amount
-            elif any(word in category for word in ['course', 'training', 'book', 'learning']):
-                categories['professional_development'] += amount
-            elif 'software' in category or 'subscription' in category or 'saas' in category:
-                categories['software_subscriptions'] += amount
-            else:
-                categories['other'] += amount
+            bucket = _expense_bucket(expense.get('category', '').lower())
+            categories[bucket] += expense.get('amount', 0)
 
         return categories
 
@@ -182,28 +305,23 @@ class TaxAgent:
         Returns:
             GST requirement status
         """
-        gst_threshold = 2000000  # 20 lakhs for services
-
-        is_required = annual_turnover >= gst_threshold
-        buffer = gst_threshold - annual_turnover
+        is_required = annual_turnover >= GST_THRESHOLD
+        buffer = GST_THRESHOLD - annual_turnover
 
         if is_required:
             status = "required"
-            message = f"GST registration is mandatory as your turnover (₹{annual_turnover:,.0f}) exceeds ₹20 lakhs."
-        elif buffer <= 500000:  # Within 5 lakhs of threshold
+        elif buffer <= GST_APPROACHING_BUFFER:
             status = "approaching"
-            message = f"You're ₹{buffer:,.0f} away from GST threshold. Consider registering voluntarily."
         else:
             status = "not_required"
-            message = f"GST registration not required yet. You're ₹{buffer:,.0f} below the threshold."
 
         return {
             'status': status,
             'is_required': is_required,
-            'threshold': gst_threshold,
+            'threshold': GST_THRESHOLD,
             'current_turnover': round(annual_turnover, 2),
             'buffer': round(buffer, 2) if buffer > 0 else 0,
-            'message': message
+            'message': _GST_MESSAGES[status].format(turnover=annual_turnover, buffer=buffer)
         }
 
     def generate_tax_suggestions(
@@ -262,15 +380,10 @@ class TaxAgent:
 
     def get_current_quarter(self) -> str:
         """Get current financial year quarter"""
-        now = datetime.now()
-        month = now.month
-
-        # Financial year in India: April to March
-        if 4 <= month <= 6:
-            return 'Q1'
-        elif 7 <= month <= 9:
-            return 'Q2'
-        elif 10 <= month <= 12:
-            return 'Q3'
-        else:  # Jan-Mar
-            return 'Q4'
+        return _quarter_for_month(datetime.now().month)
+
+
+@lru_cache(maxsize=1)
+def get_tax_agent() -> TaxAgent:
+    """Process-wide TaxAgent so the slab tables are built once, on first use."""
+    return TaxAgent()
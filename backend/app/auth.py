@@ -0,0 +1,43 @@
+"""
+Bearer-token authentication for user-scoped routes
+"""
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+from app.config import settings
+
+_bearer = HTTPBearer(auto_error=False)
+_CHALLENGE = {"WWW-Authenticate": "Bearer"}
+
+
+async def current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer),
+) -> UUID:
+    """
+    Resolve the caller's user id from the Supabase access token
+
+    FastAPI caches the result per request, so routes and other dependencies
+    that depend on it share one decode.
+    """
+    if credentials is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated", headers=_CHALLENGE)
+
+    try:
+        claims = jwt.decode(
+            credentials.credentials,
+            settings.secret_key,
+            algorithms=[settings.algorithm],
+            audience=settings.jwt_audience,
+        )
+        user_id = UUID(claims["sub"])
+    except (JWTError, KeyError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication token",
+            headers=_CHALLENGE,
+        ) from exc
+
+    return user_id
@@ -0,0 +1,125 @@
+"""
+Pure-ASGI CORS middleware for the fixed origin set configured at startup
+"""
+from typing import Iterable, List, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+_PREFLIGHT_MAX_AGE = b"600"
+
+
+class FastCORS:
+    """
+    CORS with every header value rendered once at construction
+
+    Mirrors Starlette's CORSMiddleware for the options this app uses:
+    preflights are answered directly, and simple/actual responses get the
+    allow-origin headers appended in a single pass over the start message.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: Iterable[str] = (),
+        allow_credentials: bool = False,
+        allow_methods: Iterable[str] = ("*",),
+        allow_headers: Iterable[str] = ("*",),
+    ) -> None:
+        self.app = app
+        origins = tuple(allow_origins)
+        self.allow_all_origins = "*" in origins
+        self.allowed_origins = frozenset(origins)
+        self.allow_credentials = allow_credentials
+
+        methods = tuple(allow_methods)
+        methods = _ALL_METHODS if "*" in methods else methods
+        self.allowed_methods = frozenset(m.encode("latin-1") for m in methods)
+        headers = tuple(allow_headers)
+        self.allow_all_headers = "*" in headers
+        self.allowed_headers = frozenset(h.lower() for h in headers)
+
+        credentials: List[Tuple[bytes, bytes]] = (
+            [(b"access-control-allow-credentials", b"true")] if allow_credentials else []
+        )
+        self.simple_headers = credentials
+        self.preflight_headers = credentials + [
+            (b"access-control-allow-methods", ", ".join(methods).encode("latin-1")),
+            (b"access-control-max-age", _PREFLIGHT_MAX_AGE),
+        ]
+        # A wildcard is only valid when no credentials are shared
+        self.wildcard_origin = self.allow_all_origins and not allow_credentials
+
+    def _origin_allowed(self, origin: str) -> bool:
+        return self.allow_all_origins or origin in self.allowed_origins
+
+    def _origin_headers(self, origin: bytes, explicit: bool = False) -> List[Tuple[bytes, bytes]]:
+        if self.wildcard_origin and not explicit:
+            return [(b"access-control-allow-origin", b"*")]
+        return [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = b""
+        request_method = b""
+        request_headers = b""
+        has_cookie = False
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+            elif name == b"cookie":
+                has_cookie = True
+
+        if not origin:
+            await self.app(scope, receive, send)
+            return
+
+        allowed = self._origin_allowed(origin.decode("latin-1"))
+        if scope["method"] == "OPTIONS" and request_method:
+            await self._preflight(allowed, origin, request_method, request_headers, send)
+            return
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+
+        # Like Starlette, a request carrying cookies gets its origin echoed
+        # back rather than the wildcard
+        extra_headers = self._origin_headers(origin, explicit=has_cookie) + self.simple_headers
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + extra_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight(
+        self, allowed: bool, origin: bytes, request_method: bytes, request_headers: bytes, send: Send
+    ) -> None:
+        allowed = allowed and request_method in self.allowed_methods
+        if allowed and not self.allow_all_headers and request_headers:
+            requested = {h.strip().lower() for h in request_headers.decode("latin-1").split(",")}
+            allowed = requested <= self.allowed_headers
+
+        if not allowed:
+            body = b"Disallowed CORS request"
+            headers = [(b"content-type", b"text/plain; charset=utf-8")]
+            status = 400
+        else:
+            body = b"OK"
+            headers = self._origin_headers(origin) + self.preflight_headers
+            if request_headers:
+                headers.append((b"access-control-allow-headers", request_headers))
+            headers.append((b"content-type", b"text/plain; charset=utf-8"))
+            status = 200
+
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
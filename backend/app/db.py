@@ -1,18 +1,51 @@
+from typing import AsyncIterator
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
-from app.config import settings
+from app.config import get_settings
 
 
 class Base(DeclarativeBase):
     """Base class for all ORM models."""
 
 
-engine = create_engine(
-    settings.database_url,
+def _engine_url(database_url: str) -> str:
+    """Prefer the psycopg 3 driver for bare postgresql:// URLs."""
+    for prefix in ("postgresql://", "postgres://"):
+        if database_url.startswith(prefix):
+            return "postgresql+psycopg://" + database_url[len(prefix):]
+    return database_url
+
+
+# Supabase and PgBouncer drop idle connections, so each checkout is
+# pre-pinged; recycling also retires connections before server timeouts.
+_ENGINE_OPTIONS = dict(
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=0,
+    pool_recycle=1800,
+    connect_args={"options": "-c statement_timeout=30000"},
+    insertmanyvalues_page_size=1000,
+)
+
+_settings = get_settings()
+_DATABASE_URL = _engine_url(_settings.database_url)
+
+# Each engine keeps its own pool, so a worker can hold up to the sum of both
+# pool sizes and overflows; size them against the server's connection limit.
+engine = create_engine(
+    _DATABASE_URL,
+    pool_size=_settings.db_pool_size,
+    max_overflow=_settings.db_max_overflow,
+    **_ENGINE_OPTIONS,
+)
+
+# psycopg 3 drives both engines, so the async side needs no extra driver.
+async_engine = create_async_engine(
+    _DATABASE_URL,
+    pool_size=_settings.db_async_pool_size,
+    max_overflow=_settings.db_async_max_overflow,
+    **_ENGINE_OPTIONS,
 )
 
 SessionLocal = sessionmaker(
@@ -21,6 +54,14 @@ SessionLocal = sessionmaker(
     autoflush=False,
 )
 
+# Keep attributes loaded after commit; lazy refreshes cannot run implicitly
+# under asyncio.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def get_db():
     """FastAPI dependency that yields a database session."""
@@ -29,3 +70,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency that yields an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,57 +1,127 @@
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
+from functools import lru_cache
 import os
 
+from app.cors import FastCORS
 from app.routes import users, transactions, goals, chat, simulator, tax, whatsapp, dashboard
+from app.services.user_service import close_supabase_client
+from app.services.whatsapp_bot import close_twilio_client, set_client_loop
 
 load_dotenv()
 
-app = FastAPI(
-    title="TaalAI API",
-    description="AI-powered financial coach backend",
-    version="1.0.0"
-)
+logger = logging.getLogger(__name__)
+
 
 # CORS middleware
-raw_origins = os.getenv("ALLOWED_ORIGINS", "").split(",")
-origins = [origin.strip() for origin in raw_origins if origin.strip()]
-
-cors_kwargs = {
-    "allow_methods": ["*"],
-    "allow_headers": ["*"],
-}
-
-if origins:
-    cors_kwargs["allow_origins"] = origins
-    cors_kwargs["allow_credentials"] = True
-else:
-    cors_kwargs["allow_origins"] = ["*"]
-    cors_kwargs["allow_credentials"] = False
-
-app.add_middleware(CORSMiddleware, **cors_kwargs)
-
-# Include routers
-app.include_router(users.router, prefix="/api/users", tags=["users"])
-app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
-app.include_router(goals.router, prefix="/api/goals", tags=["goals"])
-app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
-app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
-app.include_router(simulator.router, prefix="/api/simulator", tags=["simulator"])
-app.include_router(tax.router, prefix="/api/tax", tags=["tax"])
-app.include_router(whatsapp.router, prefix="/api/whatsapp", tags=["whatsapp"])
-
-@app.get("/")
-async def root():
+@lru_cache(maxsize=1)
+def get_cors_config() -> dict:
+    """Parse ALLOWED_ORIGINS once; an empty value allows any origin without credentials."""
+    origins = tuple(
+        origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "").split(",") if origin.strip()
+    )
     return {
-        "message": "TaalAI API",
-        "version": "1.0.0",
-        "status": "running"
+        "allow_methods": ["*"],
+        "allow_headers": ["*"],
+        "allow_origins": list(origins) if origins else ["*"],
+        "allow_credentials": bool(origins),
     }
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+
+ROUTES = (
+    (users.router, "/api/users", "users"),
+    (transactions.router, "/api/transactions", "transactions"),
+    (goals.router, "/api/goals", "goals"),
+    (dashboard.router, "/api/dashboard", "dashboard"),
+    (chat.router, "/api/chat", "chat"),
+    (simulator.router, "/api/simulator", "simulator"),
+    (tax.router, "/api/tax", "tax"),
+    (whatsapp.router, "/api/whatsapp", "whatsapp"),
+)
+
+
+def _load_agents():
+    from app.agents.coach_agent import get_coach_agent
+    from app.agents.predictor_agent import get_predictor_agent
+
+    return get_coach_agent(), get_predictor_agent()
+
+
+async def _warm_up(app: FastAPI) -> None:
+    try:
+        from app.agents.langgraph_router import MEMORY_WORKERS, run_memory_worker
+
+        app.state.memory_workers = [asyncio.create_task(run_memory_worker()) for _ in range(MEMORY_WORKERS)]
+
+        app.state.coach, app.state.predictor = await asyncio.to_thread(_load_agents)
+        app.state.ready = True
+    except Exception:  # pragma: no cover - surfaced through /health/ready
+        # Nothing awaits this task, so log here; readiness stays false
+        logger.exception("Agent warm-up failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the agents in the background so the port opens before they load."""
+    app.state.ready = False
+    # Blocking bulk nudges from scheduler threads run on this loop
+    set_client_loop(asyncio.get_running_loop())
+    warm_up_task = asyncio.create_task(_warm_up(app))
+    try:
+        yield
+    finally:
+        warm_up_task.cancel()
+        for worker in getattr(app.state, "memory_workers", ()):
+            worker.cancel()
+        await close_supabase_client()
+        await close_twilio_client()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title="TaalAI API",
+        description="AI-powered financial coach backend",
+        version="1.0.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+    )
+
+    app.add_middleware(FastCORS, **get_cors_config())
+
+    for router, prefix, tag in ROUTES:
+        app.include_router(router, prefix=prefix, tags=[tag])
+
+    @app.get("/")
+    async def root():
+        return {
+            "message": "TaalAI API",
+            "version": "1.0.0",
+            "status": "running"
+        }
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    @app.get("/health/live")
+    async def liveness():
+        return {"status": "alive"}
+
+    @app.get("/health/ready")
+    async def readiness():
+        if not getattr(app.state, "ready", False):
+            return ORJSONResponse(status_code=503, content={"status": "starting"})
+        return {"status": "ready"}
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
@@ -7,6 +7,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -45,6 +46,11 @@ class User(Base):
     invoices = relationship("Invoice", back_populates="user", cascade="all, delete-orphan")
     compliance_tasks = relationship("ComplianceTask", back_populates="user", cascade="all, delete-orphan")
     agent_memories = relationship("AgentMemory", back_populates="user", cascade="all, delete-orphan")
+    chat_response_cache = relationship("ChatResponseCache", back_populates="user", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        CheckConstraint("full_name IS NULL OR length(btrim(full_name)) > 0", name="users_full_name_nonblank"),
+    )
 
 
 class IncomeSource(Base):
@@ -115,6 +121,9 @@ class Transaction(Base):
     __table_args__ = (
         CheckConstraint("type IN ('income','expense','transfer')", name="transactions_type_check"),
         CheckConstraint("ledger_status IN ('unreconciled','pending','cleared')", name="transactions_ledger_status_check"),
+        Index("transactions_user_date_idx", user_id, date.desc()),
+        Index("transactions_user_created_idx", user_id, created_at.desc()),
+        Index("transactions_user_type_date_idx", user_id, type, date),
     )
 
     user = relationship("User", back_populates="transactions")
@@ -149,6 +158,7 @@ class Invoice(Base):
 
     __table_args__ = (
         CheckConstraint("status IN ('draft','sent','paid','overdue','cancelled')", name="invoices_status_check"),
+        Index("invoices_user_status_due_idx", user_id, status, due_date),
     )
 
     user = relationship("User", back_populates="invoices")
@@ -173,6 +183,7 @@ class ComplianceTask(Base):
     __table_args__ = (
         CheckConstraint("task_type IN ('gst','tax','bookkeeping')", name="compliance_task_type_check"),
         CheckConstraint("status IN ('pending','in_progress','completed')", name="compliance_task_status_check"),
+        Index("compliance_tasks_user_status_due_idx", user_id, status, due_date),
     )
 
     user = relationship("User", back_populates="compliance_tasks")
@@ -203,6 +214,8 @@ class Goal(Base):
     __table_args__ = (
         CheckConstraint("status IN ('active','paused','achieved')", name="goals_status_check"),
         CheckConstraint("priority IN ('high','medium','low')", name="goals_priority_check"),
+        Index("goals_user_created_idx", user_id, created_at.desc()),
+        Index("goals_user_status_idx", user_id, status),
     )
 
     user = relationship("User", back_populates="goals")
@@ -224,6 +237,7 @@ class PulseHistory(Base):
     __table_args__ = (
         CheckConstraint("score >= 0 AND score <= 100", name="pulse_history_score_check"),
         CheckConstraint("trend IN ('up','down','stable')", name="pulse_history_trend_check"),
+        Index("pulse_history_user_calculated_idx", user_id, calculated_at.desc()),
     )
 
 
@@ -239,6 +253,7 @@ class ChatMessage(Base):
 
     __table_args__ = (
         CheckConstraint("role IN ('user','assistant')", name="chat_messages_role_check"),
+        Index("chat_messages_user_created_idx", user_id, created_at.desc()),
     )
 
     user = relationship("User", back_populates="chat_messages")
@@ -290,5 +305,31 @@ class AgentMemory(Base):
     meta = Column("metadata", JSONB)
     created_at = Column(DateTime(timezone=True), server_default=text("NOW()"))
 
+    __table_args__ = (
+        Index("agent_memories_user_idx", user_id),
+        Index(
+            "agent_memories_embedding_idx",
+            embedding,
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
     user = relationship("User", back_populates="agent_memories")
 
+
+class ChatResponseCache(Base):
+    __tablename__ = "chat_response_cache"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    message = Column(Text, nullable=False)
+    reply = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=text("NOW()"))
+
+    __table_args__ = (
+        Index("chat_response_cache_user_message_idx", user_id, message, created_at.desc()),
+    )
+
+    user = relationship("User", back_populates="chat_response_cache")
@@ -5,6 +5,14 @@ from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
+# Shared literal types, so each compiles to one validator reused across models
+TransactionType = Literal["income", "expense", "transfer"]
+LedgerStatus = Literal["unreconciled", "pending", "cleared"]
+GoalStatus = Literal["active", "paused", "achieved"]
+GoalPriority = Literal["high", "medium", "low"]
+Trend = Literal["up", "down", "stable"]
+ChatRole = Literal["user", "assistant"]
+
 # User Schemas
 class UserBase(BaseModel):
     email: EmailStr
@@ -28,7 +36,7 @@ class UserSyncRequest(BaseModel):
 
 # Transaction Schemas
 class TransactionBase(BaseModel):
-    type: Literal["income", "expense", "transfer"]
+    type: TransactionType
     amount: float = Field(gt=0)
     currency: str = "INR"
     category: Optional[str] = None
@@ -41,7 +49,7 @@ class TransactionBase(BaseModel):
     recurrence_rule: Optional[str] = None
     gst_eligible: bool = False
     gst_rate: Optional[float] = None
-    ledger_status: Literal["unreconciled", "pending", "cleared"] = "unreconciled"
+    ledger_status: LedgerStatus = "unreconciled"
     requires_follow_up: bool = False
     follow_up_reason: Optional[str] = None
     has_receipt: bool = False
@@ -55,8 +63,9 @@ class TransactionCreate(TransactionBase):
 class TransactionResponse(TransactionBase):
     model_config = ConfigDict(from_attributes=True)
 
-    id: str
-    user_id: str
+    id: UUID
+    user_id: UUID
+    client_id: Optional[UUID] = None
     created_at: datetime
     updated_at: datetime
 
@@ -65,8 +74,8 @@ class GoalBase(BaseModel):
     title: str
     description: Optional[str] = None
     category: Optional[str] = None
-    status: Literal["active", "paused", "achieved"] = "active"
-    priority: Literal["high", "medium", "low"] = "medium"
+    status: GoalStatus = "active"
+    priority: GoalPriority = "medium"
     target_amount: float = Field(gt=0)
     current_amount: float = Field(ge=0, default=0)
     deadline: Optional[date] = None
@@ -83,8 +92,8 @@ class GoalUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     category: Optional[str] = None
-    status: Optional[Literal["active", "paused", "achieved"]] = None
-    priority: Optional[Literal["high", "medium", "low"]] = None
+    status: Optional[GoalStatus] = None
+    priority: Optional[GoalPriority] = None
     target_amount: Optional[float] = None
     current_amount: Optional[float] = None
     deadline: Optional[date] = None
@@ -97,22 +106,22 @@ class GoalUpdate(BaseModel):
 class GoalResponse(GoalBase):
     model_config = ConfigDict(from_attributes=True)
 
-    id: str
-    user_id: str
+    id: UUID
+    user_id: UUID
     created_at: datetime
     updated_at: datetime
 
 # Financial Pulse Schema
 class FinancialPulseResponse(BaseModel):
     score: int = Field(ge=0, le=100)
-    trend: Literal["up", "down", "stable"]
+    trend: Trend
     volatility: float
     savings_rate: float
     insights: list
 
 # Chat Schemas
 class ChatHistoryItem(BaseModel):
-    role: Literal["user", "assistant"]
+    role: ChatRole
     content: str
 
 
@@ -1,33 +1,44 @@
+import asyncio
 from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from langchain_core.messages import BaseMessage
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.agents.coach_agent import CoachAgent
-from app.agents.langgraph_router import invoke_chat, schedule_memory_persist
-from app.db import get_db
+from app.agents.coach_agent import CoachAgent, get_coach_agent
+from app.agents.income_view import IncomeView
+from app.agents.langgraph_router import ainvoke_chat_stream, invoke_chat, schedule_memory_persist
+from app.agents.taal_core import TaalCoreAgent, get_taal_core_agent
+from app.auth import current_user
+from app.db import SessionLocal, get_async_db, get_db
 from app.models.schemas import ChatRequest, ChatResponse
+from app.services import transaction_service
 
-router = APIRouter()
-coach = CoachAgent()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     request: ChatRequest,
-    background_tasks: BackgroundTasks,
-    user_id: str = Query(...),
+    user_id: UUID = Depends(current_user),
     db: Session = Depends(get_db),
 ):
     """Send a message to the AI coach via LangGraph."""
     try:
-        response_text, final_messages = invoke_chat(
+        # The graph, its tools and the reply cache are all blocking; run them
+        # off the event loop so one chat turn doesn't stall every request.
+        response_text, final_messages = await asyncio.to_thread(
+            invoke_chat,
             request.message,
             request.history,
-            user_id=user_id,
+            user_id=str(user_id),
             db=db,
         )
-        schedule_memory_persist(background_tasks, user_id, final_messages)
+        schedule_memory_persist(str(user_id), final_messages)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -42,8 +53,86 @@ async def send_message(
         "timestamp": datetime.now(),
     }
 
+
+async def _sse_events(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Wrap text chunks as server-sent events, one data line per text line."""
+    async for chunk in chunks:
+        data = "\n".join(f"data: {line}" for line in chunk.split("\n"))
+        yield f"{data}\n\n"
+    yield "event: done\ndata: \n\n"
+
+
+@router.post("/message/stream")
+async def stream_message(
+    request: ChatRequest,
+    user_id: UUID = Depends(current_user),
+):
+    """Stream the coach's reply as server-sent events while the graph runs."""
+    final_messages: List[BaseMessage] = []
+
+    async def chunks() -> AsyncIterator[str]:
+        # get_db closes its session before a streamed body is sent, so the
+        # stream owns a session for as long as the graph runs.
+        with SessionLocal() as db:
+            async for chunk in ainvoke_chat_stream(
+                request.message,
+                request.history,
+                user_id=str(user_id),
+                db=db,
+                final_messages=final_messages,
+            ):
+                yield chunk
+        schedule_memory_persist(str(user_id), final_messages)
+
+    return StreamingResponse(_sse_events(chunks()), media_type="text/event-stream")
+
+
+# Window of transactions the advice context is averaged over
+_ADVICE_CONTEXT_MONTHS = 3
+
+
+def _series_total(series: transaction_service.Series) -> float:
+    if isinstance(series, IncomeView):
+        return float(series.amounts.sum())
+    return sum(item["amount"] for item in series)
+
+
+async def _advice_context(db: AsyncSession, user_id: UUID, taal_core: TaalCoreAgent) -> Optional[Dict]:
+    """Pulse score, monthly averages and volatility the coach personalizes advice with."""
+    income_data, expense_data = await transaction_service.income_expense_series(
+        db, user_id, months=_ADVICE_CONTEXT_MONTHS
+    )
+    if not income_data:
+        return None
+    pulse_score, metrics = taal_core.calculate_financial_pulse(income_data, expense_data)
+    return {
+        "pulse_score": pulse_score,
+        "avg_income": _series_total(income_data) / _ADVICE_CONTEXT_MONTHS,
+        "avg_expense": _series_total(expense_data) / _ADVICE_CONTEXT_MONTHS,
+        "volatility": metrics["volatility"],
+    }
+
+
+@router.post("/advice/stream")
+async def stream_advice(
+    request: ChatRequest,
+    user_id: UUID = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+    coach: CoachAgent = Depends(get_coach_agent),
+    taal_core: TaalCoreAgent = Depends(get_taal_core_agent),
+):
+    """Stream coach advice to the client as server-sent events."""
+    # Loaded before the response starts, while the request's session is open
+    context = await _advice_context(db, user_id, taal_core)
+    chunks = coach.stream_advice(request.message, context=context, language=request.language)
+    return StreamingResponse(_sse_events(chunks), media_type="text/event-stream")
+
+
 @router.get("/daily-nudge")
-async def get_daily_nudge(user_id: str = Query(...)):
+async def get_daily_nudge(
+    user_id: UUID = Depends(current_user),
+    coach: CoachAgent = Depends(get_coach_agent),
+):
     """Get daily financial nudge"""
     # TODO: Fetch user data from database
     user_data = {
@@ -53,7 +142,7 @@ async def get_daily_nudge(user_id: str = Query(...)):
         "trend": "up"
     }
 
-    nudge = coach.generate_daily_nudge(user_data)
+    nudge = await coach.generate_daily_nudge(user_data)
 
     return {
         "nudge": nudge,
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from uuid import UUID
 
-from app.db import get_db
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse, Response
+
+from app.auth import current_user
 from app.models.schemas import DashboardHighlightsResponse
 from app.services import dashboard_service
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 @router.get("/highlights", response_model=DashboardHighlightsResponse)
-async def get_dashboard_highlights(user_id: str = Query(...), db: Session = Depends(get_db)):
-    return dashboard_service.get_dashboard_highlights(db, user_id)
+async def get_dashboard_highlights(request: Request, user_id: UUID = Depends(current_user)):
+    # The body is the orjson encoding of slotted dataclasses already shaped
+    # like the schema, cached with its ETag; response_model still documents it.
+    body, etag = await dashboard_service.get_highlights_payload(user_id)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from app.auth import current_user
 from app.models.schemas import WhatIfRequest, WhatIfResponse
-from app.agents.predictor_agent import PredictorAgent
+from app.agents.predictor_agent import PredictorAgent, get_predictor_agent
 
-router = APIRouter()
-predictor = PredictorAgent()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/what-if", response_model=WhatIfResponse)
-async def simulate_what_if(request: WhatIfRequest, user_id: str = Query(...)):
+async def simulate_what_if(
+    request: WhatIfRequest,
+    user_id: UUID = Depends(current_user),
+    predictor: PredictorAgent = Depends(get_predictor_agent),
+):
     """Simulate 'what if I buy this?' scenario"""
     try:
         # TODO: Fetch real user data from database
@@ -49,13 +56,14 @@ async def simulate_what_if(request: WhatIfRequest, user_id: str = Query(...)):
         )
 
         # Combine for comparison
-        chart_data = []
-        for i in range(len(chart_data_without)):
-            chart_data.append({
-                "month": chart_data_without[i]['month'],
-                "without_purchase": chart_data_without[i]['balance'],
-                "with_purchase": chart_data_with[i]['balance']
-            })
+        chart_data = [
+            {
+                "month": without['month'],
+                "without_purchase": without['balance'],
+                "with_purchase": with_['balance']
+            }
+            for without, with_ in zip(chart_data_without, chart_data_with)
+        ]
 
         return {
             "purchase_amount": request.purchase_amount,
@@ -68,7 +76,11 @@ async def simulate_what_if(request: WhatIfRequest, user_id: str = Query(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/forecast-income")
-async def forecast_income(user_id: str = Query(...), months: int = Query(3, le=12)):
+async def forecast_income(
+    user_id: UUID = Depends(current_user),
+    months: int = Query(3, le=12),
+    predictor: PredictorAgent = Depends(get_predictor_agent),
+):
     """Forecast future income"""
     # TODO: Fetch historical income from database
     historical_income = [
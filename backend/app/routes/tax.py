@@ -1,25 +1,33 @@
-from fastapi import APIRouter, HTTPException, Query
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from app.models.schemas import TaxInsightResponse
-from app.agents.tax_agent import TaxAgent
+from app.agents.tax_agent import TaxAgent, get_tax_agent
+from app.auth import current_user
+
+router = APIRouter(default_response_class=ORJSONResponse)
 
-router = APIRouter()
-tax_agent = TaxAgent()
+# Placeholder records until insights read the user's transactions; built
+# once instead of per request
+_SAMPLE_INCOME = (
+    {"amount": 50000, "date": "2024-01-15", "category": "freelance"},
+    {"amount": 45000, "date": "2024-02-15", "category": "freelance"},
+    {"amount": 55000, "date": "2024-03-15", "category": "professional_fees"},
+)
+_SAMPLE_EXPENSES = (
+    {"amount": 5000, "date": "2024-01-10", "category": "internet"},
+    {"amount": 3000, "date": "2024-01-15", "category": "software subscription"},
+    {"amount": 2000, "date": "2024-02-10", "category": "course"},
+)
 
 @router.get("/insights", response_model=TaxInsightResponse)
-async def get_tax_insights(user_id: str = Query(...)):
+async def get_tax_insights(user_id: UUID = Depends(current_user), tax_agent: TaxAgent = Depends(get_tax_agent)):
     """Get tax insights and estimates"""
     try:
         # TODO: Fetch real data from database
-        income_data = [
-            {"amount": 50000, "date": "2024-01-15", "category": "freelance"},
-            {"amount": 45000, "date": "2024-02-15", "category": "freelance"},
-            {"amount": 55000, "date": "2024-03-15", "category": "professional_fees"},
-        ]
-        expense_data = [
-            {"amount": 5000, "date": "2024-01-10", "category": "internet"},
-            {"amount": 3000, "date": "2024-01-15", "category": "software subscription"},
-            {"amount": 2000, "date": "2024-02-10", "category": "course"},
-        ]
+        income_data = _SAMPLE_INCOME
+        expense_data = _SAMPLE_EXPENSES
 
         current_quarter = tax_agent.get_current_quarter()
 
@@ -44,7 +52,7 @@ async def get_tax_insights(user_id: str = Query(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/gst-status")
-async def check_gst_status(user_id: str = Query(...)):
+async def check_gst_status(user_id: UUID = Depends(current_user), tax_agent: TaxAgent = Depends(get_tax_agent)):
     """Check GST registration requirement"""
     # TODO: Calculate actual annual turnover from database
     annual_turnover = 1800000  # Mock data
@@ -54,7 +62,7 @@ async def check_gst_status(user_id: str = Query(...)):
     return gst_status
 
 @router.post("/calculate-tds")
-async def calculate_tds(income_type: str, amount: float):
+async def calculate_tds(income_type: str, amount: float, tax_agent: TaxAgent = Depends(get_tax_agent)):
     """Calculate TDS on income"""
     tds_details = tax_agent.calculate_tds_on_income(income_type, amount)
 
@@ -1,71 +1,85 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Sequence
+
+import orjson
+
+from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agents.taal_core import TaalCoreAgent
-from app.db import get_db
-from app.models.db_models import Transaction
+from app.agents.taal_core import TaalCoreAgent, get_taal_core_agent
+from app.auth import current_user
+from app.db import get_async_db
 from app.models.schemas import FinancialPulseResponse, TransactionCreate, TransactionResponse
 from app.services import transaction_service
 
-router = APIRouter()
-taal_core = TaalCoreAgent()
-
-
-def _serialize_transaction(txn: Transaction) -> TransactionResponse:
-    return TransactionResponse(
-        id=str(txn.id),
-        user_id=str(txn.user_id),
-        type=txn.type,
-        amount=float(txn.amount),
-        currency=txn.currency,
-        category=txn.category,
-        subcategory=txn.subcategory,
-        description=txn.description,
-        date=txn.date,
-        client_id=str(txn.client_id) if txn.client_id else None,
-        scheduled_for=txn.scheduled_for,
-        is_recurring=txn.is_recurring,
-        recurrence_rule=txn.recurrence_rule,
-        gst_eligible=txn.gst_eligible,
-        gst_rate=float(txn.gst_rate) if txn.gst_rate is not None else None,
-        ledger_status=txn.ledger_status,
-        requires_follow_up=txn.requires_follow_up,
-        follow_up_reason=txn.follow_up_reason,
-        has_receipt=txn.has_receipt,
-        tags=txn.tags,
-        notes=txn.notes,
-        source=txn.source,
-        created_at=txn.created_at,
-        updated_at=txn.updated_at,
-    )
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+async def _json_array(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    """Encode row batches as one JSON array, emitting a chunk per batch."""
+    opening = b"["
+    async for batch in batches:
+        if batch:
+            yield opening + b",".join(orjson.dumps(row._asdict(), default=float) for row in batch)
+            opening = b","
+    yield b"[]" if opening == b"[" else b"]"
+
+
+async def _prepend(first: Sequence[Row], rest: AsyncIterator[Sequence[Row]]) -> AsyncIterator[Sequence[Row]]:
+    yield first
+    async for batch in rest:
+        yield batch
 
 
 @router.post("/", response_model=TransactionResponse)
 async def create_transaction(
     transaction: TransactionCreate,
-    user_id: str = Query(...),
-    db: Session = Depends(get_db),
+    user_id: UUID = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_transaction = transaction_service.create_transaction(db, user_id, transaction)
-    return _serialize_transaction(db_transaction)
+    return await transaction_service.create_transaction(db, user_id, transaction)
+
+
+@router.post("/bulk", response_model=List[TransactionResponse])
+async def create_transactions_bulk(
+    transactions: List[TransactionCreate],
+    user_id: UUID = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await transaction_service.create_transactions_bulk(db, user_id, transactions)
 
 
 @router.get("/", response_model=List[TransactionResponse])
 async def get_transactions(
-    user_id: str = Query(...),
+    user_id: UUID = Depends(current_user),
     type: Optional[str] = Query(None),
     limit: int = Query(100, le=1000),
-    db: Session = Depends(get_db),
 ):
-    transactions = transaction_service.list_transactions(db, user_id, type_filter=type, limit=limit)
-    return [_serialize_transaction(t) for t in transactions]
+    # The rows are the transactions table's own columns, so like the goals
+    # listing they skip response_model validation and are encoded by orjson
+    # batch by batch as the cursor advances. default=float turns the NUMERIC
+    # Decimals into JSON numbers, as the response model would.
+    batches = transaction_service.iter_transaction_batches(user_id, type_filter=type, limit=limit)
+    # The first batch is read before the status line goes out, so a failing
+    # query surfaces as an error response rather than a truncated array.
+    first = await anext(batches, ())
+    if len(first) < transaction_service.TRANSACTION_BATCH_SIZE:
+        # Everything fit in one batch; answer with a plain buffered body
+        await batches.aclose()
+        return Response(orjson.dumps([row._asdict() for row in first], default=float), media_type="application/json")
+    return StreamingResponse(_json_array(_prepend(first, batches)), media_type="application/json")
 
 
 @router.get("/pulse", response_model=FinancialPulseResponse)
-async def get_financial_pulse(user_id: str = Query(...), db: Session = Depends(get_db)):
-    income_data, expense_data = transaction_service.income_expense_series(db, user_id)
+async def get_financial_pulse(
+    user_id: UUID = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+    taal_core: TaalCoreAgent = Depends(get_taal_core_agent),
+):
+    income_data, expense_data = await transaction_service.income_expense_series(db, user_id)
 
     if not income_data and not expense_data:
         return FinancialPulseResponse(
@@ -1,57 +1,55 @@
 import logging
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
-from app.models.db_models import User
+from app.auth import current_user
+from app.db import get_async_db
 from app.models.schemas import UserCreate, UserResponse, UserSyncRequest
 from app.services import user_service
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 
-def _serialize_user(user: User) -> UserResponse:
-    return UserResponse(
-        id=str(user.id),
-        email=user.email,
-        full_name=user.full_name,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-    )
-
-
 @router.post("/register", response_model=UserResponse)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     try:
-        db_user = user_service.register_user(db, user)
-        return _serialize_user(db_user)
+        db_user = await user_service.register_user(db, user)
+        return user_service.to_user_response(db_user)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
-@router.get("/profile/{user_id}", response_model=UserResponse)
-async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
-    """Get user profile"""
-    user = user_service.get_user(db, user_id)
-    if not user:
+@router.get("/profile", response_model=UserResponse)
+async def get_user_profile(user_id: UUID = Depends(current_user)):
+    """Get the caller's profile"""
+    profile = await user_service.get_user_profile(str(user_id))
+    if not profile:
         raise HTTPException(status_code=404, detail="User not found")
-    return _serialize_user(user)
+    return profile
 
 
 @router.post("/sync", response_model=UserResponse)
-async def sync_user_profile(payload: UserSyncRequest, db: Session = Depends(get_db)):
+async def sync_user_profile(
+    payload: UserSyncRequest,
+    user_id: UUID = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
     """Ensure the authenticated user exists in the application database."""
+    if payload.id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot sync another user's profile")
     try:
-        user = user_service.sync_user_profile(
+        user = await user_service.sync_user_profile(
             db,
             user_id=payload.id,
             email=payload.email,
             full_name=payload.full_name,
         )
-        return _serialize_user(user)
+        return user_service.to_user_response(user)
     except Exception as exc:
         logger.exception("Failed to sync user profile: id=%s email=%s", payload.id, payload.email)
         raise HTTPException(status_code=400, detail=str(exc)) from exc
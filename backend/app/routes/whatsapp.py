@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Request, Form
-from app.services.whatsapp_bot import whatsapp_bot
+from uuid import UUID
 
-router = APIRouter()
+from fastapi import APIRouter, Depends, Form
+from fastapi.responses import ORJSONResponse
+from app.auth import current_user
+from app.services.whatsapp_bot import WhatsAppBot, get_whatsapp_bot
+
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/webhook")
 async def whatsapp_webhook(
     From: str = Form(...),
     Body: str = Form(...),
+    whatsapp_bot: WhatsAppBot = Depends(get_whatsapp_bot),
 ):
     """
     Webhook endpoint for incoming WhatsApp messages
@@ -19,19 +24,23 @@ async def whatsapp_webhook(
         "trend": "up"
     }
 
-    response = whatsapp_bot.handle_incoming_message(
+    response = await whatsapp_bot.handle_incoming_message(
         from_number=From,
         message_body=Body,
         user_data=user_data
     )
 
     # Send response back
-    whatsapp_bot.send_message(From, response)
+    await whatsapp_bot.send_message_async(From, response)
 
     return {"status": "success"}
 
 @router.post("/send-nudge")
-async def send_daily_nudge(user_id: str, phone_number: str):
+async def send_daily_nudge(
+    phone_number: str,
+    user_id: UUID = Depends(current_user),
+    whatsapp_bot: WhatsAppBot = Depends(get_whatsapp_bot),
+):
     """
     Send daily nudge to a user
     """
@@ -43,6 +52,6 @@ async def send_daily_nudge(user_id: str, phone_number: str):
         "trend": "up"
     }
 
-    result = whatsapp_bot.send_daily_nudge(phone_number, user_data)
+    result = await whatsapp_bot.send_daily_nudge(phone_number, user_data)
 
     return result
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.db_models import ChatResponseCache
+
+
+def normalize_message(message: str) -> str:
+    return " ".join(message.lower().split())
+
+
+def fetch_cached_reply(
+    db: Session,
+    *,
+    user_id: str,
+    message: str,
+    max_age_seconds: int,
+) -> str | None:
+    """
+    Return the newest fresh reply cached for exactly this question.
+
+    Matching on the normalized text rather than embedding similarity keeps
+    questions that differ only in a parameter ("spend in March" vs "in May",
+    "5k" vs "50k") apart. Every write to the user's data deletes their
+    cached replies, so a hit always reflects the current data.
+    """
+    stmt = (
+        select(ChatResponseCache.reply)
+        .where(
+            ChatResponseCache.user_id == user_id,
+            ChatResponseCache.message == normalize_message(message),
+            ChatResponseCache.created_at >= func.now() - timedelta(seconds=max_age_seconds),
+        )
+        .order_by(ChatResponseCache.created_at.desc())
+        .limit(1)
+    )
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def store_cached_reply(
+    db: Session,
+    *,
+    user_id: str,
+    message: str,
+    reply: str,
+) -> None:
+    if not reply:
+        return
+    db.add(ChatResponseCache(user_id=user_id, message=normalize_message(message), reply=reply))
+    db.commit()
+
+
+def invalidate_user_cache(db: Session, user_id: str) -> None:
+    """Drop every cached reply for a user, e.g. after their data changed."""
+    db.execute(delete(ChatResponseCache).where(ChatResponseCache.user_id == user_id))
+    db.commit()
+
+
+async def discard_user_cache(db: AsyncSession, user_id) -> None:
+    """Delete a user's cached replies in the caller's transaction, so it commits with their write."""
+    await db.execute(delete(ChatResponseCache).where(ChatResponseCache.user_id == user_id))
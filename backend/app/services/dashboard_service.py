@@ -1,9 +1,21 @@
+import asyncio
+import hashlib
+import heapq
+import threading
+import time
+from functools import lru_cache
+from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Dict, List, Optional
+from itertools import chain, islice
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
 
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session
+import orjson
+from cachetools import TTLCache
+from sqlalchemy import Row, Select, and_, or_, select
+from sqlalchemy.orm import joinedload
 
+from app.db import AsyncSessionLocal
 from app.models.db_models import ComplianceTask, Invoice, Transaction
 
 
@@ -13,6 +25,38 @@ MAX_ACTIONS = 4
 MAX_EVENTS = 6
 UPCOMING_WINDOW_DAYS = 14
 
+HIGHLIGHTS_CACHE_SIZE = 4096
+HIGHLIGHTS_TTL_SECONDS = 60
+
+# user_id -> (day, body, etag). Chat tools write from worker threads, so
+# both caches are only touched under the lock.
+_highlights_cache: TTLCache = TTLCache(maxsize=HIGHLIGHTS_CACHE_SIZE, ttl=HIGHLIGHTS_TTL_SECONDS)
+# user_id -> monotonic time of the last write; a build that started before
+# it may have read stale rows and is not cached
+_highlights_written: TTLCache = TTLCache(maxsize=HIGHLIGHTS_CACHE_SIZE, ttl=HIGHLIGHTS_TTL_SECONDS)
+_highlights_lock = threading.Lock()
+
+# Inbox and calendar rows only read these columns, so skip full ORM instances
+_ACTION_COLUMNS = (
+    Transaction.id,
+    Transaction.description,
+    Transaction.category,
+    Transaction.follow_up_reason,
+    Transaction.has_receipt,
+    Transaction.ledger_status,
+    Transaction.date,
+    Transaction.amount,
+)
+_EVENT_COLUMNS = (
+    Transaction.id,
+    Transaction.description,
+    Transaction.category,
+    Transaction.scheduled_for,
+    Transaction.amount,
+    Transaction.currency,
+    Transaction.type,
+)
+
 
 def _event_type_from_transaction(txn_type: str) -> str:
     """
@@ -21,193 +65,253 @@ def _event_type_from_transaction(txn_type: str) -> str:
     return "inflow" if txn_type == "income" else "outflow"
 
 
-def _format_due_status(due_date: date | None, today: date) -> str:
-    if due_date is None:
-        return "No due date"
-    delta = (due_date - today).days
+def _plural_days(count: int) -> str:
+    return f"{count} day{'s' if count != 1 else ''}"
+
+
+# Labels depend only on the whole-day offset from today, which stays within
+# a few hundred values, so each string is built once and shared by requests.
+@lru_cache(maxsize=2048)
+def _due_status_label(delta: int) -> str:
     if delta > 0:
-        return f"Due in {delta} day{'s' if delta != 1 else ''}"
+        return f"Due in {_plural_days(delta)}"
     if delta == 0:
         return "Due today"
-    return f"{abs(delta)} day{'s' if delta != 1 else ''} overdue"
+    return f"{_plural_days(-delta)} overdue"
 
 
-def _relative_label(target: date | None, today: date) -> str:
-    if target is None:
-        return "No date"
-    delta = (today - target).days
+@lru_cache(maxsize=2048)
+def _relative_day_label(delta: int) -> str:
     if delta == 0:
         return "Today"
     if delta > 0:
-        return f"{delta} day{'s' if delta != 1 else ''} ago"
-    return f"In {abs(delta)} day{'s' if abs(delta) != 1 else ''}"
+        return f"{_plural_days(delta)} ago"
+    return f"In {_plural_days(-delta)}"
 
 
-def _receivable_dict(invoice: Invoice, today: date) -> Dict:
+# Callers pass today as an ordinal; day deltas are then plain int subtraction
+def _format_due_status(due_date: date | None, today_ord: int) -> str:
+    if due_date is None:
+        return "No due date"
+    return _due_status_label(due_date.toordinal() - today_ord)
+
+
+def _relative_label(target: date | None, today_ord: int) -> str:
+    if target is None:
+        return "No date"
+    return _relative_day_label(today_ord - target.toordinal())
+
+
+@dataclass(slots=True)
+class ReceivableEntry:
+    id: str
+    title: str
+    client_name: Optional[str]
+    amount: float
+    currency: str
+    due_date: Optional[str]
+    status_label: str
+
+
+@dataclass(slots=True)
+class ComplianceEntry:
+    id: str
+    title: str
+    task_type: Optional[str]
+    due_date: Optional[str]
+    status: str
+    notes: Optional[str]
+    urgency_label: str
+
+
+@dataclass(slots=True)
+class ActionEntry:
+    id: str
+    title: str
+    category: str
+    urgency: str
+    kind: str
+    amount: Optional[float]
+
+
+@dataclass(slots=True)
+class EventEntry:
+    id: str
+    title: str
+    date: Optional[str]
+    amount: Optional[float]
+    currency: Optional[str]
+    type: str
+    source: str
+
+
+def _receivable_entry(invoice: Invoice, today_ord: int) -> ReceivableEntry:
     client_name = invoice.client.name if invoice.client else None
     title_parts = [part for part in [invoice.number, invoice.description, client_name] if part]
     title = title_parts[0] if title_parts else "Invoice"
-    return {
-        "id": str(invoice.id),
-        "title": title,
-        "client_name": client_name,
-        "amount": float(invoice.amount),
-        "currency": invoice.currency,
-        "due_date": _date_to_iso(invoice.due_date),
-        "status_label": _format_due_status(invoice.due_date, today) if invoice.due_date else invoice.status.title(),
-    }
+    return ReceivableEntry(
+        id=str(invoice.id),
+        title=title,
+        client_name=client_name,
+        amount=float(invoice.amount),
+        currency=invoice.currency,
+        due_date=_date_to_iso(invoice.due_date),
+        status_label=_format_due_status(invoice.due_date, today_ord) if invoice.due_date else invoice.status.title(),
+    )
 
 
-def _compliance_dict(task: ComplianceTask, today: date) -> Dict:
-    return {
-        "id": str(task.id),
-        "title": task.title or f"{task.task_type or 'compliance'} task",
-        "task_type": task.task_type,
-        "due_date": _date_to_iso(task.due_date),
-        "status": task.status,
-        "notes": task.notes,
-        "urgency_label": _format_due_status(task.due_date, today),
-    }
+def _compliance_entry(task: ComplianceTask, today_ord: int) -> ComplianceEntry:
+    return ComplianceEntry(
+        id=str(task.id),
+        title=task.title or f"{task.task_type or 'compliance'} task",
+        task_type=task.task_type,
+        due_date=_date_to_iso(task.due_date),
+        status=task.status,
+        notes=task.notes,
+        urgency_label=_format_due_status(task.due_date, today_ord),
+    )
 
 
-def _transaction_action_dict(txn: Transaction, today: date) -> Dict:
+def _transaction_action(txn: Row, today_ord: int) -> ActionEntry:
     title = txn.description or txn.category or "Transaction follow-up"
     category = txn.follow_up_reason or ("Receipt missing" if not txn.has_receipt else txn.ledger_status.title())
-    return {
-        "id": str(txn.id),
-        "title": title,
-        "category": category,
-        "urgency": _relative_label(txn.date, today),
-        "kind": "transaction",
-        "amount": float(txn.amount),
-    }
-
-
-def _invoice_action_dict(invoice: Dict, today: date) -> Dict:
-    return {
-        "id": f"invoice-{invoice['id']}",
-        "title": invoice["title"],
-        "category": "Invoice",
-        "urgency": _format_due_status(invoice.get("due_date"), today),
-        "kind": "invoice",
-        "amount": invoice["amount"],
-    }
-
-
-def _compliance_action_dict(task: Dict) -> Dict:
-    return {
-        "id": f"task-{task['id']}",
-        "title": task["title"],
-        "category": (task.get("task_type") or "Compliance").title(),
-        "urgency": task["urgency_label"],
-        "kind": "compliance",
-        "amount": None,
-    }
-
-
-def _build_action_inbox(
-    today: date,
-    followup_transactions: List[Transaction],
-    compliance_tasks: List[Dict],
-    receivables: List[Dict],
-) -> List[Dict]:
-    items: List[Dict] = []
+    return ActionEntry(
+        id=str(txn.id),
+        title=title,
+        category=category,
+        urgency=_relative_label(txn.date, today_ord),
+        kind="transaction",
+        amount=float(txn.amount),
+    )
 
-    for txn in followup_transactions:
-        items.append(_transaction_action_dict(txn, today))
-        if len(items) >= MAX_ACTIONS:
-            return items
 
-    for task in compliance_tasks:
-        items.append(_compliance_action_dict(task))
-        if len(items) >= MAX_ACTIONS:
-            return items
+def _invoice_action(invoice: ReceivableEntry) -> ActionEntry:
+    # The receivable already carries its due label; due_date is an ISO string by now
+    return ActionEntry(
+        id=f"invoice-{invoice.id}",
+        title=invoice.title,
+        category="Invoice",
+        urgency=invoice.status_label if invoice.due_date else "No due date",
+        kind="invoice",
+        amount=invoice.amount,
+    )
 
-    for invoice in receivables:
-        items.append(_invoice_action_dict(invoice, today))
-        if len(items) >= MAX_ACTIONS:
-            return items
 
-    return items
+def _compliance_action(task: ComplianceEntry) -> ActionEntry:
+    return ActionEntry(
+        id=f"task-{task.id}",
+        title=task.title,
+        category=(task.task_type or "Compliance").title(),
+        urgency=task.urgency_label,
+        kind="compliance",
+        amount=None,
+    )
 
 
-def _build_upcoming_events(
-    today: date,
-    scheduled_transactions: List[Transaction],
-    compliance_tasks: List[Dict],
-    receivables: List[Dict],
-) -> List[Dict]:
-    events: List[Dict] = []
+def _build_sections(
+    today_ord: int,
+    far_future: str,
+    followup_transactions: List[Row],
+    scheduled_transactions: List[Row],
+    compliance_tasks: List[ComplianceEntry],
+    receivables: List[ReceivableEntry],
+) -> Tuple[List[ActionEntry], List[EventEntry]]:
+    """
+    Build the action inbox and upcoming events in one walk over each source.
 
-    for txn in scheduled_transactions:
-        events.append(
-            {
-                "id": f"txn-{txn.id}",
-                "title": txn.description or (txn.category or "Transaction"),
-                "date": _date_to_iso(txn.scheduled_for),
-                "amount": float(txn.amount),
-                "currency": txn.currency,
-                "type": _event_type_from_transaction(txn.type or ""),
-                "source": "transaction",
-            }
+    Each receivable and compliance task yields its inbox item and its
+    calendar event in the same visit. The inbox keeps transactions, then
+    compliance, then invoices, truncated to MAX_ACTIONS.
+    """
+    transaction_actions = [
+        _transaction_action(txn, today_ord) for txn in islice(followup_transactions, MAX_ACTIONS)
+    ]
+    events: List[EventEntry] = [
+        EventEntry(
+            id=f"txn-{txn.id}",
+            title=txn.description or (txn.category or "Transaction"),
+            date=_date_to_iso(txn.scheduled_for),
+            amount=float(txn.amount),
+            currency=txn.currency,
+            type=_event_type_from_transaction(txn.type or ""),
+            source="transaction",
         )
+        for txn in scheduled_transactions
+    ]
 
+    invoice_actions: List[ActionEntry] = []
     for invoice in receivables:
+        invoice_actions.append(_invoice_action(invoice))
         events.append(
-            {
-                "id": f"invoice-event-{invoice['id']}",
-                "title": invoice["title"],
-                "date": invoice.get("due_date"),
-                "amount": invoice["amount"],
-                "currency": invoice["currency"],
-                "type": "inflow",
-                "source": "invoice",
-            }
+            EventEntry(
+                id=f"invoice-event-{invoice.id}",
+                title=invoice.title,
+                date=invoice.due_date,
+                amount=invoice.amount,
+                currency=invoice.currency,
+                type="inflow",
+                source="invoice",
+            )
         )
 
+    compliance_actions: List[ActionEntry] = []
     for task in compliance_tasks:
+        compliance_actions.append(_compliance_action(task))
         events.append(
-            {
-                "id": f"task-event-{task['id']}",
-                "title": task["title"],
-                "date": task.get("due_date"),
-                "amount": None,
-                "currency": None,
-                "type": "task",
-                "source": "compliance",
-            }
+            EventEntry(
+                id=f"task-event-{task.id}",
+                title=task.title,
+                date=task.due_date,
+                amount=None,
+                currency=None,
+                type="task",
+                source="compliance",
+            )
         )
 
-    events.sort(key=lambda event: (event["date"] or (today + timedelta(days=365))))
-    return events[:MAX_EVENTS]
+    inbox = list(islice(chain(transaction_actions, compliance_actions, invoice_actions), MAX_ACTIONS))
+    # Dates are ISO strings, so undated events sort after the far-future ISO date.
+    upcoming = heapq.nsmallest(MAX_EVENTS, events, key=lambda event: event.date or far_future)
+    return inbox, upcoming
+
+
+async def _fetch_entities(stmt: Select) -> List:
+    # One session per section: a session runs a single statement at a time,
+    # so separate pooled connections let the sections overlap.
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(stmt)).scalars().all()
+
+
+async def _fetch_rows(stmt: Select) -> List[Row]:
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(stmt)).all()
 
 
-def get_dashboard_highlights(db: Session, user_id: str) -> Dict:
+async def get_dashboard_highlights(user_id: UUID) -> Dict:
     today = date.today()
 
     receivables_query = (
-        db.query(Invoice)
-        .filter(
+        select(Invoice)
+        .options(joinedload(Invoice.client))
+        .where(
             Invoice.user_id == user_id,
             Invoice.status.in_(["sent", "overdue", "draft"]),
         )
         .order_by(Invoice.due_date.is_(None), Invoice.due_date.asc(), Invoice.created_at.desc())
         .limit(MAX_RECEIVABLES)
     )
-    receivables = [_receivable_dict(invoice, today) for invoice in receivables_query.all()]
 
     compliance_query = (
-        db.query(ComplianceTask)
-        .filter(ComplianceTask.user_id == user_id, ComplianceTask.status != "completed")
+        select(ComplianceTask)
+        .where(ComplianceTask.user_id == user_id, ComplianceTask.status != "completed")
         .order_by(ComplianceTask.due_date.is_(None), ComplianceTask.due_date.asc(), ComplianceTask.created_at.desc())
         .limit(MAX_COMPLIANCE)
     )
-    compliance_tasks = [_compliance_dict(task, today) for task in compliance_query.all()]
 
     stale_cutoff = today - timedelta(days=3)
-    followup_transactions = (
-        db.query(Transaction)
-        .filter(
+    followup_query = (
+        select(*_ACTION_COLUMNS)
+        .where(
             Transaction.user_id == user_id,
             or_(
                 Transaction.requires_follow_up.is_(True),
@@ -217,13 +321,12 @@ def get_dashboard_highlights(db: Session, user_id: str) -> Dict:
         )
         .order_by(Transaction.date.desc())
         .limit(MAX_ACTIONS)
-        .all()
     )
 
     upcoming_end = today + timedelta(days=UPCOMING_WINDOW_DAYS)
-    scheduled_transactions = (
-        db.query(Transaction)
-        .filter(
+    scheduled_query = (
+        select(*_EVENT_COLUMNS)
+        .where(
             Transaction.user_id == user_id,
             Transaction.scheduled_for.isnot(None),
             Transaction.scheduled_for >= today,
@@ -231,11 +334,22 @@ def get_dashboard_highlights(db: Session, user_id: str) -> Dict:
         )
         .order_by(Transaction.scheduled_for.asc())
         .limit(MAX_EVENTS)
-        .all()
     )
 
-    action_inbox = _build_action_inbox(today, followup_transactions, compliance_tasks, receivables)
-    upcoming_events = _build_upcoming_events(today, scheduled_transactions, compliance_tasks, receivables)
+    invoices, tasks, followup_transactions, scheduled_transactions = await asyncio.gather(
+        _fetch_entities(receivables_query),
+        _fetch_entities(compliance_query),
+        _fetch_rows(followup_query),
+        _fetch_rows(scheduled_query),
+    )
+    today_ord = today.toordinal()
+    receivables = [_receivable_entry(invoice, today_ord) for invoice in invoices]
+    compliance_tasks = [_compliance_entry(task, today_ord) for task in tasks]
+
+    far_future = (today + timedelta(days=365)).isoformat()
+    action_inbox, upcoming_events = _build_sections(
+        today_ord, far_future, followup_transactions, scheduled_transactions, compliance_tasks, receivables
+    )
 
     return {
         "receivables": receivables,
@@ -243,5 +357,36 @@ def get_dashboard_highlights(db: Session, user_id: str) -> Dict:
         "action_inbox": action_inbox,
         "upcoming_events": upcoming_events,
     }
+
+
+async def get_highlights_payload(user_id: UUID) -> Tuple[bytes, str]:
+    """
+    Serialized highlights and their strong ETag, cached per user for the day.
+
+    Entries expire after HIGHLIGHTS_TTL_SECONDS and writes drop them through
+    invalidate_highlights, so a dashboard refresh usually skips the queries.
+    """
+    today = date.today()
+    with _highlights_lock:
+        hit = _highlights_cache.get(user_id)
+    if hit is not None and hit[0] == today:
+        return hit[1], hit[2]
+
+    started = time.monotonic()
+    body = orjson.dumps(await get_dashboard_highlights(user_id))
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    with _highlights_lock:
+        if _highlights_written.get(user_id, 0.0) < started:
+            _highlights_cache[user_id] = (today, body, etag)
+    return body, etag
+
+
+def invalidate_highlights(user_id: UUID) -> None:
+    """Drop a user's cached highlights after a write that can change them."""
+    with _highlights_lock:
+        _highlights_cache.pop(user_id, None)
+        _highlights_written[user_id] = time.monotonic()
+
+
 def _date_to_iso(value: Optional[date]) -> Optional[str]:
     return value.isoformat() if value else None
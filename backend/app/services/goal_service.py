@@ -1,84 +1,125 @@
-from decimal import Decimal
-from typing import List, Optional
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
 
-from sqlalchemy.orm import Session
+from cachetools import TTLCache
+from sqlalchemy import Row, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db import AsyncSessionLocal
 from app.models.db_models import Goal
 from app.models.schemas import GoalCreate, GoalUpdate
+from app.services import chat_cache_service
 
+logger = logging.getLogger(__name__)
 
-def _to_decimal(value: float) -> Decimal:
-    return Decimal(str(value))
-
-
-def create_goal(db: Session, user_id: str, payload: GoalCreate) -> Goal:
-    goal = Goal(
-        user_id=user_id,
-        title=payload.title,
-        description=payload.description,
-        category=payload.category,
-        status=payload.status,
-        priority=payload.priority,
-        target_amount=_to_decimal(payload.target_amount),
-        current_amount=_to_decimal(payload.current_amount),
-        deadline=payload.deadline,
-        monthly_contribution=_to_decimal(payload.monthly_contribution),
-        required_monthly=_to_decimal(payload.required_monthly),
-        icon_key=payload.icon_key,
-        tags=payload.tags,
-        notes=payload.notes,
-    )
-    db.add(goal)
-    db.commit()
-    db.refresh(goal)
+GOALS_CACHE_SIZE = 4096
+GOALS_FRESH_SECONDS = 30
+# Entries past the fresh window are still served while one refresh runs.
+GOALS_STALE_SECONDS = 300
+
+_goals_cache: TTLCache = TTLCache(maxsize=GOALS_CACHE_SIZE, ttl=GOALS_STALE_SECONDS)
+_goals_refreshing: Dict[UUID, asyncio.Task] = {}
+# Chat tools invalidate from worker threads
+_goals_lock = threading.Lock()
+
+
+async def create_goal(db: AsyncSession, user_id: UUID, payload: GoalCreate) -> Goal:
+    """Insert a goal and read back its server defaults in the same round-trip."""
+    stmt = insert(Goal).values(user_id=user_id, **payload.model_dump()).returning(Goal)
+    goal = (await db.execute(stmt)).scalar_one()
+    await chat_cache_service.discard_user_cache(db, user_id)
+    await db.commit()
+    invalidate_goals(user_id)
     return goal
 
 
-def list_goals(db: Session, user_id: str) -> List[Goal]:
-    return db.query(Goal).filter(Goal.user_id == user_id).order_by(Goal.created_at.desc()).all()
+async def _fetch_goals(db: AsyncSession, user_id: UUID) -> List[Row]:
+    """Return plain column rows; the listing never needs ORM instances or relationships."""
+    stmt = (
+        select(Goal.__table__)
+        .where(Goal.user_id == user_id)
+        .order_by(Goal.created_at.desc())
+    )
+    result = await db.execute(stmt)
+    return list(result.all())
+
+
+async def _refresh_goals(user_id: UUID) -> None:
+    task = asyncio.current_task()
+    try:
+        # The request that triggered this may already have closed its session.
+        async with AsyncSessionLocal() as db:
+            rows = await _fetch_goals(db, user_id)
+    except Exception as exc:  # pragma: no cover - keep serving the stale rows
+        logger.warning("Failed to refresh goals for %s: %s", user_id, exc)
+        return
+    finally:
+        with _goals_lock:
+            owned = _goals_refreshing.get(user_id) is task
+            if owned:
+                del _goals_refreshing[user_id]
+    # Not owned means a write invalidated the entry mid-refresh, so these
+    # rows may predate it.
+    if owned:
+        with _goals_lock:
+            _goals_cache[user_id] = (time.monotonic(), rows)
 
 
-def update_goal(db: Session, goal_id: str, payload: GoalUpdate) -> Goal:
-    goal: Optional[Goal] = db.query(Goal).filter(Goal.id == goal_id).first()
+async def list_goals(db: AsyncSession, user_id: UUID) -> List[Row]:
+    """
+    Return the user's goals, newest first, with stale-while-revalidate caching.
+
+    Fresh entries are served directly; stale ones are served while a single
+    background task reloads them.
+    """
+    with _goals_lock:
+        entry: Optional[Tuple[float, List[Row]]] = _goals_cache.get(user_id)
+        if entry is not None:
+            fetched_at, rows = entry
+            if time.monotonic() - fetched_at >= GOALS_FRESH_SECONDS and user_id not in _goals_refreshing:
+                _goals_refreshing[user_id] = asyncio.create_task(_refresh_goals(user_id))
+            return rows
+
+    rows = await _fetch_goals(db, user_id)
+    with _goals_lock:
+        _goals_cache[user_id] = (time.monotonic(), rows)
+    return rows
+
+
+def invalidate_goals(user_id: UUID) -> None:
+    """Drop a user's cached goals and disown any refresh already in flight."""
+    with _goals_lock:
+        _goals_cache.pop(user_id, None)
+        _goals_refreshing.pop(user_id, None)
+
+
+async def update_goal(db: AsyncSession, user_id: UUID, goal_id: str, payload: GoalUpdate) -> Goal:
+    """Apply the provided fields with UPDATE ... RETURNING instead of load, commit, refresh."""
+    values = payload.model_dump(exclude_none=True)
+    owned = (Goal.id == goal_id, Goal.user_id == user_id)
+    if values:
+        stmt = update(Goal).where(*owned).values(**values).returning(Goal)
+    else:
+        stmt = select(Goal).where(*owned)
+    goal: Optional[Goal] = (await db.execute(stmt)).scalar_one_or_none()
     if goal is None:
         raise ValueError("Goal not found")
 
-    if payload.title is not None:
-        goal.title = payload.title
-    if payload.description is not None:
-        goal.description = payload.description
-    if payload.category is not None:
-        goal.category = payload.category
-    if payload.status is not None:
-        goal.status = payload.status
-    if payload.priority is not None:
-        goal.priority = payload.priority
-    if payload.target_amount is not None:
-        goal.target_amount = _to_decimal(payload.target_amount)
-    if payload.current_amount is not None:
-        goal.current_amount = _to_decimal(payload.current_amount)
-    if payload.deadline is not None:
-        goal.deadline = payload.deadline
-    if payload.monthly_contribution is not None:
-        goal.monthly_contribution = _to_decimal(payload.monthly_contribution)
-    if payload.required_monthly is not None:
-        goal.required_monthly = _to_decimal(payload.required_monthly)
-    if payload.icon_key is not None:
-        goal.icon_key = payload.icon_key
-    if payload.tags is not None:
-        goal.tags = payload.tags
-    if payload.notes is not None:
-        goal.notes = payload.notes
-
-    db.commit()
-    db.refresh(goal)
+    await chat_cache_service.discard_user_cache(db, user_id)
+    await db.commit()
+    invalidate_goals(user_id)
     return goal
 
 
-def delete_goal(db: Session, goal_id: str) -> None:
-    goal = db.query(Goal).filter(Goal.id == goal_id).first()
-    if goal is None:
+async def delete_goal(db: AsyncSession, user_id: UUID, goal_id: str) -> None:
+    stmt = delete(Goal).where(Goal.id == goal_id, Goal.user_id == user_id).returning(Goal.id)
+    if (await db.execute(stmt)).scalar_one_or_none() is None:
         raise ValueError("Goal not found")
 
-    db.delete(goal)
-    db.commit()
+    await chat_cache_service.discard_user_cache(db, user_id)
+    await db.commit()
+    invalidate_goals(user_id)
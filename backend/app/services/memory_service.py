@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import re
+import threading
+from functools import lru_cache
 from typing import Any, Dict, List, Sequence, Tuple
 
+from cachetools import LRUCache
 from langchain_openai import OpenAIEmbeddings
-from sqlalchemy import Select, and_, select
+from sqlalchemy import Select, and_, select, text
 from sqlalchemy.orm import Session
 
 from app.models.db_models import AgentMemory
@@ -11,6 +17,21 @@ from app.models.db_models import AgentMemory
 _EMBEDDINGS_MODEL = "text-embedding-3-small"
 _embeddings: OpenAIEmbeddings | None = None
 _MAX_MERGE_UPDATES = 4
+# HNSW candidate list per probe; the user_id filter applies after the probe,
+# so keep it comfortably above the requested limit.
+_HNSW_EF_SEARCH = 40
+
+_EMBEDDING_CACHE_SIZE = 4096
+_EMBED_BATCH_SIZE = 32
+_EMBED_BATCH_WINDOW_SECONDS = 0.01
+
+# Keyed by a digest of the whitespace-normalized text; shared by the sync
+# callers on worker threads and the async batcher, hence the lock.
+_embedding_cache: LRUCache = LRUCache(maxsize=_EMBEDDING_CACHE_SIZE)
+_embedding_cache_lock = threading.Lock()
+_pending_embeds: List[Tuple[str, bytes, asyncio.Future]] = []
+_flush_handle: asyncio.TimerHandle | None = None
+_embed_tasks: set[asyncio.Task] = set()
 
 
 def _get_embeddings() -> OpenAIEmbeddings:
@@ -24,29 +45,29 @@ def _clean_metadata(metadata: Dict[str, Any] | None) -> Dict[str, Any]:
     return metadata or {}
 
 
-def _parse_memory_sections(content: str) -> Tuple[List[str], List[str]]:
+# A section header or a "-" bullet at the start of a line, found in one scan
+_MEMORY_LINE = re.compile(
+    r"^[^\S\n]*(?:(?P<facts>user facts)|(?P<followups>follow-ups)|-(?P<item>.*))",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+@lru_cache(maxsize=256)
+def _parse_memory_sections(content: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Split stored memory text into facts and follow-ups; cached since the latest row is re-parsed on every merge."""
     facts: List[str] = []
     followups: List[str] = []
-    section: str | None = None
-    for raw_line in content.splitlines():
-        line = raw_line.strip()
-        if not line:
-            continue
-        if line.lower().startswith("user facts"):
-            section = "facts"
-            continue
-        if line.lower().startswith("follow-ups"):
-            section = "followups"
-            continue
-        if line.startswith("-"):
-            value = line[1:].strip()
-            if value.upper() == "NO_MEMORY":
-                continue
-            if section == "facts":
-                facts.append(value)
-            elif section == "followups":
-                followups.append(value)
-    return facts, followups
+    section: List[str] | None = None
+    for match in _MEMORY_LINE.finditer(content):
+        if match.lastgroup == "facts":
+            section = facts
+        elif match.lastgroup == "followups":
+            section = followups
+        elif section is not None:
+            value = match.group("item").strip()
+            if value.upper() != "NO_MEMORY":
+                section.append(value)
+    return tuple(facts), tuple(followups)
 
 
 def _format_memory_content(facts: Sequence[str], followups: Sequence[str]) -> str:
@@ -66,14 +87,15 @@ def _format_memory_content(facts: Sequence[str], followups: Sequence[str]) -> st
     return "\n".join(lines)
 
 
-def _merge_unique(existing: List[str], new_items: Sequence[str]) -> Tuple[List[str], bool]:
-    merged = list(existing)
+def _merge_unique(existing: Sequence[str], new_items: Sequence[str]) -> Tuple[List[str], bool]:
+    # dict keeps insertion order with O(1) membership checks
+    merged = dict.fromkeys(existing)
     changed = False
     for item in new_items:
         if item and item not in merged:
-            merged.append(item)
+            merged[item] = None
             changed = True
-    return merged, changed
+    return list(merged), changed
 
 
 def _maybe_merge_with_latest(
@@ -125,12 +147,90 @@ def _maybe_merge_with_latest(
     return latest
 
 
+def _embedding_key(text: str) -> Tuple[str, bytes]:
+    normalized = " ".join(text.split())
+    return normalized, hashlib.sha256(normalized.encode("utf-8")).digest()
+
+
+def _cached_embedding(key: bytes) -> List[float] | None:
+    with _embedding_cache_lock:
+        return _embedding_cache.get(key)
+
+
+def _cache_embedding(key: bytes, vector: List[float]) -> None:
+    with _embedding_cache_lock:
+        _embedding_cache[key] = vector
+
+
 def generate_embedding(text: str) -> List[float]:
     """Generate an OpenAI embedding for free-form text."""
-    if not text.strip():
+    normalized, key = _embedding_key(text)
+    if not normalized:
         return []
-    embeddings = _get_embeddings()
-    return embeddings.embed_query(text)
+    cached = _cached_embedding(key)
+    if cached is not None:
+        return cached
+    vector = _get_embeddings().embed_query(normalized)
+    _cache_embedding(key, vector)
+    return vector
+
+
+async def _embed_batch(batch: List[Tuple[str, bytes, asyncio.Future]]) -> None:
+    unique: Dict[bytes, str] = {}
+    for normalized, key, _ in batch:
+        unique.setdefault(key, normalized)
+    try:
+        vectors = await _get_embeddings().aembed_documents(list(unique.values()))
+    except Exception as exc:
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(exc)
+        return
+
+    by_key = dict(zip(unique, vectors))
+    for key, vector in by_key.items():
+        _cache_embedding(key, vector)
+    for _, key, future in batch:
+        if not future.done():
+            future.set_result(by_key[key])
+
+
+def _flush_pending_embeds() -> None:
+    global _flush_handle
+    if _flush_handle is not None:
+        _flush_handle.cancel()
+        _flush_handle = None
+    batch = _pending_embeds[:]
+    _pending_embeds.clear()
+    if batch:
+        task = asyncio.get_running_loop().create_task(_embed_batch(batch))
+        _embed_tasks.add(task)
+        task.add_done_callback(_embed_tasks.discard)
+
+
+async def agenerate_embedding(text: str) -> List[float]:
+    """
+    Async variant of generate_embedding for callers that hold no DB session.
+
+    Calls arriving within a few milliseconds of each other share one
+    embed_documents request of up to _EMBED_BATCH_SIZE texts.
+    """
+    global _flush_handle
+    normalized, key = _embedding_key(text)
+    if not normalized:
+        return []
+    cached = _cached_embedding(key)
+    if cached is not None:
+        return cached
+
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future = loop.create_future()
+    _pending_embeds.append((normalized, key, future))
+    if len(_pending_embeds) >= _EMBED_BATCH_SIZE:
+        _flush_pending_embeds()
+    elif _flush_handle is None:
+        _flush_handle = loop.call_later(_EMBED_BATCH_WINDOW_SECONDS, _flush_pending_embeds)
+    return await future
 
 
 def store_memory(
@@ -196,4 +296,6 @@ def fetch_relevant_memories(
         .order_by(AgentMemory.embedding.cosine_distance(query_embedding))
         .limit(limit)
     )
+    # SET LOCAL scopes the setting to this transaction's index probe.
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {_HNSW_EF_SEARCH}"))
     return list(db.scalars(stmt).all())
@@ -1,24 +1,23 @@
 from datetime import datetime, timedelta
-from decimal import Decimal
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import desc
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, desc, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agents.income_view import HAS_NUMPY, IncomeView
+from app.db import AsyncSessionLocal
 from app.models.db_models import Transaction
 from app.models.schemas import TransactionCreate
+from app.services import chat_cache_service
+from app.services.dashboard_service import invalidate_highlights
 
 
-def _to_decimal(value: float) -> Decimal:
-    return Decimal(str(value))
-
-
-def create_transaction(db: Session, user_id: str, payload: TransactionCreate) -> Transaction:
+async def create_transaction(db: AsyncSession, user_id: str, payload: TransactionCreate) -> Transaction:
     transaction = Transaction(
         user_id=user_id,
         client_id=payload.client_id,
         type=payload.type,
-        amount=_to_decimal(payload.amount),
+        amount=payload.amount,
         currency=payload.currency,
         category=payload.category,
         subcategory=payload.subcategory,
@@ -28,7 +27,7 @@ def create_transaction(db: Session, user_id: str, payload: TransactionCreate) ->
         is_recurring=payload.is_recurring,
         recurrence_rule=payload.recurrence_rule,
         gst_eligible=payload.gst_eligible,
-        gst_rate=_to_decimal(payload.gst_rate) if payload.gst_rate is not None else None,
+        gst_rate=payload.gst_rate,
         ledger_status=payload.ledger_status,
         requires_follow_up=payload.requires_follow_up,
         follow_up_reason=payload.follow_up_reason,
@@ -38,44 +37,95 @@ def create_transaction(db: Session, user_id: str, payload: TransactionCreate) ->
         source=payload.source,
     )
     db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
+    await chat_cache_service.discard_user_cache(db, user_id)
+    await db.commit()
+    await db.refresh(transaction)
+    invalidate_highlights(transaction.user_id)
     return transaction
 
 
-def list_transactions(
-    db: Session,
+async def create_transactions_bulk(
+    db: AsyncSession,
+    user_id: str,
+    payloads: Sequence[TransactionCreate],
+) -> List[Transaction]:
+    """
+    Insert many transactions in one executemany.
+
+    SQLAlchemy batches the rows into multi-row INSERT ... RETURNING
+    statements (insertmanyvalues), so N rows cost one round-trip per page
+    instead of N.
+    """
+    if not payloads:
+        return []
+    rows = [{**payload.model_dump(), "user_id": user_id} for payload in payloads]
+    transactions = list(await db.scalars(insert(Transaction).returning(Transaction), rows))
+    await chat_cache_service.discard_user_cache(db, user_id)
+    await db.commit()
+    invalidate_highlights(transactions[0].user_id)
+    return transactions
+
+
+TRANSACTION_BATCH_SIZE = 200
+
+
+async def iter_transaction_batches(
     user_id: str,
     type_filter: Optional[str] = None,
     limit: int = 100,
-) -> List[Transaction]:
-    query = db.query(Transaction).filter(Transaction.user_id == user_id).order_by(desc(Transaction.date))
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield the newest transactions as column rows, a batch at a time.
+
+    Rows come off a server-side cursor, so at most one batch is held in
+    memory and no ORM instances are built. The generator owns its session
+    because a streamed body is sent after request dependencies close theirs.
+    """
+    stmt = (
+        select(Transaction.__table__)
+        .where(Transaction.user_id == user_id)
+        .order_by(desc(Transaction.date))
+        .limit(limit)
+        .execution_options(yield_per=TRANSACTION_BATCH_SIZE)
+    )
     if type_filter:
-        query = query.filter(Transaction.type == type_filter)
-    return query.limit(limit).all()
+        stmt = stmt.where(Transaction.type == type_filter)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        async for batch in result.partitions():
+            yield batch
+
+
+Series = Union[IncomeView, List[dict]]
+
+
+def _as_series(amounts: List[float], days: List) -> Series:
+    if HAS_NUMPY:
+        # Arrays go straight into the compiled pulse kernel
+        return IncomeView.from_columns(amounts, days)
+    return [{"amount": amount, "date": day.isoformat()} for amount, day in zip(amounts, days)]
 
 
-def income_expense_series(
-    db: Session,
+async def income_expense_series(
+    db: AsyncSession,
     user_id: str,
     months: int = 3,
-) -> Tuple[List[dict], List[dict]]:
+) -> Tuple[Series, Series]:
+    """Income and expense amounts per transaction, oldest first, as bare columns."""
     start_date = (datetime.utcnow() - timedelta(days=30 * months)).date()
-    transactions = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == user_id, Transaction.date >= start_date)
+    stmt = (
+        select(Transaction.date, Transaction.type, Transaction.amount)
+        .where(
+            Transaction.user_id == user_id,
+            Transaction.date >= start_date,
+            Transaction.type.in_(("income", "expense")),
+        )
         .order_by(Transaction.date.asc())
-        .all()
     )
 
-    income = [
-        {"amount": float(t.amount), "date": t.date.isoformat()}
-        for t in transactions
-        if t.type == "income"
-    ]
-    expenses = [
-        {"amount": float(t.amount), "date": t.date.isoformat()}
-        for t in transactions
-        if t.type == "expense"
-    ]
-    return income, expenses
+    series = {"income": ([], []), "expense": ([], [])}
+    for day, txn_type, amount in await db.execute(stmt):
+        amounts, days = series[txn_type]
+        amounts.append(float(amount))
+        days.append(day)
+    return _as_series(*series["income"]), _as_series(*series["expense"])
@@ -1,39 +1,116 @@
-from typing import Optional
+import asyncio
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
 import httpx
-from sqlalchemy import text
+import orjson
+from cachetools import TTLCache
+from sqlalchemy import Text, bindparam, func, insert, or_, select, text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID, insert as pg_insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload
 
 from app.config import settings
+from app.db import AsyncSessionLocal
 from app.models.db_models import User
-from app.models.schemas import UserCreate
-
-_USER_TABLES_WITH_FOREIGN_KEY = [
-    "income_sources",
-    "clients",
-    "transactions",
-    "invoices",
-    "compliance_tasks",
-    "goals",
-    "pulse_history",
-    "chat_messages",
-    "tax_records",
-    "whatsapp_nudges",
-    "agent_memories",
-]
-
-
-def _create_supabase_user(payload: UserCreate) -> dict:
+from app.models.schemas import UserCreate, UserResponse
+
+PROFILE_CACHE_SIZE = 4096
+PROFILE_TTL_SECONDS = 60
+
+# Session-free profile snapshots; a write drops the entry through invalidate_profile.
+_profile_cache: TTLCache = TTLCache(maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_TTL_SECONDS)
+# One in-flight load per user, shared by concurrent misses
+_profile_loading: Dict[str, asyncio.Task] = {}
+
+# Profile reads only need these columns. The user's relationships fan out
+# to every owned table, so touching one raises instead of lazy-loading
+# (which cannot run implicitly under asyncio anyway).
+_PROFILE_LOAD = (
+    load_only(User.id, User.email, User.full_name, User.created_at, User.updated_at),
+    raiseload("*"),
+)
+
+# (table, column) for every foreign key onto users.id, read off the models so
+# a new user-owned table is re-pointed without editing this list
+_USER_FOREIGN_KEYS = tuple(
+    (fk.parent.table.name, fk.parent.name)
+    for table in User.metadata.sorted_tables
+    for fk in table.foreign_keys
+    if fk.column is User.__table__.c.id
+)
+
+# Every re-pointing UPDATE as a data-modifying CTE of one statement: a single
+# round-trip, and the foreign-key checks run once at the end of the statement
+# after users.id has moved too. Compiled once with typed parameters, so calls
+# neither format SQL nor parse a new TextClause. The users UPDATE also fills
+# a missing full_name and returns the moved row as a User.
+_USER_COLUMNS = tuple(User.__table__.columns)
+_MIGRATE_USER_ID = select(User).from_statement(
+    text(
+        "WITH "
+        + ", ".join(
+            f"moved_{table}_{column} AS (UPDATE {table} SET {column} = :new WHERE {column} = :old)"
+            for table, column in _USER_FOREIGN_KEYS
+        )
+        + " UPDATE users SET id = :new,"
+        " full_name = COALESCE(full_name, :full_name), updated_at = NOW()"
+        " WHERE id = :old RETURNING "
+        + ", ".join(column.name for column in _USER_COLUMNS)
+    )
+    .bindparams(
+        bindparam("new", type_=PGUUID(as_uuid=False)),
+        bindparam("old", type_=PGUUID(as_uuid=False)),
+        bindparam("full_name", type_=Text()),
+    )
+    .columns(*_USER_COLUMNS)
+)
+
+
+@lru_cache(maxsize=1)
+def _supabase_client() -> httpx.AsyncClient:
+    """Keep-alive client for the Supabase admin API, so registrations reuse pooled TLS connections."""
+    # The service-key headers never change after config load, so the
+    # client carries them instead of each request rebuilding them.
+    return httpx.AsyncClient(
+        base_url=settings.supabase_url,
+        headers={
+            "Authorization": f"Bearer {settings.supabase_service_key}",
+            "apikey": settings.supabase_service_key,
+            "Content-Type": "application/json",
+        },
+        timeout=30,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    )
+
+
+async def close_supabase_client() -> None:
+    if _supabase_client.cache_info().currsize:
+        await _supabase_client().aclose()
+        _supabase_client.cache_clear()
+
+
+# Gateway failures mean Supabase never handled the request, so a retry
+# cannot create the auth user twice
+_SUPABASE_RETRY_STATUSES = frozenset({502, 503, 504})
+_SUPABASE_RETRIES = 2
+_SUPABASE_RETRY_DELAY = 0.25
+
+
+class SupabaseAPIError(RuntimeError):
+    """A non-2xx answer from the Supabase admin API, carrying its status and a capped body"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"Supabase admin API returned {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def _create_supabase_user(payload: UserCreate) -> dict:
     if not settings.supabase_url or not settings.supabase_service_key:
         raise RuntimeError("Supabase credentials are not configured")
 
-    admin_endpoint = f"{settings.supabase_url}/auth/v1/admin/users"
-    headers = {
-        "Authorization": f"Bearer {settings.supabase_service_key}",
-        "apikey": settings.supabase_service_key,
-        "Content-Type": "application/json",
-    }
     body = {
         "email": payload.email,
         "password": payload.password,
@@ -41,100 +118,162 @@ def _create_supabase_user(payload: UserCreate) -> dict:
         "user_metadata": {"full_name": payload.full_name},
     }
 
-    with httpx.Client(timeout=30) as client:
-        response = client.post(admin_endpoint, headers=headers, json=body)
-        response.raise_for_status()
-        return response.json()
+    content = orjson.dumps(body)
+    for attempt in range(_SUPABASE_RETRIES + 1):
+        response = await _supabase_client().post("/auth/v1/admin/users", content=content)
+        if response.status_code < 400:
+            return orjson.loads(response.content)
+        if response.status_code not in _SUPABASE_RETRY_STATUSES or attempt == _SUPABASE_RETRIES:
+            break
+        await asyncio.sleep(_SUPABASE_RETRY_DELAY * (attempt + 1))
+    raise SupabaseAPIError(response.status_code, response.text[:512])
 
 
-def register_user(db: Session, payload: UserCreate) -> User:
+def _normalize_full_name(full_name: Optional[str]) -> Optional[str]:
+    """Blank names are stored as NULL (users_full_name_nonblank enforces it)"""
+    return (full_name or "").strip() or None
+
+
+async def register_user(db: AsyncSession, payload: UserCreate) -> User:
     """Create a Supabase auth user and store metadata in the users table."""
-    auth_user = _create_supabase_user(payload)
+    auth_user = await _create_supabase_user(payload)
     user_id = auth_user.get("id")
     if not user_id:
         raise RuntimeError("Supabase did not return a user id")
 
-    db_user = User(
+    # INSERT ... RETURNING reads back the server defaults in the same
+    # round-trip instead of add, commit and a refresh SELECT.
+    stmt = insert(User).values(
         id=user_id,
         email=auth_user.get("email") or payload.email,
-        full_name=payload.full_name,
-    )
-    db.add(db_user)
+        full_name=_normalize_full_name(payload.full_name),
+    ).returning(User)
     try:
-        db.commit()
+        db_user = (await db.execute(stmt)).scalar_one()
+        await db.commit()
     except IntegrityError as exc:
-        db.rollback()
+        await db.rollback()
         raise RuntimeError("Failed to persist user profile") from exc
-    db.refresh(db_user)
+    invalidate_profile(str(db_user.id))
     return db_user
 
 
-def get_user(db: Session, user_id: str) -> Optional[User]:
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: str) -> Optional[User]:
+    return await db.get(User, user_id, options=_PROFILE_LOAD)
 
 
-def _migrate_user_id(db: Session, old_user_id: str, new_user_id: str) -> None:
-    for table in _USER_TABLES_WITH_FOREIGN_KEY:
-        db.execute(
-            text(f"UPDATE {table} SET user_id = :new WHERE user_id = :old"),
-            {"new": new_user_id, "old": old_user_id},
-        )
-    db.execute(
-        text("UPDATE users SET id = :new WHERE id = :old"),
-        {"new": new_user_id, "old": old_user_id},
+def to_user_response(user: User) -> UserResponse:
+    return UserResponse(
+        id=str(user.id),
+        email=user.email,
+        full_name=user.full_name,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
     )
 
 
-def sync_user_profile(db: Session, *, user_id: str, email: str, full_name: Optional[str] = None) -> User:
-    """Ensure the app DB has a record for the Supabase-authenticated user."""
+async def _load_profile(user_id: str) -> Optional[UserResponse]:
+    task = asyncio.current_task()
+    try:
+        # Shared by every waiter, so it cannot borrow one request's session
+        async with AsyncSessionLocal() as db:
+            user = await get_user(db, user_id)
+    finally:
+        owned = _profile_loading.get(user_id) is task
+        if owned:
+            del _profile_loading[user_id]
+    profile = to_user_response(user) if user else None
+    # Not owned means a write invalidated the profile mid-load
+    if owned and profile is not None:
+        _profile_cache[user_id] = profile
+    return profile
+
+
+async def get_user_profile(user_id: str) -> Optional[UserResponse]:
+    """
+    Cache-aside profile lookup.
+
+    Hits skip the database for PROFILE_TTL_SECONDS; concurrent misses for
+    one user await a single query instead of stampeding the table.
+    """
+    profile = _profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+    task = _profile_loading.get(user_id)
+    if task is None:
+        task = asyncio.create_task(_load_profile(user_id))
+        _profile_loading[user_id] = task
+    # Shielded so one caller disconnecting does not cancel the shared load
+    return await asyncio.shield(task)
+
+
+def invalidate_profile(user_id: str) -> None:
+    """Drop a cached profile and disown any load already in flight."""
+    _profile_cache.pop(user_id, None)
+    _profile_loading.pop(user_id, None)
+
+
+async def _users_by_id_or_email(db: AsyncSession, user_id: str, email: str) -> Tuple[Optional[User], Optional[User]]:
+    """Fetch the profiles holding this id and this email in one query (a BitmapOr of the two unique indexes)."""
+    stmt = select(User).options(*_PROFILE_LOAD).where(or_(User.id == user_id, User.email == email)).limit(2)
+    rows = (await db.scalars(stmt)).all()
+    by_id = next((row for row in rows if str(row.id) == user_id), None)
+    by_email = next((row for row in rows if row.email == email), None)
+    return by_id, by_email
+
+
+async def _migrate_user_id(
+    db: AsyncSession, old_user_id: str, new_user_id: str, full_name: Optional[str]
+) -> Optional[User]:
+    params = {"new": new_user_id, "old": old_user_id, "full_name": full_name}
+    return (await db.scalars(_MIGRATE_USER_ID, params)).one_or_none()
+
+
+async def sync_user_profile(db: AsyncSession, *, user_id: str, email: str, full_name: Optional[str] = None) -> User:
+    """
+    Ensure the app DB has a record for the Supabase-authenticated user.
+
+    New and returning users are one INSERT ... ON CONFLICT (id) DO UPDATE
+    round-trip. Only an email already held under another id falls back to
+    migrating that profile to the Supabase id.
+    """
     user_id = str(user_id)
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        updated = False
-        if full_name and (not user.full_name or user.full_name.strip() == ""):
-            user.full_name = full_name
-            updated = True
-        if email and user.email != email:
-            user.email = email
-            updated = True
-        if updated:
-            db.commit()
-            db.refresh(user)
+    full_name = _normalize_full_name(full_name)
+    stmt = pg_insert(User).values(id=user_id, email=email, full_name=full_name)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.id],
+        set_={
+            "email": stmt.excluded.email,
+            # Keep a name the profile already has; only fill a missing one
+            "full_name": func.coalesce(User.full_name, stmt.excluded.full_name),
+            "updated_at": func.now(),
+        },
+    ).returning(User)
+    try:
+        user = (await db.execute(stmt)).scalar_one()
+        await db.commit()
+        invalidate_profile(user_id)
         return user
+    except IntegrityError as exc:
+        await db.rollback()
+        conflict = exc
 
-    existing = db.query(User).filter(User.email == email).first()
-    if existing:
-        if str(existing.id) != user_id:
-            _migrate_user_id(db, str(existing.id), user_id)
-            db.commit()
-            migrated = db.query(User).filter(User.id == user_id).first()
-            if not migrated:
-                raise RuntimeError("Unable to reassign user id")
-            user = migrated
-        else:
-            user = existing
-    else:
-        user = User(id=user_id, email=email, full_name=full_name)
-        db.add(user)
-        try:
-            db.commit()
-        except IntegrityError:
-            db.rollback()
-            existing_after_conflict = db.query(User).filter(User.email == email).first()
-            if existing_after_conflict:
-                return existing_after_conflict
-            raise
-        db.refresh(user)
-        return user
+    by_id, existing = await _users_by_id_or_email(db, user_id, email)
+    if existing is None:
+        raise conflict
+    if by_id is existing:
+        # Another sync inserted the same profile concurrently
+        return existing
+    if by_id is not None:
+        raise RuntimeError("Email is already linked to a different profile") from conflict
 
-    updated = False
-    if full_name and (not user.full_name or user.full_name.strip() == ""):
-        user.full_name = full_name
-        updated = True
-    if email and user.email != email:
-        user.email = email
-        updated = True
-    if updated:
-        db.commit()
-        db.refresh(user)
+    # The row comes back under its new id; drop the stale old-id instance.
+    db.expunge(existing)
+    old_user_id = str(existing.id)
+    user = await _migrate_user_id(db, old_user_id, user_id, full_name)
+    if user is None:
+        raise RuntimeError("Unable to reassign user id")
+    await db.commit()
+    invalidate_profile(old_user_id)
+    invalidate_profile(user_id)
     return user
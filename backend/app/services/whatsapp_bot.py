@@ -2,10 +2,145 @@
 WhatsApp Bot service using Twilio
 Sends daily nudges and responds to user queries
 """
+import asyncio
+import threading
+from functools import lru_cache
+import httpx
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
-from typing import Optional
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import func, select
 from app.config import settings
-from app.agents.coach_agent import CoachAgent
+from app.agents.coach_agent import get_coach_agent
+from app.db import AsyncSessionLocal
+from app.models.db_models import PulseHistory, Transaction, User
+
+TWILIO_POOL_SIZE = 50
+
+
+@lru_cache(maxsize=1)
+def get_twilio_client() -> Optional[Client]:
+    """Process-wide Twilio client, so every message reuses one pooled keep-alive session"""
+    if not (settings.twilio_account_sid and settings.twilio_auth_token):
+        return None
+    http_client = TwilioHttpClient(pool_connections=True, timeout=10)
+    http_client.session.mount(
+        "https://", HTTPAdapter(pool_connections=TWILIO_POOL_SIZE, pool_maxsize=TWILIO_POOL_SIZE)
+    )
+    return Client(settings.twilio_account_sid, settings.twilio_auth_token, http_client=http_client)
+
+
+# Concurrent sends in flight per bulk dispatch, within Twilio's rate limits
+TWILIO_MAX_CONCURRENCY = 20
+
+
+@lru_cache(maxsize=1)
+def _twilio_async_client() -> httpx.AsyncClient:
+    """Async client for the Twilio Messages REST resource, used for non-blocking sends"""
+    sid = settings.twilio_account_sid
+    return httpx.AsyncClient(
+        base_url=f"https://api.twilio.com/2010-04-01/Accounts/{sid}/",
+        auth=(sid, settings.twilio_auth_token),
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=TWILIO_MAX_CONCURRENCY, max_connections=TWILIO_POOL_SIZE),
+    )
+
+
+async def close_twilio_client() -> None:
+    if _twilio_async_client.cache_info().currsize:
+        await _twilio_async_client().aclose()
+        _twilio_async_client.cache_clear()
+
+
+# Rows per round trip while streaming bulk nudge recipients
+NUDGE_BATCH_SIZE = 500
+NUDGE_INCOME_MONTHS = 3
+
+
+def _nudge_recipients_query(user_ids: Sequence[str]):
+    """
+    Phone, latest pulse and average monthly income for each user, as one statement
+
+    Users without a phone number are skipped; users without pulse history or
+    recent income still get a nudge built from the coach's defaults.
+    """
+    latest_pulse = (
+        select(PulseHistory.user_id, PulseHistory.score, PulseHistory.trend, PulseHistory.savings_rate)
+        .where(PulseHistory.user_id.in_(user_ids))
+        .distinct(PulseHistory.user_id)
+        .order_by(PulseHistory.user_id, PulseHistory.calculated_at.desc())
+        .subquery()
+    )
+    since = date.today() - timedelta(days=30 * NUDGE_INCOME_MONTHS)
+    income = (
+        select(Transaction.user_id, (func.sum(Transaction.amount) / NUDGE_INCOME_MONTHS).label("avg_income"))
+        .where(Transaction.user_id.in_(user_ids), Transaction.type == "income", Transaction.date >= since)
+        .group_by(Transaction.user_id)
+        .subquery()
+    )
+    return (
+        select(
+            User.phone,
+            latest_pulse.c.score,
+            latest_pulse.c.trend,
+            latest_pulse.c.savings_rate,
+            income.c.avg_income,
+        )
+        .outerjoin(latest_pulse, latest_pulse.c.user_id == User.id)
+        .outerjoin(income, income.c.user_id == User.id)
+        .where(User.id.in_(user_ids), User.phone.isnot(None))
+        .execution_options(yield_per=NUDGE_BATCH_SIZE)
+    )
+
+
+async def fetch_nudge_recipients(user_ids: Sequence[str]) -> List[Tuple[str, dict]]:
+    """(phone, user_data) pairs for send_daily_nudges_bulk"""
+    recipients = []
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(_nudge_recipients_query(user_ids))
+        async for batch in result.partitions():
+            for phone, score, trend, savings_rate, avg_income in batch:
+                user_data = {"avg_income": float(avg_income or 0)}
+                if score is not None:
+                    user_data.update(pulse_score=score, trend=trend, savings_rate=float(savings_rate or 0))
+                recipients.append((phone, user_data))
+    return recipients
+
+
+# Outbound message templates, parsed once; keyed so copy can move to a
+# per-language table without touching the senders
+_MESSAGES = {
+    'spending_alert': """💰 Spending Alert!
+
+You just spent ₹{amount:,.0f} on {category}.
+
+Track your expenses regularly to stay on top of your finances!
+
+- TaalAI""",
+    'goal_milestone': """🎉 Milestone Alert!
+
+You've reached {progress}% of your "{goal_name}" goal!
+
+Keep going! You're doing great! 💪
+
+- TaalAI""",
+    'tax_reminder': """📅 Tax Reminder!
+
+{quarter} advance tax payment is due on {due_date}.
+
+Estimated amount: ₹{amount:,.0f}
+
+Don't forget to pay on time to avoid penalties!
+
+- TaalAI""",
+}
+
+
+def _whatsapp_address(number: str) -> str:
+    return number if number.startswith('whatsapp:') else f'whatsapp:{number}'
+
 
 class WhatsAppBot:
     """
@@ -13,17 +148,13 @@ class WhatsAppBot:
     """
 
     def __init__(self):
-        if settings.twilio_account_sid and settings.twilio_auth_token:
-            self.client = Client(
-                settings.twilio_account_sid,
-                settings.twilio_auth_token
-            )
-            self.from_number = settings.twilio_whatsapp_number
-        else:
-            self.client = None
-            self.from_number = None
+        self.client = get_twilio_client()
+        self.from_number = settings.twilio_whatsapp_number if self.client else None
 
-        self.coach = CoachAgent()
+    @property
+    def coach(self):
+        # Resolved on first use, so sending plain alerts never loads the LLM stack
+        return get_coach_agent()
 
     def send_message(
         self,
@@ -47,9 +178,7 @@ class WhatsAppBot:
             }
 
         try:
-            # Ensure number has whatsapp: prefix
-            if not to_number.startswith('whatsapp:'):
-                to_number = f'whatsapp:{to_number}'
+            to_number = _whatsapp_address(to_number)
 
             msg = self.client.messages.create(
                 from_=self.from_number,
@@ -68,7 +197,57 @@ class WhatsAppBot:
                 "message": str(e)
             }
 
-    def send_daily_nudge(
+    async def send_message_async(
+        self,
+        to_number: str,
+        message: str
+    ) -> dict:
+        """
+        Send a WhatsApp message without blocking the event loop
+
+        Posts straight to Twilio's Messages resource over a shared async
+        client; returns the same status dict as send_message.
+        """
+        if not self.client:
+            return {
+                "status": "error",
+                "message": "Twilio not configured"
+            }
+
+        to_number = _whatsapp_address(to_number)
+        try:
+            response = await _twilio_async_client().post(
+                "Messages.json",
+                data={"From": self.from_number, "To": to_number, "Body": message},
+            )
+            response.raise_for_status()
+            return {
+                "status": "success",
+                "message_sid": response.json()["sid"],
+                "to": to_number
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+
+    async def send_many(self, messages: Iterable[Tuple[str, str]]) -> List[dict]:
+        """
+        Send (to_number, message) pairs concurrently
+
+        At most TWILIO_MAX_CONCURRENCY requests are in flight; results come
+        back in input order.
+        """
+        semaphore = asyncio.Semaphore(TWILIO_MAX_CONCURRENCY)
+
+        async def send(to_number: str, message: str) -> dict:
+            async with semaphore:
+                return await self.send_message_async(to_number, message)
+
+        return await asyncio.gather(*(send(to_number, message) for to_number, message in messages))
+
+    async def send_daily_nudge(
         self,
         to_number: str,
         user_data: dict
@@ -83,9 +262,33 @@ class WhatsAppBot:
         Returns:
             Message delivery status
         """
-        nudge = self.coach.generate_daily_nudge(user_data)
+        nudge = await self.coach.generate_daily_nudge(user_data)
 
-        return self.send_message(to_number, nudge)
+        return await self.send_message_async(to_number, nudge)
+
+    async def send_daily_nudges_bulk(self, user_ids: Sequence[str]) -> dict:
+        """
+        Send daily nudges to many users at once
+
+        Recipient data comes from a single query, nudges are generated
+        concurrently and the sends are pipelined through send_many.
+
+        Args:
+            user_ids: Users to nudge; those without a phone number are skipped
+
+        Returns:
+            Sent and failed counts plus per-recipient delivery statuses
+        """
+        recipients = await fetch_nudge_recipients(user_ids)
+        nudges = await self.coach.batch_daily_nudges([user_data for _, user_data in recipients])
+        results = await self.send_many(zip((phone for phone, _ in recipients), nudges))
+        sent = sum(1 for result in results if result["status"] == "success")
+        return {
+            "requested": len(user_ids),
+            "sent": sent,
+            "failed": len(results) - sent,
+            "results": results,
+        }
 
     def send_spending_alert(
         self,
@@ -104,13 +307,7 @@ class WhatsAppBot:
         Returns:
             Message delivery status
         """
-        message = f"""💰 Spending Alert!
-
-You just spent ₹{amount:,.0f} on {category}.
-
-Track your expenses regularly to stay on top of your finances!
-
-- TaalAI"""
+        message = _MESSAGES['spending_alert'].format(amount=amount, category=category)
 
         return self.send_message(to_number, message)
 
@@ -131,13 +328,7 @@ Track your expenses regularly to stay on top of your finances!
         Returns:
             Message delivery status
         """
-        message = f"""🎉 Milestone Alert!
-
-You've reached {progress}% of your "{goal_name}" goal!
-
-Keep going! You're doing great! 💪
-
-- TaalAI"""
+        message = _MESSAGES['goal_milestone'].format(progress=progress, goal_name=goal_name)
 
         return self.send_message(to_number, message)
 
@@ -160,19 +351,11 @@ Keep going! You're doing great! 💪
         Returns:
             Message delivery status
         """
-        message = f"""📅 Tax Reminder!
-
-{quarter} advance tax payment is due on {due_date}.
-
-Estimated amount: ₹{amount:,.0f}
-
-Don't forget to pay on time to avoid penalties!
-
-- TaalAI"""
+        message = _MESSAGES['tax_reminder'].format(quarter=quarter, due_date=due_date, amount=amount)
 
         return self.send_message(to_number, message)
 
-    def handle_incoming_message(
+    async def handle_incoming_message(
         self,
         from_number: str,
         message_body: str,
@@ -192,7 +375,7 @@ Don't forget to pay on time to avoid penalties!
         # Use coach agent to generate contextual response
         context = user_data if user_data else {}
 
-        response = self.coach.generate_advice(
+        response = await self.coach.generate_advice(
             user_message=message_body,
             context=context,
             language='hinglish'
@@ -200,5 +383,51 @@ Don't forget to pay on time to avoid penalties!
 
         return response
 
-# Initialize bot instance
-whatsapp_bot = WhatsAppBot()
+
+@lru_cache(maxsize=1)
+def get_whatsapp_bot() -> WhatsAppBot:
+    """Process-wide bot, built on first request rather than at import (and so after any worker fork)"""
+    return WhatsAppBot()
+
+
+# The loop the process's shared async clients run on: the coach (its
+# semaphore, rate limiters and Gemini channel), the Twilio client and the
+# async database pool all bind to one loop. The app registers its own loop
+# at startup; a standalone scheduler process gets a private one instead.
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_client_loop_lock = threading.Lock()
+
+
+def set_client_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Route blocking bulk sends to the app's event loop"""
+    global _client_loop
+    with _client_loop_lock:
+        _client_loop = loop
+
+
+def _nudge_loop() -> asyncio.AbstractEventLoop:
+    global _client_loop
+    with _client_loop_lock:
+        if _client_loop is None:
+            _client_loop = asyncio.new_event_loop()
+            threading.Thread(target=_client_loop.run_forever, name="whatsapp-nudges", daemon=True).start()
+        return _client_loop
+
+
+def send_daily_nudges_bulk(user_ids: Sequence[str]) -> dict:
+    """
+    Blocking entry point for schedulers and scripts that run outside an event loop
+
+    The work is submitted to the loop the shared clients belong to, never a
+    second one. Code already running on an event loop should await
+    WhatsAppBot.send_daily_nudges_bulk instead.
+    """
+    loop = _nudge_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("send_daily_nudges_bulk would block its own event loop; await the bot method instead")
+    coro = get_whatsapp_bot().send_daily_nudges_bulk(user_ids)
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -0,0 +1,193 @@
+"""
+Coach concurrency paths: single-flight sharing, the response cache,
+rate limiting and the amount quantization that makes prompts repeat
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("aiolimiter")
+
+from app.agents import coach_agent
+from app.agents.coach_agent import CoachAgent, _quantize_amount
+
+
+class FakeGemini:
+    """Stands in for _generate_uncached; each call blocks until released"""
+
+    def __init__(self, replies=("reply",)):
+        self.replies = list(replies)
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self, prompt):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        reply = self.replies[min(self.calls, len(self.replies)) - 1]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def _agent(fake):
+    agent = CoachAgent()
+    agent._generate_uncached = fake
+    return agent
+
+
+def test_identical_prompts_share_one_call():
+    async def scenario():
+        fake = FakeGemini()
+        agent = _agent(fake)
+        waiters = [asyncio.create_task(agent._generate_with_retry("prompt")) for _ in range(3)]
+        await fake.started.wait()
+        fake.release.set()
+        return fake, agent, await asyncio.gather(*waiters)
+
+    fake, agent, replies = asyncio.run(scenario())
+
+    assert replies == ["reply"] * 3
+    assert fake.calls == 1
+    assert agent._inflight == {}
+
+
+def test_cancelled_caller_does_not_fail_the_others():
+    async def scenario():
+        fake = FakeGemini()
+        agent = _agent(fake)
+        first = asyncio.create_task(agent._generate_with_retry("prompt"))
+        second = asyncio.create_task(agent._generate_with_retry("prompt"))
+        await fake.started.wait()
+        first.cancel()
+        await asyncio.sleep(0)
+        fake.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return fake, await second
+
+    fake, reply = asyncio.run(scenario())
+
+    assert reply == "reply"
+    assert fake.calls == 1
+
+
+def test_waiters_retry_when_the_shared_call_is_cancelled():
+    async def scenario():
+        fake = FakeGemini(replies=("lost", "retried"))
+        agent = _agent(fake)
+        waiter = asyncio.create_task(agent._generate_with_retry("prompt"))
+        await fake.started.wait()
+        (inflight,) = agent._inflight.values()
+        inflight.cancel()
+        await asyncio.sleep(0)
+        fake.release.set()
+        return fake, await waiter
+
+    fake, reply = asyncio.run(scenario())
+
+    assert reply == "retried"
+    assert fake.calls == 2
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        fake = FakeGemini(replies=(RuntimeError("boom"), "ok"))
+        agent = _agent(fake)
+        waiters = [asyncio.create_task(agent._generate_with_retry("prompt", use_cache=True)) for _ in range(2)]
+        await fake.started.wait()
+        fake.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        return fake, results, await agent._generate_with_retry("prompt", use_cache=True)
+
+    fake, results, retried = asyncio.run(scenario())
+
+    assert [str(result) for result in results] == ["boom", "boom"]
+    assert retried == "ok"
+    assert fake.calls == 2
+
+
+def test_response_cache_answers_repeat_prompts():
+    async def scenario():
+        fake = FakeGemini(replies=("cached", "fresh"))
+        fake.release.set()
+        agent = _agent(fake)
+        return fake, [
+            await agent._generate_with_retry("prompt", use_cache=True),
+            await agent._generate_with_retry("  prompt\n", use_cache=True),
+            await agent._generate_with_retry("prompt"),
+        ]
+
+    fake, replies = asyncio.run(scenario())
+
+    # The key ignores surrounding whitespace; use_cache=False always calls Gemini
+    assert replies == ["cached", "cached", "fresh"]
+    assert fake.calls == 2
+
+
+def test_empty_replies_are_not_cached():
+    async def scenario():
+        fake = FakeGemini(replies=("", "second"))
+        fake.release.set()
+        agent = _agent(fake)
+        await agent._generate_with_retry("prompt", use_cache=True)
+        return await agent._generate_with_retry("prompt", use_cache=True)
+
+    assert asyncio.run(scenario()) == "second"
+
+
+def test_request_limiter_holds_calls_over_the_budget(monkeypatch):
+    monkeypatch.setattr(coach_agent.settings, "gemini_rpm", 2)
+    monkeypatch.setattr(coach_agent.settings, "gemini_tpm", 0)
+
+    async def scenario():
+        agent = CoachAgent()
+        await agent._wait_for_rate_limit("a")
+        await agent._wait_for_rate_limit("b")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(agent._wait_for_rate_limit("c"), timeout=0.05)
+        return agent
+
+    agent = asyncio.run(scenario())
+
+    # One limiter pair per model, reused across calls
+    assert list(agent._rate_limiters) == [agent.active_model_name]
+
+
+def test_token_limiter_caps_oversized_prompts(monkeypatch):
+    monkeypatch.setattr(coach_agent.settings, "gemini_rpm", 0)
+    monkeypatch.setattr(coach_agent.settings, "gemini_tpm", 10)
+
+    async def scenario():
+        # A prompt estimated above the whole per-minute budget must still pass
+        await asyncio.wait_for(CoachAgent()._wait_for_rate_limit("x" * 1000), timeout=1)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "amount, expected",
+    [(0, 0), (87.6, 88), (12345, 12000), (50210.4, 50000), (-4567, -4600), (0.0123, 0.012)],
+)
+def test_quantize_amount_keeps_two_significant_digits(monkeypatch, amount, expected):
+    monkeypatch.setattr(coach_agent.settings, "coach_amount_significant_digits", 2)
+
+    assert _quantize_amount(amount) == pytest.approx(expected)
+
+
+def test_quantize_amount_disabled(monkeypatch):
+    monkeypatch.setattr(coach_agent.settings, "coach_amount_significant_digits", 0)
+
+    assert _quantize_amount(50210.4) == 50210.4
+
+
+def test_near_identical_contexts_build_the_same_prompt(monkeypatch):
+    monkeypatch.setattr(coach_agent.settings, "coach_amount_significant_digits", 2)
+    agent = CoachAgent()
+
+    first = agent._build_advice_prompt("Can I save more?", {"avg_income": 50210, "avg_expense": 31890}, "en")
+    second = agent._build_advice_prompt("Can I save more?", {"avg_income": 49870, "avg_expense": 32140}, "en")
+
+    assert first == second
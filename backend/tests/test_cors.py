@@ -0,0 +1,104 @@
+"""
+FastCORS checks against Starlette's CORSMiddleware for the app's configurations
+"""
+import asyncio
+
+import pytest
+from starlette.middleware.cors import CORSMiddleware
+
+from app.cors import FastCORS
+
+ORIGIN = "https://app.example"
+OTHER_ORIGIN = "https://elsewhere.example"
+
+# The two shapes get_cors_config produces
+CONFIGS = {
+    "any-origin": dict(allow_origins=["*"], allow_credentials=False, allow_methods=["*"], allow_headers=["*"]),
+    "listed-origins": dict(allow_origins=[ORIGIN], allow_credentials=True, allow_methods=["*"], allow_headers=["*"]),
+}
+
+REQUESTS = {
+    "no-origin": ("GET", {}),
+    "simple": ("POST", {"origin": ORIGIN}),
+    "simple-with-cookie": ("GET", {"origin": ORIGIN, "cookie": "session=1"}),
+    "preflight": ("OPTIONS", {"origin": ORIGIN, "access-control-request-method": "PATCH"}),
+    "preflight-with-headers": (
+        "OPTIONS",
+        {
+            "origin": ORIGIN,
+            "access-control-request-method": "POST",
+            "access-control-request-headers": "authorization, content-type",
+        },
+    ),
+    "preflight-unknown-method": ("OPTIONS", {"origin": ORIGIN, "access-control-request-method": "TRACE"}),
+    "plain-options": ("OPTIONS", {"origin": ORIGIN}),
+}
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 204, "headers": [(b"x-app", b"1")]})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _call(app, method, headers):
+    """Status and CORS response headers for one request through the middleware"""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    cors_headers = {
+        name.decode("latin-1").lower(): value.decode("latin-1")
+        for name, value in start["headers"]
+        if name.lower().startswith(b"access-control-") or name.lower() == b"vary"
+    }
+    return start["status"], cors_headers
+
+
+@pytest.mark.parametrize("request_name", sorted(REQUESTS))
+@pytest.mark.parametrize("config_name", sorted(CONFIGS))
+def test_matches_starlette_cors(config_name, request_name):
+    config = CONFIGS[config_name]
+    method, headers = REQUESTS[request_name]
+
+    fast_status, fast_headers = _call(FastCORS(_endpoint, **config), method, headers)
+    starlette_status, starlette_headers = _call(CORSMiddleware(_endpoint, **config), method, headers)
+
+    assert fast_status == starlette_status
+    # A rejected preflight is rejected by its status; Starlette also sends
+    # its fixed preflight headers with the 400, which browsers ignore
+    if fast_status != 400:
+        assert fast_headers == starlette_headers
+
+
+@pytest.mark.parametrize("method", ["GET", "OPTIONS"])
+def test_unlisted_origin_gets_no_allow_origin(method):
+    config = CONFIGS["listed-origins"]
+    headers = {"origin": OTHER_ORIGIN, "access-control-request-method": "GET"}
+
+    fast_status, fast_headers = _call(FastCORS(_endpoint, **config), method, headers)
+    starlette_status, starlette_headers = _call(CORSMiddleware(_endpoint, **config), method, headers)
+
+    # Starlette still attaches its fixed headers to rejected requests; the
+    # status and the missing allow-origin are what browsers act on
+    assert fast_status == starlette_status
+    assert "access-control-allow-origin" not in fast_headers
+    assert "access-control-allow-origin" not in starlette_headers
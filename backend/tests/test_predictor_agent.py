@@ -0,0 +1,82 @@
+"""
+Income forecast checks against an ordinary least-squares reference
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.agents.income_view import IncomeView
+from app.agents.predictor_agent import PredictorAgent
+
+
+def _monthly(amounts, start=date(2024, 1, 5)):
+    return [
+        {"amount": amount, "date": (start + timedelta(days=30 * k)).isoformat()}
+        for k, amount in enumerate(amounts)
+    ]
+
+
+def _reference_forecast(records, months_ahead):
+    """What the scikit-learn LinearRegression forecast returned for the same records"""
+    dates = [datetime.fromisoformat(item["date"]) for item in records]
+    base_date, last_date = min(dates), max(dates)
+    x = np.array([(d - base_date).days for d in dates], dtype=np.float64)
+    y = np.array([item["amount"] for item in records], dtype=np.float64)
+    slope, intercept = np.polyfit(x, y, 1)
+
+    ss_res = ((y - (intercept + slope * x)) ** 2).sum()
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    r2_score = 1 - ss_res / ss_tot
+    if r2_score > 0.7:
+        confidence = "high"
+    elif r2_score > 0.4:
+        confidence = "medium"
+    else:
+        confidence = "low"
+
+    forecasts = []
+    for i in range(1, months_ahead + 1):
+        forecast_date = last_date + timedelta(days=30 * i)
+        predicted = max(0, intercept + slope * (forecast_date - base_date).days)
+        forecasts.append({
+            "month": forecast_date.strftime("%b %Y"),
+            "predicted_amount": round(predicted, 2),
+            "confidence": confidence,
+        })
+    return forecasts
+
+
+SERIES = {
+    "rising": [30200, 30800, 32500, 32900, 34600, 35100, 36700, 37300],
+    "noisy": [20000, 60000, 22000, 58000, 21000, 61000, 19000],
+    "falling": [50000, 35000, 20000, 5000],
+}
+
+
+@pytest.mark.parametrize("name", sorted(SERIES))
+def test_forecast_matches_least_squares(name):
+    records = _monthly(SERIES[name])
+    forecast = PredictorAgent().forecast_income(records, months_ahead=4)
+    expected = _reference_forecast(records, months_ahead=4)
+
+    assert [f["month"] for f in forecast] == [e["month"] for e in expected]
+    assert [f["confidence"] for f in forecast] == [e["confidence"] for e in expected]
+    assert [f["predicted_amount"] for f in forecast] == pytest.approx(
+        [e["predicted_amount"] for e in expected], abs=0.01
+    )
+
+
+def test_forecast_accepts_an_income_view():
+    records = _monthly(SERIES["rising"])
+    agent = PredictorAgent()
+
+    assert agent.forecast_income(IncomeView.from_records(records)) == agent.forecast_income(records)
+
+
+def test_flat_income_forecasts_the_same_amount():
+    forecast = PredictorAgent().forecast_income(_monthly([40000] * 5))
+
+    assert [f["predicted_amount"] for f in forecast] == [40000.0] * 3
+    assert {f["confidence"] for f in forecast} == {"high"}
@@ -0,0 +1,34 @@
+"""
+Every API route is registered once, under its own prefix
+"""
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.main import ROUTES, app
+
+
+def test_router_prefixes_are_unique():
+    prefixes = [prefix for _, prefix, _ in ROUTES]
+
+    assert len(set(prefixes)) == len(prefixes)
+
+
+def test_no_path_and_method_is_registered_twice():
+    seen = set()
+    duplicates = []
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or ("*",):
+            key = (method, route.path)
+            if key in seen:
+                duplicates.append(key)
+            seen.add(key)
+
+    assert duplicates == []
+
+
+def test_every_router_is_registered_without_the_lifespan():
+    paths = [route.path for route in app.routes]
+
+    for _, prefix, _ in ROUTES:
+        assert any(path.startswith(prefix + "/") for path in paths), prefix
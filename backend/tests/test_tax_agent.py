@@ -0,0 +1,64 @@
+"""
+Slab tax checks against the original slab-by-slab loop
+"""
+import pytest
+
+from app.agents import tax_agent
+from app.agents.tax_agent import TAX_SLABS, TaxAgent
+
+# Slab boundaries and either side of them, plus ordinary and extreme incomes
+INCOMES = (
+    -5, 0, 1, 299_999.99, 300_000, 300_000.01, 450_000, 700_000, 850_000.5,
+    1_000_000, 1_100_000, 1_200_000, 1_350_000, 1_500_000, 1_500_001,
+    2_750_000, 12_345_678.9,
+)
+
+
+def _loop_tax(taxable_income):
+    """The per-slab loop that _calculate_tax replaced"""
+    if taxable_income <= 0:
+        return 0
+
+    tax = 0
+    prev_slab = 0
+    for slab_limit, rate in TAX_SLABS:
+        if taxable_income > prev_slab:
+            taxable_in_slab = min(taxable_income, slab_limit) - prev_slab
+            tax += taxable_in_slab * rate
+            prev_slab = slab_limit
+        else:
+            break
+    return tax * 1.04
+
+
+@pytest.mark.parametrize("income", INCOMES)
+def test_calculate_tax_matches_slab_loop(income):
+    assert TaxAgent()._calculate_tax(income) == pytest.approx(_loop_tax(income), abs=1e-6)
+
+
+@pytest.mark.parametrize("calc", ["_calc_tax_vec", "_calc_tax_vec_numpy", "_calc_tax_vec_kernel"])
+def test_vector_tax_matches_slab_loop(calc):
+    np = pytest.importorskip("numpy")
+    # _calc_tax_vec is the numba build when numba is installed; the kernel
+    # is also run uncompiled so both paths are covered either way
+    incomes = np.asarray(INCOMES, dtype=np.float64)
+
+    taxes = getattr(tax_agent, calc)(incomes, *tax_agent._SLAB_ARRAYS)
+
+    assert taxes.tolist() == pytest.approx([_loop_tax(income) for income in INCOMES], abs=1e-6)
+
+
+def test_batch_estimate_matches_single_estimates():
+    pytest.importorskip("numpy")
+    agent = TaxAgent()
+    incomes = [200_000, 900_000, 1_600_000, 4_000_000]
+    deductibles = [0, 60_000, 150_000, 500_000]
+
+    batch = agent.estimate_quarterly_tax_batch(incomes, deductibles, "Q2")
+
+    for k, (income, deductible) in enumerate(zip(incomes, deductibles)):
+        single = agent.estimate_quarterly_tax(
+            [{"amount": income}], [{"category": "rent", "amount": deductible}], "Q2"
+        )
+        assert batch["estimated_annual_tax"][k] == pytest.approx(single["estimated_annual_tax"], abs=0.01)
+        assert batch["quarterly_tax"][k] == pytest.approx(single["quarterly_tax"], abs=0.01)
@@ -0,0 +1,48 @@
+"""
+Blank full names are normalized to NULL before they reach users_full_name_nonblank
+"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import CheckConstraint
+
+from app.models.db_models import User
+from app.services.user_service import _USER_FOREIGN_KEYS, _normalize_full_name
+
+
+@pytest.mark.parametrize(
+    "full_name, expected",
+    [
+        (None, None),
+        ("", None),
+        ("   ", None),
+        ("\t\n", None),
+        ("Asha", "Asha"),
+        ("  Asha Rao \n", "Asha Rao"),
+    ],
+)
+def test_normalize_full_name(full_name, expected):
+    assert _normalize_full_name(full_name) == expected
+
+
+def test_users_table_declares_nonblank_check():
+    checks = {
+        constraint.name: str(constraint.sqltext)
+        for constraint in User.__table__.constraints
+        if isinstance(constraint, CheckConstraint)
+    }
+
+    assert checks["users_full_name_nonblank"] == "full_name IS NULL OR length(btrim(full_name)) > 0"
+
+
+def test_id_migration_covers_every_user_foreign_key():
+    referencing = {
+        table.name
+        for table in User.metadata.tables.values()
+        for fk in table.foreign_keys
+        if fk.target_fullname == "users.id"
+    }
+
+    assert {table for table, _ in _USER_FOREIGN_KEYS} == referencing
+    assert ("chat_response_cache", "user_id") in _USER_FOREIGN_KEYS
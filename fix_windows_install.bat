@@ -61,11 +61,10 @@ pip install google-generativeai==0.8.3
 if errorlevel 1 goto :error
 
 echo [5/5] Installing ML and additional libraries...
-pip install numpy scikit-learn pandas twilio gtts
+pip install numpy pandas twilio gtts
 if errorlevel 1 (
     echo WARNING: Some ML packages failed. Trying alternative versions...
     pip install "numpy<2.0.0"
-    pip install "scikit-learn==1.5.2"
     pip install pandas
 )
 
@@ -82,7 +81,7 @@ echo   Installation Summary
 echo ========================================
 echo.
 
-pip list | findstr /i "fastapi uvicorn pydantic google-generativeai numpy scikit-learn"
+pip list | findstr /i "fastapi uvicorn pydantic google-generativeai numpy"
 
 echo.
 echo ========================================
@@ -5,6 +5,7 @@ import { motion, AnimatePresence } from 'framer-motion'
 import { Send, Mic, MicOff, Sparkles, ChevronRight, Volume2 } from 'lucide-react'
 
 import { useUserStore } from '@/store/useUserStore'
+import { authHeaders } from '@/lib/api'
 import type { ChatMessage } from '@/types'
 
 type Message = ChatMessage
@@ -104,7 +105,7 @@ export default function ChatPage() {
     try {
       const response = await fetch(`${apiBase}/api/chat/message?user_id=${encodeURIComponent(user.id)}`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
         body: JSON.stringify({
           message: input,
           use_voice: isVoiceMode,
@@ -9,6 +9,7 @@ import type {
   TransactionType,
   UpcomingEventItem,
 } from '@/types'
+import { supabase } from './supabase'
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL?.trim() || 'http://localhost:8000'
 
@@ -18,6 +19,13 @@ type RequestOptions = {
 
 const ensureApiBaseUrl = (): string => API_BASE_URL
 
+// User-scoped endpoints identify the caller from the Supabase access token.
+export const authHeaders = async (): Promise<Record<string, string>> => {
+  const { data } = await supabase.auth.getSession()
+  const token = data.session?.access_token
+  return token ? { Authorization: `Bearer ${token}` } : {}
+}
+
 const handleResponse = async (response: Response) => {
   if (response.ok) {
     return response.json()
@@ -104,7 +112,7 @@ export async function fetchTransactions(
   const response = await fetch(url.toString(), {
     method: 'GET',
     signal: options?.signal,
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
   })
 
   const data = await handleResponse(response)
@@ -123,7 +131,7 @@ export async function fetchGoals(userId: string, options?: RequestOptions): Prom
   const response = await fetch(url.toString(), {
     method: 'GET',
     signal: options?.signal,
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
   })
 
   const data = await handleResponse(response)
@@ -167,7 +175,7 @@ export async function createTransaction(
 
   const response = await fetch(url.toString(), {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
     body: JSON.stringify(payload),
   })
 
@@ -200,7 +208,7 @@ export async function createGoal(userId: string, payload: CreateGoalPayload): Pr
 
   const response = await fetch(url.toString(), {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
     body: JSON.stringify(payload),
   })
 
@@ -214,7 +222,7 @@ export async function updateGoal(goalId: string, payload: UpdateGoalPayload): Pr
 
   const response = await fetch(url.toString(), {
     method: 'PATCH',
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
     body: JSON.stringify(payload),
   })
 
@@ -228,6 +236,7 @@ export async function deleteGoal(goalId: string): Promise<void> {
 
   const response = await fetch(url.toString(), {
     method: 'DELETE',
+    headers: await authHeaders(),
   })
 
   await handleResponse(response)
@@ -244,7 +253,7 @@ export async function syncUserProfile(payload: SyncUserProfilePayload): Promise<
   const url = new URL('/api/users/sync', baseUrl)
   const response = await fetch(url.toString(), {
     method: 'POST',
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
     body: JSON.stringify(payload),
   })
   await handleResponse(response)
@@ -261,7 +270,7 @@ export async function fetchFinancialPulse(
   const response = await fetch(url.toString(), {
     method: 'GET',
     signal: options?.signal,
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
   })
 
   const data = await handleResponse(response)
@@ -322,7 +331,7 @@ export async function fetchDashboardHighlights(
   const response = await fetch(url.toString(), {
     method: 'GET',
     signal: options?.signal,
-    headers: { 'Content-Type': 'application/json' },
+    headers: { 'Content-Type': 'application/json', ...(await authHeaders()) },
   })
 
   const data = await handleResponse(response)
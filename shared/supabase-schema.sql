@@ -10,6 +10,12 @@ create table if not exists public.users (
   updated_at timestamptz default now()
 );
 
+-- Blank names are stored as NULL, so profile sync only has to fill NULLs.
+update public.users set full_name = null where btrim(full_name) = '';
+alter table public.users drop constraint if exists users_full_name_nonblank;
+alter table public.users add constraint users_full_name_nonblank
+  check (full_name is null or length(btrim(full_name)) > 0);
+
 create table if not exists public.profiles (
   user_id uuid primary key references auth.users(id) on delete cascade,
   full_name text,
@@ -71,6 +77,17 @@ create table if not exists public.transactions (
   updated_at timestamptz default now()
 );
 
+-- Top-N-per-user reads (latest by date / by created_at) become index range scans.
+create index if not exists transactions_user_date_idx
+  on public.transactions(user_id, date desc);
+
+create index if not exists transactions_user_created_idx
+  on public.transactions(user_id, created_at desc);
+
+-- Per-type date ranges (pulse totals, type-filtered listings).
+create index if not exists transactions_user_type_date_idx
+  on public.transactions(user_id, type, date);
+
 create table if not exists public.invoices (
   id uuid primary key default gen_random_uuid(),
   user_id uuid references public.users(id) on delete cascade,
@@ -94,6 +111,10 @@ create table if not exists public.invoices (
     on delete set null
 );
 
+-- Open receivables per user, ordered by due date.
+create index if not exists invoices_user_status_due_idx
+  on public.invoices(user_id, status, due_date);
+
 create table if not exists public.transaction_attachments (
   id uuid primary key default gen_random_uuid(),
   transaction_id uuid references public.transactions(id) on delete cascade,
@@ -118,6 +139,9 @@ create table if not exists public.compliance_tasks (
   updated_at timestamptz default now()
 );
 
+create index if not exists compliance_tasks_user_status_due_idx
+  on public.compliance_tasks(user_id, status, due_date);
+
 -- Goals and planning --------------------------------------------------------
 create table if not exists public.goals (
   id uuid primary key default gen_random_uuid(),
@@ -139,6 +163,12 @@ create table if not exists public.goals (
   updated_at timestamptz default now()
 );
 
+create index if not exists goals_user_created_idx
+  on public.goals(user_id, created_at desc);
+
+create index if not exists goals_user_status_idx
+  on public.goals(user_id, status);
+
 create table if not exists public.goal_contributions (
   id uuid primary key default gen_random_uuid(),
   goal_id uuid references public.goals(id) on delete cascade,
@@ -298,6 +328,9 @@ create table if not exists public.pulse_history (
   calculated_at timestamptz default now()
 );
 
+create index if not exists pulse_history_user_calculated_idx
+  on public.pulse_history(user_id, calculated_at desc);
+
 create table if not exists public.chat_messages (
   id uuid primary key default gen_random_uuid(),
   user_id uuid references public.users(id) on delete cascade,
@@ -307,6 +340,9 @@ create table if not exists public.chat_messages (
   created_at timestamptz default now()
 );
 
+create index if not exists chat_messages_user_created_idx
+  on public.chat_messages(user_id, created_at desc);
+
 create table if not exists public.tax_records (
   id uuid primary key default gen_random_uuid(),
   user_id uuid references public.users(id) on delete cascade,
@@ -340,6 +376,22 @@ create table if not exists public.agent_memories (
 create index if not exists agent_memories_user_idx
   on public.agent_memories(user_id);
 
+-- HNSW needs no training data, so recall holds up while the table is small.
 create index if not exists agent_memories_embedding_idx
   on public.agent_memories
-  using ivfflat (embedding vector_cosine_ops) with (lists = 100);
+  using hnsw (embedding vector_cosine_ops) with (m = 16, ef_construction = 64);
+
+-- Chat response cache ---------------------------------------------------------
+create table if not exists public.chat_response_cache (
+  id uuid primary key default gen_random_uuid(),
+  user_id uuid references public.users(id) on delete cascade not null,
+  message text not null,
+  reply text not null,
+  created_at timestamptz default now()
+);
+
+-- Replies are matched on the exact normalized question, not by embedding.
+alter table public.chat_response_cache drop column if exists embedding;
+drop index if exists chat_response_cache_user_created_idx;
+create index if not exists chat_response_cache_user_message_idx
+  on public.chat_response_cache(user_id, message, created_at desc);
@@ -1,12 +1,9 @@
-import os
-from sqlalchemy import create_engine, text
-from app.config import settings
+from sqlalchemy import text
 from app.db import SessionLocal
 
-session = SessionLocal()
-try:
-    rows = session.execute(text('SELECT id, email FROM users')).fetchall()
-    for row in rows:
+# Server-side cursor: rows are fetched in batches of 1000 instead of all at once
+LIST_USERS = text('SELECT id, email FROM users').execution_options(stream_results=True, yield_per=1000)
+
+with SessionLocal() as session:
+    for row in session.execute(LIST_USERS):
         print(row.id, row.email)
-finally:
-    session.close()
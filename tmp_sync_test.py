@@ -1,9 +1,13 @@
-from app.db import SessionLocal
+import asyncio
+
+from app.db import AsyncSessionLocal
 from app.services import user_service
 
-session = SessionLocal()
-try:
-    user = user_service.sync_user_profile(session, user_id='test-id', email='test@example.com', full_name='Test User')
-    print('synced', user.id)
-finally:
-    session.close()
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        user = await user_service.sync_user_profile(session, user_id='test-id', email='test@example.com', full_name='Test User')
+        print('synced', user.id)
+
+
+asyncio.run(main())